@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+
+from sqlmodel import Session, select, update
+
+import database
+from cambios import secciones_cambiadas
+from database import Catalogo
+from email_service import enviar_aviso_cupo
+from models import *
+from snapshots import al_publicar
+from tiempo_real import valores_actuales
+
+# Alertas de cupo por correo. Al publicarse un snapshot se toman las secciones
+# que cambiaron en esa generación (registro de cambios) y se cruzan en memoria
+# con las alertas verificadas de sus ciclos, cargadas en una sola consulta. Una
+# alerta avisa cuando su sección pasa de llena a tener lugares ('avisada') y se
+# rearma cuando se vuelve a llenar. Los correos se agrupan por alumno y se
+# envían desde una cola en el loop de eventos, sin detener la publicación. Las
+# secciones de alertas rechazadas por el límite por hora se vuelven a evaluar
+# en cada publicación aunque no cambien, hasta que se avisen o se llenen.
+
+AVISOS_POR_HORA = 4  # Correos de aviso por alumno por hora
+PAUSA_ENTRE_CORREOS = 0.5  # Segundos entre correos para no saturar el servidor SMTP
+_LOTE_IDS = 500
+
+# Correos pendientes: correo -> {(ciclo, nrc): disponibilidad}. Un alumno con
+# un aviso pendiente recibe uno solo con todas sus secciones.
+_pendientes: dict[str, dict[tuple[str, str], int]] = {}
+_enviados: dict[str, deque[float]] = defaultdict(deque)
+_reintentar: set[tuple[int, str]] = set()  # (id_ciclo, nrc)
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_hay_pendientes: asyncio.Event | None = None
+
+
+def _puede_enviar(correo: str, ahora: float) -> bool:
+    enviados = _enviados[correo]
+    while enviados and enviados[0] <= ahora - 3600:
+        enviados.popleft()
+    return len(enviados) < AVISOS_POR_HORA
+
+
+def _encolar(avisos: dict[str, dict[tuple[str, str], int]]) -> set[str]:
+    """
+    Agrega los avisos a la cola. Devuelve los correos rechazados por el límite
+    por hora; sus alertas no se marcan y sus secciones quedan en '_reintentar'.
+    """
+    rechazados: set[str] = set()
+    ahora = time.monotonic()
+    with _lock:
+        for correo, secciones in avisos.items():
+            if correo in _pendientes:
+                _pendientes[correo].update(secciones)
+            elif _puede_enviar(correo, ahora):
+                _enviados[correo].append(ahora)
+                _pendientes[correo] = dict(secciones)
+            else:
+                rechazados.add(correo)
+    if _loop is not None and _hay_pendientes is not None:
+        try:
+            _loop.call_soon_threadsafe(_hay_pendientes.set)
+        except RuntimeError:
+            pass  # El loop ya se cerró (apagado del servidor)
+    return rechazados
+
+
+def _leer_disponibilidades(session: Session, claves) -> dict[tuple[int, str], int]:
+    por_ciclo: dict[int, list[str]] = defaultdict(list)
+    for id_ciclo, nrc in claves:
+        por_ciclo[id_ciclo].append(nrc)
+    return {
+        (id_ciclo, nrc): disponibilidad
+        for id_ciclo, nrcs in por_ciclo.items()
+        for nrc, (disponibilidad, _) in valores_actuales(session, id_ciclo, nrcs).items()
+    }
+
+
+def _disponibilidades(catalogo: Catalogo, session: Session, reintentar: set[tuple[int, str]]) -> dict[tuple[int, str], int]:
+    """
+    Disponibilidad de las secciones que cambiaron en la generación publicada y
+    de las que hay que reintentar. Si el registro no cubre la generación se
+    leen todas las secciones con alertas.
+    """
+    with Session(catalogo.engine) as catalogo_session:
+        cambiadas = secciones_cambiadas(catalogo_session, catalogo.generacion)
+        if cambiadas is None:
+            return _leer_disponibilidades(catalogo_session, session.exec(
+                select(AlertaCupo.id_ciclo, AlertaCupo.nrc).where(AlertaCupo.verificada).distinct()).all())
+
+        disponibilidad = {(id_ciclo, nrc): disp for id_ciclo, nrc, disp, _ in cambiadas}
+        faltantes = reintentar - disponibilidad.keys()
+        if faltantes:
+            disponibilidad.update(_leer_disponibilidades(catalogo_session, faltantes))
+        return disponibilidad
+
+
+def evaluar_alertas(catalogo: Catalogo) -> int:
+    """
+    Cruza las secciones cambiadas con las alertas y encola los avisos.
+    Devuelve cuántas alertas se avisaron.
+    """
+    global _reintentar
+    with Session(database.engine) as session:
+        disponibilidad = _disponibilidades(catalogo, session, _reintentar)
+        if not disponibilidad:
+            _reintentar = set()
+            return 0
+        ciclos = {id_ciclo for id_ciclo, _ in disponibilidad}
+        nombres = dict(session.exec(
+            select(Ciclo.id, Ciclo.nombre).where(Ciclo.id.in_(ciclos))).all())  # type: ignore
+
+        avisos: dict[str, dict[tuple[str, str], int]] = defaultdict(dict)
+        por_correo: dict[str, list[int]] = defaultdict(list)
+        secciones_de: dict[str, set[tuple[int, str]]] = defaultdict(set)
+        rearmar: list[int] = []
+        for id_alerta, id_ciclo, nrc, avisada, correo in session.exec(
+            select(AlertaCupo.id, AlertaCupo.id_ciclo, AlertaCupo.nrc, AlertaCupo.avisada, Alumno.correo)
+            .join(Alumno, AlertaCupo.id_alumno == Alumno.id)  # type: ignore
+            .where(AlertaCupo.verificada, AlertaCupo.id_ciclo.in_(ciclos))  # type: ignore
+        ).all():
+            actual = disponibilidad.get((id_ciclo, nrc))
+            if actual is None:
+                continue
+            if actual > 0 and not avisada:
+                avisos[correo][(nombres[id_ciclo], nrc)] = actual
+                por_correo[correo].append(id_alerta)
+                secciones_de[correo].add((id_ciclo, nrc))
+            elif actual <= 0 and avisada:
+                rearmar.append(id_alerta)
+
+        rechazados = _encolar(avisos) if avisos else set()
+        avisadas = [i for correo, ids in por_correo.items() if correo not in rechazados for i in ids]
+        # Las que siguen rechazadas se reevalúan en la siguiente publicación
+        _reintentar = {clave for correo in rechazados for clave in secciones_de[correo]}
+        for ids, valor in ((avisadas, True), (rearmar, False)):
+            for inicio in range(0, len(ids), _LOTE_IDS):
+                session.exec(update(AlertaCupo).where(
+                    AlertaCupo.id.in_(ids[inicio:inicio + _LOTE_IDS])).values(avisada=valor))  # type: ignore
+        session.commit()
+
+    if rechazados:
+        print(f"[ALERTAS] {len(rechazados)} alumnos alcanzaron el límite de avisos por hora.")
+    return len(avisadas)
+
+
+@al_publicar
+def _evaluar_alertas(catalogo: Catalogo):
+    avisadas = evaluar_alertas(catalogo)
+    if avisadas:
+        print(f"[ALERTAS] {avisadas} alertas de cupo encoladas.")
+
+
+async def procesar_avisos():
+    """
+    Tarea de fondo que envía los avisos encolados, un correo por alumno.
+    """
+    global _loop, _hay_pendientes
+    _loop = asyncio.get_running_loop()
+    _hay_pendientes = asyncio.Event()
+    _hay_pendientes.set()  # Avisos encolados antes de que arrancara la tarea
+    while True:
+        await _hay_pendientes.wait()
+        _hay_pendientes.clear()
+        while True:
+            with _lock:
+                if not _pendientes:
+                    break
+                correo = next(iter(_pendientes))
+                secciones = _pendientes.pop(correo)
+            try:
+                await enviar_aviso_cupo(correo, [
+                    (ciclo, nrc, disponibilidad)
+                    for (ciclo, nrc), disponibilidad in sorted(secciones.items())
+                ])
+            except Exception as e:
+                print(f"[ALERTAS] No se pudo avisar a {correo}: {e}")
+            await asyncio.sleep(PAUSA_ENTRE_CORREOS)
@@ -0,0 +1,208 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Callable, Generic, NamedTuple, TypeVar
+
+from sqlalchemy import Engine, delete
+from sqlmodel import Session, select, func
+
+import database
+from database import crear_engine_solo_lectura, engine, sqlite_file_name
+from models import *
+from snapshots import crear_esquema_catalogo
+from migraciones import migrar_archivo
+
+
+ARCHIVO_DIR = "archivo"
+DIAS_PARA_CERRAR_CICLO = 30  # Días después de la última fecha_fin para considerar cerrado un ciclo
+
+# Filas que se copian a la partición de un ciclo. Las tablas de dimensiones
+# solo llevan las filas a las que hacen referencia las secciones del ciclo.
+_SECCIONES_DEL_CICLO = "SELECT id FROM origen.seccion WHERE id_ciclo = :ciclo"
+_MATERIAS_DEL_CICLO = "SELECT id_materia FROM origen.seccion WHERE id_ciclo = :ciclo"
+_FILTROS_PARTICION = {
+    Ciclo.__tablename__: "id = :ciclo",
+    Seccion.__tablename__: "id_ciclo = :ciclo",
+    Sesion.__tablename__: f"id_seccion IN ({_SECCIONES_DEL_CICLO})",
+    Materia.__tablename__: f"id IN ({_MATERIAS_DEL_CICLO})",
+    Profesor.__tablename__: "id IN (SELECT id_profesor FROM origen.seccion WHERE id_ciclo = :ciclo)",
+    Centro.__tablename__: "id IN (SELECT id_centro FROM origen.seccion WHERE id_ciclo = :ciclo)",
+    Aula.__tablename__: f"id IN (SELECT id_aula FROM origen.sesion WHERE id_seccion IN ({_SECCIONES_DEL_CICLO}))",
+    CarreraMateriaLink.__tablename__: f"id_materia IN ({_MATERIAS_DEL_CICLO})",
+    Carrera.__tablename__: f"id IN (SELECT id_carrera FROM origen.carreramaterialink WHERE id_materia IN ({_MATERIAS_DEL_CICLO}))",
+    CentroCarreraLink.__tablename__: "id_centro IN (SELECT id_centro FROM origen.seccion WHERE id_ciclo = :ciclo)",
+}
+
+
+class Particion(NamedTuple):
+    nombre_ciclo: str
+    engine: Engine
+
+
+# Particiones de solo lectura por id de ciclo
+_particiones: dict[int, Particion] = {}
+
+
+def ruta_particion(nombre_ciclo: str) -> str:
+    return os.path.join(ARCHIVO_DIR, f"ciclo-{nombre_ciclo}.db")
+
+
+def cargar_particiones():
+    """
+    Abre las particiones registradas en la base principal.
+    """
+    with Session(engine) as session:
+        archivados = session.exec(select(CicloArchivado)).all()
+    for archivado in archivados:
+        if not os.path.exists(archivado.ruta):
+            print(f"[ARCHIVO] Falta la partición {archivado.ruta}. Se omite.")
+            continue
+        if migrar_archivo(archivado.ruta):
+            print(f"[ARCHIVO] Partición {archivado.nombre} migrada al esquema actual.")
+        _particiones[archivado.id_ciclo] = Particion(
+            archivado.nombre, crear_engine_solo_lectura(archivado.ruta))
+    if _particiones:
+        print(f"[ARCHIVO] {len(_particiones)} ciclos archivados disponibles.")
+
+
+def esta_archivado(id_ciclo: int | None) -> bool:
+    return id_ciclo in _particiones
+
+
+def nombres_archivados() -> set[str]:
+    return {particion.nombre_ciclo for particion in _particiones.values()}
+
+
+def ciclos_archivados() -> list[int]:
+    return sorted(_particiones)
+
+
+def engine_para_ciclo(id_ciclo: int | None) -> Engine:
+    """
+    Engine que contiene las secciones del ciclo: su partición si está archivado,
+    o el catálogo activo en otro caso.
+    """
+    particion = _particiones.get(id_ciclo) if id_ciclo is not None else None
+    if particion is not None:
+        return particion.engine
+    return database.catalogo_activo.engine
+
+
+T = TypeVar("T")
+
+
+class IndiceArchivado(Generic[T]):
+    """
+    Índice en memoria de un ciclo archivado. Las particiones no cambian, así
+    que se construye una sola vez desde la partición y se conserva.
+    """
+
+    def __init__(self, construir: Callable[[Session, int], T]):
+        self._construir = construir
+        self._indices: dict[int, T] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, id_ciclo: int) -> T:
+        indice = self._indices.get(id_ciclo)
+        if indice is None:
+            with self._lock:
+                indice = self._indices.get(id_ciclo)
+                if indice is None:
+                    with Session(engine_para_ciclo(id_ciclo)) as session:
+                        indice = self._construir(session, id_ciclo)
+                    self._indices[id_ciclo] = indice
+        return indice
+
+
+def ciclos_cerrados(session: Session) -> list[int]:
+    """
+    Ciclos no archivados cuyas sesiones terminaron hace más de DIAS_PARA_CERRAR_CICLO.
+    """
+    limite = datetime.date.today() - datetime.timedelta(days=DIAS_PARA_CERRAR_CICLO)
+    stmt = (
+        select(Seccion.id_ciclo)
+        .join(Sesion)
+        .group_by(Seccion.id_ciclo)
+        .having(func.max(Sesion.fecha_fin) < limite)
+    )
+    return [id_ciclo for id_ciclo in session.exec(stmt).all()
+            if id_ciclo is not None and id_ciclo not in _particiones]
+
+
+def _construir_particion(id_ciclo: int, ruta: str) -> int:
+    temporal = ruta + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    conn = sqlite3.connect(temporal, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS origen", (sqlite_file_name,))
+        conn.execute("BEGIN")
+        crear_esquema_catalogo(conn)
+        for tabla, filtro in _FILTROS_PARTICION.items():
+            conn.execute(
+                f"INSERT INTO main.{tabla} SELECT * FROM origen.{tabla} WHERE {filtro}",
+                {"ciclo": id_ciclo}
+            )
+        secciones = conn.execute(f"SELECT count(*) FROM main.{Seccion.__tablename__}").fetchone()[0]
+        version = conn.execute("PRAGMA origen.user_version").fetchone()[0]
+        conn.execute(f"PRAGMA main.user_version = {int(version)}")
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE origen")
+
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")  # Compactar: la partición ya no vuelve a escribirse
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+
+    os.replace(temporal, ruta)
+    return secciones
+
+
+def archivar_ciclo(id_ciclo: int) -> int:
+    """
+    Mueve las secciones y sesiones de un ciclo a su partición de solo lectura (bloqueante).
+    Retorna el número de secciones archivadas. Después hay que publicar un snapshot
+    para que el catálogo activo deje de incluirlas.
+    """
+    if id_ciclo in _particiones:
+        return 0
+
+    with Session(engine) as session:
+        ciclo = session.get(Ciclo, id_ciclo)
+        if ciclo is None:
+            raise ValueError(f"Ciclo {id_ciclo} no existe")
+        nombre = ciclo.nombre
+
+        os.makedirs(ARCHIVO_DIR, exist_ok=True)
+        ruta = ruta_particion(nombre)
+        secciones = _construir_particion(id_ciclo, ruta)
+
+        # Registrar primero la partición: a partir de aquí las lecturas del
+        # ciclo se resuelven en ella, antes de borrar las filas calientes.
+        _particiones[id_ciclo] = Particion(nombre, crear_engine_solo_lectura(ruta))
+        session.add(CicloArchivado(
+            id_ciclo=id_ciclo, nombre=nombre, ruta=ruta, secciones=secciones))
+
+        ids_secciones = select(Seccion.id).where(Seccion.id_ciclo == id_ciclo)
+        session.exec(delete(Sesion).where(Sesion.id_seccion.in_(ids_secciones)))  # type: ignore
+        session.exec(delete(Seccion).where(Seccion.id_ciclo == id_ciclo))  # type: ignore
+        session.commit()
+
+    print(f"[ARCHIVO] Ciclo {nombre} archivado en {ruta} ({secciones} secciones).")
+    return secciones
+
+
+def archivar_ciclos_cerrados() -> list[str]:
+    """
+    Archiva todos los ciclos cerrados (bloqueante). Retorna sus nombres.
+    """
+    with Session(engine) as session:
+        pendientes = ciclos_cerrados(session)
+    archivados = []
+    for id_ciclo in pendientes:
+        archivar_ciclo(id_ciclo)
+        archivados.append(_particiones[id_ciclo].nombre_ciclo)
+    return archivados
@@ -0,0 +1,147 @@
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable
+
+from sqlmodel import Session, select
+
+from archivo import IndiceArchivado, ciclos_archivados
+from database import Catalogo
+from lifespan import alias_a_centro
+from models import *
+from snapshots import al_publicar
+
+# Autocompletado por prefijo: un arreglo ordenado de claves normalizadas
+# (sin acentos ni mayúsculas) y búsqueda binaria. Cada nombre se indexa desde
+# cada una de sus palabras, para que "perez" encuentre "GARCIA PEREZ JUAN".
+# Con filtro de ciclo o centro se busca en un arreglo con solo las claves de
+# entidades presentes ahí, construido al primer uso del filtro.
+
+# Presencia de una entidad: (ciclo, centro) donde tiene secciones; None = cualquiera
+Filtro = tuple[int | None, int | None]
+Presencia = dict[tuple[str, int], set[Filtro]]
+
+
+def normalizar(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return " ".join("".join(c for c in descompuesto if not unicodedata.combining(c)).split())
+
+
+def _sufijos_de_palabras(texto: str) -> list[str]:
+    palabras = normalizar(texto).split(" ")
+    return [" ".join(palabras[i:]) for i in range(len(palabras)) if palabras[i]]
+
+
+class IndiceAutocompletar:
+    def __init__(self, generacion: int, entradas: list[tuple[str, Sugerencia, tuple[str, int]]], presencia: Presencia):
+        entradas.sort(key=lambda entrada: entrada[0])
+        self.generacion = generacion
+        self.claves = [clave for clave, _, _ in entradas]
+        self.sugerencias = [sugerencia for _, sugerencia, _ in entradas]
+        self.entidades = [entidad for _, _, entidad in entradas]
+        self.presencia = presencia
+        self._filtradas: dict[Filtro, tuple[list[str], list[int]]] = {}
+
+    def _claves_de(self, filtro: Filtro) -> tuple[list[str], list[int]]:
+        """
+        Claves ordenadas de las entidades presentes en el filtro y su posición
+        en los arreglos completos.
+        """
+        filtradas = self._filtradas.get(filtro)
+        if filtradas is None:
+            posiciones = [
+                i for i, entidad in enumerate(self.entidades)
+                if filtro in self.presencia.get(entidad, ())
+            ]
+            filtradas = self._filtradas[filtro] = ([self.claves[i] for i in posiciones], posiciones)
+        return filtradas
+
+    def sugerir(self, prefijo: str, limit: int, ciclo: int | None = None, centro: int | None = None) -> list[Sugerencia]:
+        """
+        Hasta 'limit' sugerencias cuya clave empieza con 'prefijo', en orden alfabético.
+        Con ciclo o centro solo se sugieren entidades con secciones ahí.
+        """
+        prefijo = normalizar(prefijo)
+        if not prefijo:
+            return []
+        claves, posiciones = self.claves, None
+        if ciclo is not None or centro is not None:
+            claves, posiciones = self._claves_de((ciclo, centro))
+
+        resultado: list[Sugerencia] = []
+        vistas: set[tuple[str, int]] = set()
+        i = bisect_left(claves, prefijo)
+        while i < len(claves) and len(resultado) < limit and claves[i].startswith(prefijo):
+            j = posiciones[i] if posiciones is not None else i
+            if self.entidades[j] not in vistas:
+                vistas.add(self.entidades[j])
+                resultado.append(self.sugerencias[j])
+            i += 1
+        return resultado
+
+
+def construir_presencia(session: Session, id_ciclo: int | None = None) -> Presencia:
+    stmt = select(Seccion.id_ciclo, Seccion.id_centro, Seccion.id_materia, Seccion.id_profesor).distinct()
+    if id_ciclo is not None:
+        stmt = stmt.where(Seccion.id_ciclo == id_ciclo)
+
+    presencia: Presencia = defaultdict(set)
+    for ciclo, centro, materia, profesor in session.exec(stmt).all():
+        combinaciones = ((ciclo, centro), (ciclo, None), (None, centro))
+        presencia[("materia", materia)].update(combinaciones)
+        presencia[("profesor", profesor)].update(combinaciones)
+        presencia[("centro", centro)].update(combinaciones)
+    return dict(presencia)
+
+
+def construir_indice(session: Session, generacion: int, archivadas: Iterable[Presencia] = ()) -> IndiceAutocompletar:
+    """
+    La presencia de los ciclos 'archivadas' se suma a la del catálogo, para que
+    los filtros por centro sigan incluyendo los ciclos archivados.
+    """
+    entradas: list[tuple[str, Sugerencia, tuple[str, int]]] = []
+
+    for m in session.exec(select(Materia)).all():
+        sugerencia = Sugerencia(tipo="materia", texto=m.nombre, clave=m.clave)
+        for clave in [normalizar(m.clave)] + _sufijos_de_palabras(m.nombre):
+            entradas.append((clave, sugerencia, ("materia", m.id)))  # type: ignore
+
+    for p in session.exec(select(Profesor)).all():
+        sugerencia = Sugerencia(tipo="profesor", texto=p.nombre)
+        for clave in _sufijos_de_palabras(p.nombre):
+            entradas.append((clave, sugerencia, ("profesor", p.id)))  # type: ignore
+
+    centros = {c.nombre: c for c in session.exec(select(Centro)).all()}
+    aliases: dict[str, list[str]] = defaultdict(list)
+    for alias, nombre in alias_a_centro.items():
+        aliases[nombre].append(alias)
+    for nombre, c in centros.items():
+        sugerencia = Sugerencia(tipo="centro", texto=nombre, clave=(aliases[nombre] or [None])[0])
+        for clave in _sufijos_de_palabras(nombre) + [normalizar(a) for a in aliases[nombre]]:
+            entradas.append((clave, sugerencia, ("centro", c.id)))  # type: ignore
+
+    presencia = construir_presencia(session)
+    for archivada in archivadas:
+        for entidad, combinaciones in archivada.items():
+            presencia.setdefault(entidad, set()).update(combinaciones)
+    return IndiceAutocompletar(generacion, entradas, presencia)
+
+
+_indice = IndiceAutocompletar(0, [], {})
+_presencias_archivadas = IndiceArchivado(construir_presencia)
+
+
+def sugerir(prefijo: str, limit: int, ciclo: int | None = None, centro: int | None = None) -> list[Sugerencia]:
+    return _indice.sugerir(prefijo, limit, ciclo, centro)
+
+
+@al_publicar
+def _reconstruir_indice(catalogo: Catalogo):
+    global _indice
+    # Las secciones de los ciclos archivados viven en sus particiones
+    archivadas = [_presencias_archivadas.obtener(id_ciclo) for id_ciclo in ciclos_archivados()]
+    with Session(catalogo.engine) as session:
+        nuevo = construir_indice(session, catalogo.generacion, archivadas)
+    # Reemplazo atómico: las consultas en curso terminan con el índice anterior
+    _indice = nuevo
+    print(f"[AUTOCOMPLETAR] Índice con {len(nuevo.claves)} claves.")
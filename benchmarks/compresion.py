@@ -0,0 +1,93 @@
+"""
+Tamaño y latencia de las respuestas en cache por codificación (identidad, gzip,
+br) contra una respuesta sin cache, en /materias/ y en las secciones de una materia.
+
+    python benchmarks/compresion.py [--materias 1000] [--secciones 300]
+"""
+import argparse
+import datetime
+import sqlite3
+import time
+
+from entorno import medir, preparar
+
+
+def sembrar(materias: int, secciones: int):
+    from database import create_db_and_tables, sqlite_file_name
+    create_db_and_tables()
+    conn = sqlite3.connect(sqlite_file_name)
+    with conn:
+        conn.execute("INSERT INTO ciclo (id, nombre) VALUES (1, '2025A')")
+        conn.execute("INSERT INTO centro (id, nombre, clave) VALUES (1, 'C.U. DE CS. EXACTAS E ING.', 'D')")
+        conn.executemany("INSERT INTO materia (id, clave, nombre, creditos) VALUES (?, ?, ?, 8)",
+                         ((i, f"I{5000 + i}", f"MATERIA DE INGENIERÍA NÚMERO {i}") for i in range(1, materias + 1)))
+        conn.executemany("INSERT INTO profesor (id, nombre) VALUES (?, ?)",
+                         ((i, f"PROFESOR APELLIDO NOMBRE {i}") for i in range(1, 41)))
+        conn.executemany("INSERT INTO aula (id, salon, edificio) VALUES (?, ?, ?)",
+                         ((i, f"A{i:03d}", f"DUCT{i % 4}") for i in range(1, 21)))
+        # Todas las secciones en la primera materia; una por materia en las demás
+        filas = [(k, 1) for k in range(1, secciones + 1)]
+        filas += [(secciones + i, i) for i in range(2, materias + 1)]
+        conn.executemany(
+            "INSERT INTO seccion (id, nrc, numero, id_ciclo, id_materia, id_profesor, id_centro, cupos, disponibilidad)"
+            " VALUES (?, ?, ?, 1, ?, ?, 1, 40, ?)",
+            ((k, str(200000 + k), f"D{k % 100:02d}", m, 1 + k % 40, k % 41) for k, m in filas))
+        inicio, fin = datetime.date(2025, 1, 20).isoformat(), datetime.date(2025, 6, 1).isoformat()
+        conn.executemany(
+            "INSERT INTO sesion (id_seccion, id_aula, fecha_inicio, fecha_fin, hora_inicio, hora_fin, dias)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((k, 1 + k % 20, inicio, fin, f"{7 + k % 12:02d}:00:00.000000", f"{8 + k % 12:02d}:55:00.000000", 0b101)
+             for k, _ in filas))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--materias", type=int, default=1000)
+    parser.add_argument("--secciones", type=int, default=300)
+    args = parser.parse_args()
+
+    preparar()
+    sembrar(args.materias, args.secciones)
+    from fastapi.testclient import TestClient
+    import main as aplicacion
+    from cache import brotli, cache_respuestas, comprimir
+    from snapshots import construir_snapshot
+    construir_snapshot()
+    cliente = TestClient(aplicacion.app)
+    if brotli is None:
+        print("brotli no está instalado: solo se mide gzip")
+
+    rutas = {
+        f"/materias/?limit={args.materias}": f"{args.materias} materias",
+        "/materia/CUCEI/I5001/2025A/secciones": f"materia con {args.secciones} secciones",
+    }
+    print("Mediana de 7 peticiones (ms) y bytes del cuerpo")
+    for ruta, descripcion in rutas.items():
+        def sin_cache():
+            cache_respuestas.limpiar()
+            cliente.get(ruta, headers={"Accept-Encoding": "identity"})
+        print(f"\n{descripcion} ({ruta})")
+        print(f"  {'sin cache':<22}{medir(sin_cache):>8.2f} ms")
+
+        cuerpo = cliente.get(ruta, headers={"Accept-Encoding": "identity"}).content
+        inicio = time.perf_counter()
+        comprimir(cuerpo)
+        print(f"  {'compresión (una vez)':<22}{(time.perf_counter() - inicio) * 1000:>8.2f} ms")
+        for codificacion in ("identity", "gzip", "br"):
+            if codificacion == "br" and brotli is None:
+                continue
+            encabezados = {"Accept-Encoding": codificacion}
+            respuesta = cliente.get(ruta, headers=encabezados)
+            assert respuesta.headers.get("content-encoding", "identity") == codificacion
+            tamano = int(respuesta.headers["content-length"])
+            tiempo = medir(lambda: cliente.get(ruta, headers=encabezados))
+            print(f"  {'cache ' + codificacion:<22}{tiempo:>8.2f} ms{tamano:>10} B")
+
+            revalidado = cliente.get(ruta, headers={**encabezados, "If-None-Match": respuesta.headers["etag"]})
+            assert revalidado.status_code == 304
+            assert revalidado.headers["etag"] == respuesta.headers["etag"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Entorno común de los benchmarks: cada uno corre en un directorio temporal con
+# su propia base (la aplicación usa rutas relativas) y nunca toca database.db.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar():
+    sys.path.insert(0, RAIZ)
+    directorio = tempfile.mkdtemp(prefix="mihorario-bench-")
+    os.chdir(directorio)
+    os.environ.setdefault("MAIL_FROM", "bench@example.com")
+    print(f"Directorio de trabajo: {directorio}")
+
+
+def medir(funcion, repeticiones: int = 7) -> float:
+    """
+    Mediana en milisegundos de 'repeticiones' llamadas, tras una de calentamiento.
+    """
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
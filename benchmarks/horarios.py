@@ -0,0 +1,82 @@
+"""
+Búsqueda de horarios con muchas materias: tiempo al primer horario, a la
+última mejora y total, contra el presupuesto horarios.TIEMPO_MAXIMO.
+
+    python benchmarks/horarios.py [--materias 10 12 15 20] [--secciones 30 40]
+"""
+import argparse
+import datetime
+import random
+import time
+from collections import defaultdict
+
+from entorno import preparar
+
+# Patrones de días comunes en la oferta (bit 0 = lunes)
+PATRONES = (0b000101, 0b001010, 0b010101, 0b010000, 0b100000, 0b000001)
+
+
+def opciones_sinteticas(materias: int, secciones: tuple[int, int], semilla: int):
+    from horarios import Opcion, dias_de, evaluar, mascara_sesion
+
+    azar = random.Random(semilla)
+    opciones = {}
+    for m in range(materias):
+        grupos: dict[int, list[tuple[str, int]]] = defaultdict(list)
+        for k in range(azar.randint(*secciones)):
+            dias = azar.choice(PATRONES)
+            inicio = azar.randrange(7, 21)
+            mascara = mascara_sesion(dias, datetime.time(inicio), datetime.time(inicio + 1, 55))
+            grupos[mascara].append((f"{m:02d}{k:04d}", azar.randint(0, 40)))
+        opciones[f"M{m:02d}"] = [
+            Opcion(mascara, dias_de(mascara), sorted(nrcs, key=lambda s: (-s[1], s[0])))
+            for mascara, nrcs in sorted(grupos.items(), key=lambda g: evaluar(g[0]))
+        ]
+    return opciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--materias", type=int, nargs="+", default=[10, 12, 15, 20])
+    parser.add_argument("--secciones", type=int, nargs=2, default=[30, 40])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--semillas", type=int, default=5)
+    args = parser.parse_args()
+
+    preparar()
+    from horarios import TIEMPO_MAXIMO, BusquedaHorarios, horarios_encontrados
+
+    print(f"Presupuesto: {TIEMPO_MAXIMO * 1000:.0f} ms; {args.secciones[0]}-{args.secciones[1]} secciones por materia")
+    print(f"{'materias':>8}{'semilla':>8}{'primero ms':>12}{'última mejora ms':>18}{'total ms':>10}"
+          f"{'provisionales':>14}{'mejor':>10}{'completa':>10}")
+    excedidos = 0
+    for materias in args.materias:
+        for semilla in range(args.semillas):
+            busqueda = BusquedaHorarios(
+                opciones_sinteticas(materias, tuple(args.secciones), semilla), args.limit)
+            inicio = time.perf_counter()
+            primero = ultima_mejora = None
+            provisionales = 0
+            mejor = None
+            for horario in horarios_encontrados(busqueda):
+                transcurrido = (time.perf_counter() - inicio) * 1000
+                provisionales += horario.provisional
+                primero = primero if primero is not None else transcurrido
+                if mejor is None or (horario.dias, horario.minutos_libres) < mejor:
+                    mejor = (horario.dias, horario.minutos_libres)
+                    ultima_mejora = transcurrido
+            total = (time.perf_counter() - inicio) * 1000
+            # Margen para la expansión de los resultados después del corte
+            if total > TIEMPO_MAXIMO * 1000 + 100:
+                excedidos += 1
+            print(f"{materias:>8}{semilla:>8}{_ms(primero):>12}{_ms(ultima_mejora):>18}{total:>10.1f}"
+                  f"{provisionales:>14}{str(mejor or '-'):>10}{str(busqueda.completa):>10}")
+    print(f"Búsquedas que excedieron el presupuesto (+100 ms): {excedidos}")
+
+
+def _ms(valor: float | None) -> str:
+    return f"{valor:.1f}" if valor is not None else "-"
+
+
+if __name__ == "__main__":
+    main()
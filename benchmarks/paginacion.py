@@ -0,0 +1,70 @@
+"""
+Latencia de una página profunda con 'offset' contra la misma página con cursor
+(keyset) en /resenas/ y /profesores/{materia}.
+
+    python benchmarks/paginacion.py [--filas 200000] [--pagina 100]
+"""
+import argparse
+import datetime
+import sqlite3
+
+from entorno import medir, preparar
+
+
+def sembrar(filas: int):
+    from database import create_db_and_tables, sqlite_file_name
+    create_db_and_tables()
+    conn = sqlite3.connect(sqlite_file_name)
+    with conn:
+        conn.execute("INSERT INTO ciclo (id, nombre) VALUES (1, '2025A')")
+        conn.execute("INSERT INTO centro (id, nombre, clave) VALUES (1, 'C.U. DE CS. EXACTAS E ING.', 'D')")
+        conn.execute("INSERT INTO materia (id, clave, nombre, creditos) VALUES (1, 'I5000', 'MATERIA', 8)")
+        conn.execute("INSERT INTO aula (id, salon, edificio) VALUES (1, 'A001', 'DUCT1')")
+        conn.executemany("INSERT INTO profesor (id, nombre) VALUES (?, ?)",
+                         ((i, f"PROFESOR {i:07d}") for i in range(1, filas + 1)))
+        conn.executemany("INSERT INTO alumno (id, correo, seudonimo) VALUES (?, ?, ?)",
+                         ((i, f"a{i}@alumnos.udg.mx", f"Alumno {i}") for i in range(1, filas + 1)))
+        # Una sección por profesor de la misma materia y una reseña por profesor
+        conn.executemany(
+            "INSERT INTO seccion (id, nrc, numero, id_ciclo, id_materia, id_profesor, id_centro, cupos, disponibilidad)"
+            " VALUES (?, ?, 'D01', 1, 1, ?, 1, 40, 10)",
+            ((i, str(i), i) for i in range(1, filas + 1)))
+        ahora = datetime.datetime(2025, 1, 1).isoformat(sep=" ")
+        conn.executemany(
+            "INSERT INTO resena (id, id_profesor, id_materia, id_alumno, fecha_creacion, contenido, satisfaccion, seudonimo)"
+            " VALUES (?, ?, 1, ?, ?, 'Buena clase', 4, ?)",
+            ((i, i, i, ahora, f"Alumno {i}") for i in range(1, filas + 1)))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--pagina", type=int, default=100)
+    args = parser.parse_args()
+
+    preparar()
+    sembrar(args.filas)
+    from fastapi.testclient import TestClient
+    import main as aplicacion
+    from paginacion import codificar_cursor
+    from snapshots import construir_snapshot
+    construir_snapshot()
+    cliente = TestClient(aplicacion.app)
+
+    print(f"{args.filas} filas, páginas de {args.pagina}; mediana de 7 peticiones (ms)")
+    print(f"{'endpoint':<22}{'posición':>10}{'offset':>10}{'cursor':>10}")
+    for ruta in ("/resenas/", "/profesores/I5000"):
+        for fraccion in (0, 0.1, 0.5, 0.9, 0.999):
+            posicion = int(args.filas * fraccion)
+            # Los ids son consecutivos desde 1: la fila en 'posicion' tiene id posicion + 1
+            con_offset = f"{ruta}?limit={args.pagina}&offset={posicion}"
+            con_cursor = f"{ruta}?limit={args.pagina}" + (f"&cursor={codificar_cursor(posicion)}" if posicion else "")
+            assert cliente.get(con_offset).json() == cliente.get(con_cursor).json()
+            tiempo_offset = medir(lambda: cliente.get(con_offset))
+            tiempo_cursor = medir(lambda: cliente.get(con_cursor))
+            print(f"{ruta:<22}{posicion:>10}{tiempo_offset:>10.2f}{tiempo_cursor:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import re
+import sqlite3
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from models import ResultadoBusqueda
+
+# Índice de texto completo (FTS5) dentro de cada snapshot del catálogo.
+# unicode61 con remove_diacritics ignora mayúsculas y acentos ("algebra" = "Álgebra").
+# El rowid codifica el origen: id * 4 + código de tipo.
+
+TABLA_BUSQUEDA = "busqueda"
+
+# código -> (tipo, tabla, columna de clave)
+_FUENTES = {
+    1: ("materia", "materia", "clave"),
+    2: ("profesor", "profesor", None),
+    3: ("carrera", "carrera", "clave"),
+}
+_CODIGOS = {tipo: codigo for codigo, (tipo, _, _) in _FUENTES.items()}
+
+# Una coincidencia en la clave pesa más que en el nombre
+_PESO_CLAVE = 10.0
+_PESO_NOMBRE = 1.0
+
+
+def sincronizar_indice_busqueda(conn: sqlite3.Connection) -> int:
+    """
+    Actualiza el índice del snapshot con las filas de materia, profesor y carrera
+    que cambiaron en la base principal ('origen'). Debe llamarse antes de
+    sincronizar esas tablas, porque la diferencia se calcula contra 'main'.
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE name = ?", (TABLA_BUSQUEDA,)).fetchone()
+    if not existia:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE main.{TABLA_BUSQUEDA} USING fts5("
+            "clave, nombre, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    antes = conn.total_changes
+    for codigo, (_, tabla, clave) in _FUENTES.items():
+        columnas = f"id, {clave or 'NULL'}, nombre"
+        if existia:
+            # Filas borradas o modificadas: salen del índice y las modificadas vuelven a entrar
+            conn.execute(
+                f"DELETE FROM main.{TABLA_BUSQUEDA} WHERE rowid IN ("
+                f"SELECT id * 4 + {codigo} FROM "
+                f"(SELECT {columnas} FROM main.{tabla} EXCEPT SELECT {columnas} FROM origen.{tabla}))"
+            )
+            nuevas = f"SELECT {columnas} FROM origen.{tabla} EXCEPT SELECT {columnas} FROM main.{tabla}"
+        else:
+            nuevas = f"SELECT {columnas} FROM origen.{tabla}"
+        conn.execute(
+            f"INSERT INTO main.{TABLA_BUSQUEDA} (rowid, clave, nombre) "
+            f"SELECT id * 4 + {codigo}, {clave or 'NULL'}, nombre FROM ({nuevas})"
+        )
+    return conn.total_changes - antes
+
+
+def consulta_fts(texto: str) -> str | None:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    entre comillas y como prefijo, todas requeridas.
+    """
+    palabras = re.findall(r"\w+", texto)
+    if not palabras:
+        return None
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def buscar(session: Session, texto: str, tipo: str | None, limit: int) -> list[ResultadoBusqueda] | None:
+    """
+    Busca en el índice del catálogo, ordenado por relevancia (bm25).
+    Retorna None si el catálogo activo todavía no tiene índice.
+    """
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+
+    filtro_tipo = f"AND rowid % 4 = {_CODIGOS[tipo]} " if tipo is not None else ""
+    try:
+        filas = session.execute(
+            text(
+                f"SELECT rowid, clave, nombre FROM {TABLA_BUSQUEDA} "
+                f"WHERE {TABLA_BUSQUEDA} MATCH :consulta {filtro_tipo}"
+                f"ORDER BY bm25({TABLA_BUSQUEDA}, {_PESO_CLAVE}, {_PESO_NOMBRE}), rowid "
+                "LIMIT :limit"
+            ),
+            {"consulta": consulta, "limit": limit}
+        ).all()
+    except OperationalError as e:
+        # La base principal (generación 0) no tiene el índice
+        if "no such table" in str(e):
+            return None
+        raise
+
+    return [
+        ResultadoBusqueda(tipo=_FUENTES[rowid % 4][0], clave=clave, nombre=nombre)
+        for rowid, clave, nombre in filas
+    ]
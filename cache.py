@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+import database
+from snapshots import al_publicar
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se ofrece gzip
+    brotli = None
+
+
+MAX_ENTRADAS = 4096
+MAX_BYTES = 64 * 1024 * 1024
+# Los clientes siempre revalidan: los datos cambian en cada scrapeo y un 304 es barato
+CACHE_CONTROL = "public, no-cache"
+# Cuerpos más chicos no ganan nada al comprimirse (el encabezado gzip ya son ~20 bytes)
+MIN_BYTES_COMPRIMIR = 1024
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+
+
+class EntradaCache(NamedTuple):
+    generacion: int
+    etag: str
+    cuerpo: bytes
+    # Variantes comprimidas, generadas una vez junto con el cuerpo: codificación -> bytes
+    comprimidos: dict[str, bytes]
+
+    @property
+    def tamano(self) -> int:
+        return len(self.cuerpo) + sum(len(c) for c in self.comprimidos.values())
+
+
+def comprimir(cuerpo: bytes) -> dict[str, bytes]:
+    """
+    Variantes comprimidas del cuerpo que valen la pena, en orden de preferencia.
+    """
+    if len(cuerpo) < MIN_BYTES_COMPRIMIR:
+        return {}
+    comprimidos: dict[str, bytes] = {}
+    if brotli is not None:
+        comprimidos["br"] = brotli.compress(cuerpo, quality=CALIDAD_BROTLI)
+    # mtime fijo: el mismo cuerpo produce siempre los mismos bytes
+    comprimidos["gzip"] = gzip.compress(cuerpo, compresslevel=NIVEL_GZIP, mtime=0)
+    return comprimidos
+
+
+def elegir_codificacion(accept_encoding: str | None, disponibles: dict[str, bytes]) -> str | None:
+    """
+    La codificación disponible con mayor q en Accept-Encoding (empates por orden
+    de preferencia del servidor), o None para enviar el cuerpo sin comprimir.
+    """
+    if not accept_encoding or not disponibles:
+        return None
+    aceptadas: dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.partition(";")
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre.strip().lower()] = q
+    comodin = aceptadas.get("*", 0.0)
+
+    elegida, mejor_q = None, 0.0
+    for codificacion in disponibles:
+        q = aceptadas.get(codificacion, comodin)
+        if q > mejor_q:
+            elegida, mejor_q = codificacion, q
+    return elegida
+
+
+class CacheRespuestas:
+    """
+    Cache LRU en memoria de respuestas JSON ya serializadas.
+
+    Cada entrada lleva la generación de datos con la que se construyó; una
+    entrada de otra generación se trata como inexistente.
+    """
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, max_bytes: int = MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas: OrderedDict[tuple, EntradaCache] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._adaptadores: dict[Any, TypeAdapter] = {}
+
+    def obtener(self, clave: tuple, generacion: int) -> EntradaCache | None:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada.generacion != generacion:
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave: tuple, entrada: EntradaCache):
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior.tamano
+            self._entradas[clave] = entrada
+            self._bytes += entrada.tamano
+            while self._entradas and (
+                    len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+                _, expulsada = self._entradas.popitem(last=False)
+                self._bytes -= expulsada.tamano
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def serializar(self, tipo: Any, valor: Any) -> bytes:
+        adaptador = self._adaptadores.get(tipo)
+        if adaptador is None:
+            adaptador = self._adaptadores[tipo] = TypeAdapter(tipo)
+        # Igual que response_model: validar contra el tipo público y serializar
+        return adaptador.dump_json(adaptador.validate_python(valor, from_attributes=True))
+
+    def responder(
+        self,
+        request: Request,
+        generacion: int,
+        clave: tuple,
+        tipo: Any,
+        construir: Callable[[], Any]
+    ) -> Response:
+        """
+        Responde desde la cache o construye la respuesta con 'construir'.
+        El cuerpo se serializa y se comprime una sola vez por generación; cada
+        petición recibe la variante que pide su Accept-Encoding.
+        'generacion' es la de los datos que usa 'construir' (ver generacion_de);
+        'clave' debe incluir el endpoint y sus parámetros ya resueltos;
+        'tipo' es el mismo que el response_model del endpoint.
+        """
+        entrada = self.obtener(clave, generacion)
+        if entrada is None:
+            cuerpo = self.serializar(tipo, construir())
+            # El ETag depende solo del cuerpo: si un scrapeo no cambió estos datos,
+            # los clientes siguen recibiendo 304 en la generación nueva
+            etag = f'"{hashlib.sha256(cuerpo).hexdigest()[:32]}"'
+            entrada = EntradaCache(generacion, etag, cuerpo, comprimir(cuerpo))
+            self.guardar(clave, entrada)
+
+        codificacion = elegir_codificacion(request.headers.get("accept-encoding"), entrada.comprimidos)
+        # Cada variante tiene su propio ETag; If-None-Match vale con el de cualquiera,
+        # y el 304 lleva el de la variante que se habría enviado
+        headers = {
+            "ETag": _etag_variante(entrada.etag, codificacion) if codificacion else entrada.etag,
+            "Cache-Control": CACHE_CONTROL,
+        }
+        if entrada.comprimidos:
+            headers["Vary"] = "Accept-Encoding"
+        if coincide_etag(request.headers.get("if-none-match"), entrada.etag):
+            return Response(status_code=304, headers=headers)
+
+        if codificacion is None:
+            return Response(content=entrada.cuerpo, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = codificacion
+        return Response(content=entrada.comprimidos[codificacion], media_type="application/json", headers=headers)
+
+
+def generacion_de(session: Session) -> int:
+    """
+    Generación de los datos que ve una sesión del catálogo.
+    """
+    return session.info.get("generacion", database.catalogo_activo.generacion)
+
+
+def _etag_variante(etag: str, codificacion: str) -> str:
+    return f'{etag[:-1]}-{codificacion}"'
+
+
+def coincide_etag(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip().removeprefix("W/")
+        # Quitar el sufijo de la variante comprimida ("...-gzip")
+        base, _, codificacion = candidato[1:-1].rpartition("-")
+        if base and codificacion.isalpha():
+            candidato = f'"{base}"'
+        if candidato == "*" or candidato == etag:
+            return True
+    return False
+
+
+cache_respuestas = CacheRespuestas()
+
+
+@al_publicar
+def _invalidar_cache(catalogo):
+    # Las entradas viejas ya no se sirven; liberar la memoria de una vez
+    cache_respuestas.limpiar()
@@ -0,0 +1,70 @@
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from models import *
+
+# Agregados de calificaciones por profesor y por (profesor, materia). Se
+# actualizan con un UPSERT de incrementos, así dos verificaciones simultáneas
+# no se pisan y el agregado queda en la transacción de la reseña.
+
+_COLUMNAS = ["total", "suma"] + [f"conteo_{n}" for n in range(1, 6)]
+
+
+def _sumar(session: Session, tabla, llaves: dict[str, int], satisfaccion: int, signo: int):
+    valores = {
+        "total": signo,
+        "suma": signo * satisfaccion,
+        **{f"conteo_{n}": signo if n == satisfaccion else 0 for n in range(1, 6)},
+    }
+    stmt = insert(tabla).values(**llaves, **valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(llaves),
+        set_={columna: getattr(tabla, columna) + stmt.excluded[columna] for columna in _COLUMNAS}
+    )
+    session.execute(stmt)
+
+
+def registrar_calificacion(
+    session: Session,
+    id_profesor: int,
+    id_materia: int,
+    satisfaccion: int,
+    anterior: int | None = None
+):
+    """
+    Suma una reseña a los agregados; si reemplaza a otra, 'anterior' es la
+    satisfacción que tenía. No hace commit.
+    """
+    for tabla, llaves in (
+        (CalificacionProfesor, {"id_profesor": id_profesor}),
+        (CalificacionProfesorMateria, {"id_profesor": id_profesor, "id_materia": id_materia}),
+    ):
+        if anterior is not None:
+            _sumar(session, tabla, llaves, anterior, -1)
+        _sumar(session, tabla, llaves, satisfaccion, 1)
+
+
+def resumen(agregado: AgregadoCalificacion | None) -> ResumenCalificacion:
+    if agregado is None or agregado.total == 0:
+        return ResumenCalificacion(total=0, promedio=None, histograma=[0] * 5)
+    return ResumenCalificacion(
+        total=agregado.total,
+        promedio=round(agregado.suma / agregado.total, 2),
+        histograma=[getattr(agregado, f"conteo_{n}") for n in range(1, 6)]
+    )
+
+
+def calificaciones_de_profesores(session: Session, profesores: list[int]) -> dict[int, CalificacionProfesor]:
+    return {
+        c.id_profesor: c for c in session.exec(
+            select(CalificacionProfesor).where(CalificacionProfesor.id_profesor.in_(profesores))).all()  # type: ignore
+    }
+
+
+def calificaciones_en_materia(
+    session: Session, id_materia: int, profesores: list[int] | None = None
+) -> dict[int, CalificacionProfesorMateria]:
+    stmt = select(CalificacionProfesorMateria).where(CalificacionProfesorMateria.id_materia == id_materia)
+    if profesores is not None:
+        stmt = stmt.where(CalificacionProfesorMateria.id_profesor.in_(profesores))  # type: ignore
+    return {c.id_profesor: c for c in session.exec(stmt).all()}
@@ -0,0 +1,189 @@
+import sqlite3
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from consultas import a_seccion_publica, cargar_secciones
+from models import *
+
+# Registro de cambios del catálogo, guardado dentro de cada snapshot. Cada fila
+# dice que en la generación 'generacion' una sección o materia se insertó o
+# modificó (eliminado = 0) o se borró (eliminado = 1). Un cambio en las sesiones
+# se registra como cambio de su sección. Archivar un ciclo quita sus secciones
+# de la base principal pero no las borra: siguen en su partición (archivo.py),
+# así que no se registran como eliminadas. Se conservan las últimas
+# GENERACIONES_CONSERVADAS generaciones; 'cambio_registro.desde' es la
+# generación más antigua a partir de la cual el registro está completo.
+
+GENERACIONES_CONSERVADAS = 200
+
+
+def _crear_tablas(conn: sqlite3.Connection) -> bool:
+    existia = conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE name = 'cambio'").fetchone() is not None
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS main.cambio (
+            generacion INTEGER NOT NULL,
+            tabla TEXT NOT NULL,
+            id_fila INTEGER NOT NULL,
+            clave TEXT NOT NULL,
+            id_ciclo INTEGER,
+            eliminado INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS main.ix_cambio_generacion ON cambio (generacion)")
+    conn.execute("CREATE TABLE IF NOT EXISTS main.cambio_registro (desde INTEGER NOT NULL)")
+    return existia
+
+
+def _diferencia(tabla: str, columnas: str, de: str, contra: str) -> str:
+    return f"SELECT {columnas} FROM {de}.{tabla} EXCEPT SELECT {columnas} FROM {contra}.{tabla}"
+
+
+def registrar_cambios(conn: sqlite3.Connection, generacion: int, completo: bool):
+    """
+    Anota en el snapshot en construcción las diferencias contra la base
+    principal ('origen'). Debe llamarse antes de sincronizar las tablas.
+    Con 'completo' (snapshot desde cero) no hay contra qué comparar y el
+    registro empieza en esta generación.
+    """
+    existia = _crear_tablas(conn)
+    if completo:
+        conn.execute("DELETE FROM main.cambio")
+        desde = generacion
+    else:
+        anterior = conn.execute("SELECT desde FROM main.cambio_registro").fetchone()
+        # Un registro recién creado cubre desde la generación anterior
+        desde = anterior[0] if existia and anterior else generacion - 1
+
+        seccion = Seccion.__tablename__
+        sesion = Sesion.__tablename__
+        materia = Materia.__tablename__
+        # Secciones borradas, sin contar las de ciclos que se movieron a una partición
+        conn.execute(f"""
+            INSERT INTO main.cambio (generacion, tabla, id_fila, clave, id_ciclo, eliminado)
+            SELECT ?, 'seccion', id, nrc, id_ciclo, 1 FROM main.{seccion}
+            WHERE id NOT IN (SELECT id FROM origen.{seccion})
+            AND id_ciclo NOT IN (SELECT id_ciclo FROM origen.{CicloArchivado.__tablename__})
+        """, (generacion,))
+        # Secciones nuevas o modificadas, incluidas las que cambiaron alguna sesión
+        conn.execute(f"""
+            INSERT INTO main.cambio (generacion, tabla, id_fila, clave, id_ciclo, eliminado)
+            SELECT ?, 'seccion', id, nrc, id_ciclo, 0 FROM origen.{seccion}
+            WHERE id IN (
+                SELECT id FROM ({_diferencia(seccion, '*', 'origen', 'main')})
+                UNION SELECT id_seccion FROM ({_diferencia(sesion, '*', 'origen', 'main')})
+                UNION SELECT id_seccion FROM ({_diferencia(sesion, '*', 'main', 'origen')})
+            )
+        """, (generacion,))
+        conn.execute(f"""
+            INSERT INTO main.cambio (generacion, tabla, id_fila, clave, id_ciclo, eliminado)
+            SELECT ?, 'materia', id, clave, NULL, 1 FROM main.{materia}
+            WHERE id NOT IN (SELECT id FROM origen.{materia})
+        """, (generacion,))
+        conn.execute(f"""
+            INSERT INTO main.cambio (generacion, tabla, id_fila, clave, id_ciclo, eliminado)
+            SELECT ?, 'materia', id, clave, NULL, 0 FROM ({_diferencia(materia, '*', 'origen', 'main')})
+        """, (generacion,))
+
+    minimo = generacion - GENERACIONES_CONSERVADAS
+    conn.execute("DELETE FROM main.cambio WHERE generacion <= ?", (minimo,))
+    conn.execute("DELETE FROM main.cambio_registro")
+    conn.execute("INSERT INTO main.cambio_registro (desde) VALUES (?)", (max(desde, minimo),))
+
+
+class SnapshotRequerido(Exception):
+    """
+    El cliente está demasiado atrás (o el catálogo no tiene registro): debe
+    descargar el catálogo completo.
+    """
+
+
+def cambios_desde(session: Session, desde: int, id_ciclo: int, session_secciones: Session | None = None) -> CambiosPublic:
+    """
+    Estado actual de las secciones del ciclo y de las materias que cambiaron
+    después de la generación 'desde'. Varios cambios de una fila se resumen en uno.
+
+    El registro se lee del catálogo ('session'); las secciones, de
+    'session_secciones' (la partición de un ciclo archivado) si se indica.
+    """
+    session_secciones = session_secciones or session
+    generacion = session.info.get("generacion", 0)
+    try:
+        minima = session.execute(text("SELECT desde FROM cambio_registro")).scalar()
+    except OperationalError:
+        raise SnapshotRequerido
+    if minima is None or desde < minima or desde > generacion:
+        raise SnapshotRequerido
+
+    ultimos: dict[tuple[str, int], tuple[str, bool]] = {}
+    for tabla, id_fila, clave, eliminado in session.execute(
+        text(
+            "SELECT tabla, id_fila, clave, eliminado FROM cambio "
+            "WHERE generacion > :desde AND (id_ciclo = :ciclo OR tabla = 'materia') "
+            "ORDER BY generacion"
+        ),
+        {"desde": desde, "ciclo": id_ciclo}
+    ).all():
+        ultimos[(tabla, id_fila)] = (clave, bool(eliminado))
+
+    # Una sección marcada como borrada que sigue existiendo no se borró: es de un
+    # ciclo archivado (registros anteriores a que el archivo se excluyera)
+    borradas = [i for (t, i), (_, eliminado) in ultimos.items() if t == "seccion" and eliminado]
+    if borradas:
+        for id_seccion in session_secciones.exec(
+                select(Seccion.id).where(Seccion.id.in_(borradas))).all():  # type: ignore
+            ultimos[("seccion", id_seccion)] = (ultimos[("seccion", id_seccion)][0], False)
+
+    def ids(tabla: str) -> list[int]:
+        return [i for (t, i), (_, eliminado) in ultimos.items() if t == tabla and not eliminado]
+
+    def eliminadas(tabla: str) -> list[str]:
+        return sorted(clave for (t, _), (clave, eliminado) in ultimos.items() if t == tabla and eliminado)
+
+    secciones: list[SeccionMateriaPublic] = []
+    if ids("seccion"):
+        cargadas = cargar_secciones(session_secciones, Seccion.id.in_(ids("seccion")))  # type: ignore
+        claves = dict(session_secciones.exec(
+            select(Materia.id, Materia.clave).where(Materia.id.in_({s.id_materia for s in cargadas}))).all())  # type: ignore
+        secciones = [
+            SeccionMateriaPublic(materia=claves[s.id_materia], **a_seccion_publica(s).model_dump())
+            for s in cargadas
+        ]
+    materias = [
+        MateriaPublic(clave=m.clave, nombre=m.nombre, creditos=m.creditos)
+        for m in session.exec(select(Materia).where(Materia.id.in_(ids("materia"))).order_by(Materia.clave)).all()  # type: ignore
+    ]
+
+    return CambiosPublic(
+        generacion=generacion,
+        secciones=secciones,
+        secciones_eliminadas=eliminadas("seccion"),
+        materias=materias,
+        materias_eliminadas=eliminadas("materia")
+    )
+
+
+def secciones_cambiadas(session: Session, generacion: int) -> list[tuple[int, str, int, int]] | None:
+    """
+    (id_ciclo, nrc, disponibilidad, cupos) de las secciones insertadas o modificadas
+    en la generación. None si el registro no cubre esa generación (snapshot completo).
+    """
+    try:
+        minima = session.execute(text("SELECT desde FROM cambio_registro")).scalar()
+    except OperationalError:
+        return None
+    if minima is None or minima >= generacion:
+        return None
+    return [
+        (id_ciclo, nrc, disponibilidad, cupos)
+        for id_ciclo, nrc, disponibilidad, cupos in session.execute(
+            text(
+                "SELECT s.id_ciclo, s.nrc, s.disponibilidad, s.cupos FROM cambio c "
+                "JOIN seccion s ON s.id = c.id_fila "
+                "WHERE c.generacion = :generacion AND c.tabla = 'seccion' AND c.eliminado = 0"
+            ),
+            {"generacion": generacion}
+        ).all()
+    ]
@@ -0,0 +1,70 @@
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Session, select
+
+from models import *
+
+# Consultas compartidas por los endpoints. Las relaciones se cargan por
+# adelantado para que el número de SELECT no dependa del número de filas:
+# secciones = 2 consultas (secciones + profesor/centro, sesiones + aula),
+# reseñas = 1 consulta (el alumno no se carga: la reseña trae su seudónimo).
+
+
+def cargar_secciones(session: Session, *condiciones) -> list[Seccion]:
+    stmt = (
+        select(Seccion)
+        .where(*condiciones)
+        .options(
+            joinedload(Seccion.profesor),  # type: ignore
+            joinedload(Seccion.centro),  # type: ignore
+            selectinload(Seccion.sesiones).joinedload(Sesion.aula),  # type: ignore
+        )
+        .order_by(Seccion.id)  # type: ignore
+    )
+    return list(session.exec(stmt).unique().all())
+
+
+def secciones_publicas(session: Session, *condiciones) -> list[SeccionPublic]:
+    return [a_seccion_publica(s) for s in cargar_secciones(session, *condiciones)]
+
+
+def secciones_por_materia(session: Session, materias: list[int], *condiciones) -> dict[int, list[SeccionPublic]]:
+    """
+    Secciones de varias materias con las mismas 2 consultas, agrupadas por id de materia.
+    """
+    agrupadas: dict[int, list[SeccionPublic]] = {id_materia: [] for id_materia in materias}
+    for s in cargar_secciones(session, Seccion.id_materia.in_(materias), *condiciones):  # type: ignore
+        agrupadas[s.id_materia].append(a_seccion_publica(s))
+    return agrupadas
+
+
+def a_seccion_publica(s: Seccion) -> SeccionPublic:
+    sesiones_public: list[SesionPublic] = []
+    for ses in s.sesiones or []:
+        for dia in ses.dias_semana():
+            sesiones_public.append(SesionPublic(
+                salon=ses.aula.salon,
+                edificio=ses.aula.edificio,
+                fecha_inicio=ses.fecha_inicio,
+                fecha_fin=ses.fecha_fin,
+                hora_inicio=ses.hora_inicio,
+                hora_fin=ses.hora_fin,
+                dia_semana=dia
+            ))
+
+    return SeccionPublic(
+        numero=s.numero,
+        nrc=s.nrc,
+        profesor=s.profesor.nombre,
+        centro=s.centro.nombre,
+        sesiones=sesiones_public,
+        cupos=s.cupos,
+        disponibilidad=s.disponibilidad
+    )
+
+
+def resenas_con_relaciones(session: Session, stmt) -> list[Resena]:
+    stmt = stmt.options(
+        joinedload(Resena.profesor),  # type: ignore
+        joinedload(Resena.materia),  # type: ignore
+    )
+    return list(session.exec(stmt).unique().all())
@@ -1,5 +1,9 @@
-from typing import Annotated
+import contextvars
+import datetime
+from contextlib import contextmanager
+from typing import Annotated, NamedTuple
 from fastapi import Depends
+from sqlalchemy import Engine, event, inspect
 from sqlmodel import Session, SQLModel, create_engine
 
 sqlite_file_name = "database.db"
@@ -8,13 +12,110 @@ sqlite_url = f"sqlite:///{sqlite_file_name}"
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, connect_args=connect_args, pool_size=20, max_overflow=20)
 
+# Tamaño del mapeo en memoria para los snapshots de solo lectura
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+
+
+@event.listens_for(engine, "connect")
+def _configurar_conexion(dbapi_connection, connection_record):
+    # WAL permite que los lectores (p. ej. la construccion de snapshots)
+    # no bloqueen las escrituras del scraper
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+class Catalogo(NamedTuple):
+    engine: Engine
+    generacion: int
+    creado: datetime.datetime | None = None
+
+
+# Catalogo que consulta la API. Hasta que exista un snapshot se lee
+# directamente de la base principal (generacion 0).
+catalogo_activo = Catalogo(engine, 0)
+
+
+def activar_catalogo(nuevo: Catalogo) -> Catalogo:
+    """
+    Reemplaza el catalogo activo y devuelve el anterior.
+    La asignacion es atomica: cada request usa el catalogo vigente al abrir su sesion.
+    """
+    global catalogo_activo
+    anterior = catalogo_activo
+    catalogo_activo = nuevo
+    return anterior
+
+
+def crear_engine_solo_lectura(ruta: str) -> Engine:
+    """
+    Crea un engine para un archivo SQLite inmutable, con lecturas mapeadas en memoria.
+    """
+    engine_lectura = create_engine(
+        f"sqlite:///file:{ruta}?mode=ro&immutable=1&uri=true",
+        connect_args=connect_args, pool_size=20, max_overflow=20)
+
+    @event.listens_for(engine_lectura, "connect")
+    def _configurar_lectura(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA mmap_size={SNAPSHOT_MMAP_BYTES}")
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return engine_lectura
+
+
+class ContadorSentencias:
+    def __init__(self, padre: "ContadorSentencias | None" = None):
+        self.total = 0
+        self.padre = padre  # Un bloque anidado también cuenta para el exterior
+
+
+_contador_actual: contextvars.ContextVar[ContadorSentencias | None] = contextvars.ContextVar(
+    "contador_sentencias", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _contar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    contador = _contador_actual.get()
+    while contador is not None:
+        contador.total += 1
+        contador = contador.padre
+
+
+@contextmanager
+def contar_sentencias():
+    """
+    Cuenta las sentencias SQL ejecutadas (en cualquier engine) dentro del bloque,
+    incluidas las de hilos lanzados desde él.
+    """
+    contador = ContadorSentencias(_contador_actual.get())
+    token = _contador_actual.set(contador)
+    try:
+        yield contador
+    finally:
+        _contador_actual.reset(token)
+
+
 def get_session():
     with Session(engine) as session:
         yield session
 
+
+def get_session_catalogo():
+    catalogo = catalogo_activo
+    # La generacion identifica los datos que vera esta sesion (ver cache.py)
+    with Session(catalogo.engine, info={"generacion": catalogo.generacion}) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_session)]
+SessionCatalogoDep = Annotated[Session, Depends(get_session_catalogo)]
 
 def create_db_and_tables():
     # Importar los modelos aqui asegura que esten registrados en SQLModel.metadata
     import models 
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    from migraciones import aplicar_migraciones
+    nueva = not inspect(engine).get_table_names()
+    SQLModel.metadata.create_all(engine)
+    aplicar_migraciones(engine, nueva)
\ No newline at end of file
@@ -1,53 +1,55 @@
-from database import SessionDep
-from sqlmodel import select
+import database
+from database import SessionDep, SessionCatalogoDep
+from sqlmodel import Session, select
 from fastapi import HTTPException, Depends
 from typing import Annotated
 from lifespan import alias_a_centro
+from archivo import engine_para_ciclo
+from indice_claves import indice
 from models import *
+from seudonimos import seudonimo_de
 
 # --- Dependencias de Endpoints ---
 
-def validar_ciclo(session: SessionDep, ciclo: str) -> int:
-    id_ciclo = session.exec(select(Ciclo.id).where(
-        Ciclo.nombre == ciclo)).first()
+# Las validaciones de nombres se resuelven con el índice en memoria
+# (indice_claves.py), sin ir a la base de datos.
+
+def validar_ciclo(ciclo: str) -> int:
+    id_ciclo = indice().ciclos.get(ciclo)
     if id_ciclo is None:
         raise HTTPException(status_code=404, detail="Ciclo no encontrado")
     return id_ciclo
 
-def ciclo_opcional(session: SessionDep, ciclo: str | None = None) -> int | None:
+def ciclo_opcional(ciclo: str | None = None) -> int | None:
     if ciclo is None:
         return None
-    return validar_ciclo(session, ciclo)
+    return validar_ciclo(ciclo)
 
-def validar_materia(session: SessionDep, materia: str) -> int:
-    id_materia = session.exec(select(Materia.id).where(
-        Materia.clave == materia)).first()
+def validar_materia(materia: str) -> int:
+    id_materia = indice().materias.get(materia)
     if id_materia is None:
         raise HTTPException(status_code=404, detail="Materia no encontrada")
     return id_materia
 
 
-def materia_opcional(session: SessionDep, materia: str | None = None) -> int | None:
+def materia_opcional(materia: str | None = None) -> int | None:
     if materia is None:
         return None
-    return validar_materia(session, materia)
-
+    return validar_materia(materia)
 
-def validar_centro(session: SessionDep, centro: str) -> int:
-    if centro in alias_a_centro:
-        centro = alias_a_centro[centro]
 
-    id_centro = session.exec(select(Centro.id).where(
-        Centro.nombre == centro)).first()
+def validar_centro(centro: str) -> int:
+    # El índice incluye los alias de los centros
+    id_centro = indice().centros.get(centro)
     if id_centro is None:
         raise HTTPException(status_code=404, detail="Centro no encontrado")
     return id_centro
 
 
-def centro_opcional(session: SessionDep, centro: str | None = None) -> int | None:
+def centro_opcional(centro: str | None = None) -> int | None:
     if centro is None:
         return None
-    return validar_centro(session, centro)
+    return validar_centro(centro)
 
 
 def obtener_clave_centro(centro_nombre: str, session: SessionDep) -> tuple[str, str]:
@@ -85,6 +87,8 @@ def validar_alumno(session: SessionDep, correo_alumno: str) -> int:
         session.add(alumno)
         session.commit()
         session.refresh(alumno)
+        seudonimo_de(session, alumno.id)  # type: ignore
+        session.commit()
 
     if alumno.id is None:
         raise HTTPException(status_code=500, detail="Error")
@@ -92,32 +96,30 @@ def validar_alumno(session: SessionDep, correo_alumno: str) -> int:
     return alumno.id
 
 
-def validar_profesor(session: SessionDep, profesor: str) -> int:
-    id_profesor = session.exec(select(Profesor.id).where(
-        Profesor.nombre == profesor)).first()
+def validar_profesor(profesor: str) -> int:
+    id_profesor = indice().profesores.get(profesor)
     if id_profesor is None:
         raise HTTPException(status_code=404, detail="Profesor no encontrado")
     return id_profesor
 
 
-def profesor_opcional(session: SessionDep, profesor: str | None = None) -> int | None:
+def profesor_opcional(profesor: str | None = None) -> int | None:
     if profesor is None:
         return None
-    return validar_profesor(session, profesor)
+    return validar_profesor(profesor)
 
 
-def validar_carrera(carrera: str, session: SessionDep) -> int:
-    id_carrera = session.exec(select(Carrera.id).where(
-        Carrera.clave == carrera)).first()
+def validar_carrera(carrera: str) -> int:
+    id_carrera = indice().carreras.get(carrera)
     if id_carrera is None:
         raise HTTPException(status_code=404, detail="Carrera no encontrada")
     return id_carrera
 
 
-def carrera_opcional(session: SessionDep, carrera: str | None = None) -> int | None:
+def carrera_opcional(carrera: str | None = None) -> int | None:
     if carrera is None:
         return None
-    return validar_carrera(carrera, session)
+    return validar_carrera(carrera)
 
 
 CicloDep = Annotated[int, Depends(validar_ciclo)]
@@ -131,3 +133,15 @@ MateriaOptDep = Annotated[int | None, Depends(materia_opcional)]
 CentroOptDep = Annotated[int | None, Depends(centro_opcional)]
 ProfesorOptDep = Annotated[int | None, Depends(profesor_opcional)]
 CarreraOptDep = Annotated[int | None, Depends(carrera_opcional)]
+
+
+def get_session_ciclo(ciclo: CicloOptDep = None):
+    """
+    Sesión sobre la partición del ciclo si está archivado, o sobre el catálogo activo.
+    """
+    generacion = database.catalogo_activo.generacion
+    with Session(engine_para_ciclo(ciclo), info={"generacion": generacion}) as session:
+        yield session
+
+
+SessionCicloDep = Annotated[Session, Depends(get_session_ciclo)]
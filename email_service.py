@@ -139,3 +139,75 @@ async def enviar_reporte_soporte(datos):
     finally:
         if temp_file and os.path.exists(temp_file.name):
             os.unlink(temp_file.name)
+
+
+async def enviar_codigo_alerta(correo_destino: EmailStr, codigo: str, nrc: str, base_url: str = "http://localhost:8000"):
+    enlace_verificacion = f"{base_url}/alertas/verificar/{codigo}"
+
+    html_body = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #333;">Verificación de Alerta de Cupo</h2>
+            <p>Solicitaste recibir un aviso cuando se abra un lugar en la sección <strong>{nrc}</strong>. Copia el codigo o haz clic en el enlace para activarla:</p>
+
+            <h3 style="background-color: #f4f4f4; padding: 10px; border-radius: 5px; text-align: center; font-size: 40px;">{codigo}</h3>
+            <p style="text-align:center"><a href="{enlace_verificacion}" style="background-color: #2563eb; color: white; padding: 10px 30px; text-decoration: none; border-radius: 5px; display: inline-block; font-weight: bold;">Activar Alerta</a></p>
+
+            <p style="color: #999; font-size: 12px; margin-top: 30px;">
+                Si no solicitaste esta alerta, puedes ignorar este mensaje.
+            </p>
+        </body>
+    </html>
+    """
+
+    mensaje = MessageSchema(
+        subject="Mi horario - Verifica Alerta de Cupo",
+        recipients=[correo_destino],
+        body=html_body,
+        subtype=MessageType.html
+    )
+
+    try:
+        await fastmail.send_message(mensaje)
+    except Exception as e:
+        print(f"Error al enviar codigo de alerta a {correo_destino}: {e}")
+        raise
+
+
+async def enviar_aviso_cupo(correo_destino: EmailStr, secciones: list[tuple[str, str, int]]):
+    """
+    Un solo correo con todas las secciones (ciclo, nrc, disponibilidad) que se abrieron.
+    """
+    filas = "".join(
+        f"<tr><td style='padding: 4px 12px;'>{ciclo}</td><td style='padding: 4px 12px;'>{nrc}</td>"
+        f"<td style='padding: 4px 12px; text-align: right;'>{disponibilidad}</td></tr>"
+        for ciclo, nrc, disponibilidad in secciones
+    )
+    html_body = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #333;">¡Hay lugares disponibles!</h2>
+            <p>Se abrieron lugares en las secciones que estás siguiendo:</p>
+            <table style="border-collapse: collapse; margin: 0 auto;">
+                <tr><th style="padding: 4px 12px;">Ciclo</th><th style="padding: 4px 12px;">NRC</th><th style="padding: 4px 12px;">Disponibles</th></tr>
+                {filas}
+            </table>
+            <p style="color: #999; font-size: 12px; margin-top: 30px;">
+                Te volveremos a avisar si la sección se llena y se vuelve a abrir.
+            </p>
+        </body>
+    </html>
+    """
+
+    mensaje = MessageSchema(
+        subject="Mi horario - Se abrió un lugar",
+        recipients=[correo_destino],
+        body=html_body,
+        subtype=MessageType.html
+    )
+
+    try:
+        await fastmail.send_message(mensaje)
+    except Exception as e:
+        print(f"Error al enviar aviso de cupo a {correo_destino}: {e}")
+        raise
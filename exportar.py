@@ -0,0 +1,153 @@
+import csv
+import io
+import itertools
+import zlib
+from collections import defaultdict
+from typing import Iterator
+
+from sqlalchemy import Engine
+from sqlmodel import Session, select
+
+from models import *
+
+# Exportación completa de la oferta de un ciclo. Las tablas de dimensiones
+# (materias, profesores, centros, aulas, carreras) se cargan a memoria; las
+# secciones con sus sesiones se leen con un cursor del servidor ordenado por
+# sección y se escriben conforme llegan, así que la memoria no depende del
+# tamaño del ciclo.
+
+FILAS_POR_LOTE = 1000  # Filas del cursor por viaje a la base
+SECCIONES_POR_BLOQUE = 200  # Secciones por bloque enviado al cliente
+
+COLUMNAS_CSV = [
+    "ciclo", "nrc", "numero", "materia", "nombre_materia", "creditos", "profesor", "centro",
+    "cupos", "disponibilidad", "carreras", "dia_semana", "hora_inicio", "hora_fin",
+    "edificio", "salon", "fecha_inicio", "fecha_fin",
+]
+
+
+class _Dimensiones:
+    def __init__(self, session: Session):
+        self.materias = {m.id: m for m in session.exec(select(Materia)).all()}
+        self.profesores = dict(session.exec(select(Profesor.id, Profesor.nombre)).all())
+        self.centros = dict(session.exec(select(Centro.id, Centro.nombre)).all())
+        self.aulas = {a.id: a for a in session.exec(select(Aula)).all()}
+        claves = dict(session.exec(select(Carrera.id, Carrera.clave)).all())
+        self.carreras_de_materia: dict[int, set[int]] = defaultdict(set)
+        for id_carrera, id_materia in session.exec(
+                select(CarreraMateriaLink.id_carrera, CarreraMateriaLink.id_materia)).all():
+            self.carreras_de_materia[id_materia].add(id_carrera)
+        self.carreras_de_centro: dict[int, set[int]] = defaultdict(set)
+        for id_centro, id_carrera in session.exec(
+                select(CentroCarreraLink.id_centro, CentroCarreraLink.id_carrera)).all():
+            self.carreras_de_centro[id_centro].add(id_carrera)
+        self.claves_carrera = claves
+        self._carreras: dict[tuple[int, int], list[str]] = {}
+
+    def carreras(self, id_materia: int, id_centro: int) -> list[str]:
+        clave = (id_materia, id_centro)
+        resultado = self._carreras.get(clave)
+        if resultado is None:
+            ids = self.carreras_de_materia.get(id_materia, set()) & self.carreras_de_centro.get(id_centro, set())
+            resultado = self._carreras[clave] = sorted(self.claves_carrera[i] for i in ids)
+        return resultado
+
+
+def secciones_exportadas(engine: Engine, id_ciclo: int, nombre_ciclo: str, id_centro: int | None = None) -> Iterator[SeccionExportada]:
+    """
+    Secciones del ciclo (opcionalmente de un centro) en orden de id, con sus sesiones.
+    La sesión de base de datos vive lo mismo que el iterador.
+    """
+    with Session(engine) as session:
+        dimensiones = _Dimensiones(session)
+        stmt = (
+            select(
+                Seccion.id, Seccion.nrc, Seccion.numero, Seccion.id_materia, Seccion.id_profesor,
+                Seccion.id_centro, Seccion.cupos, Seccion.disponibilidad, Sesion.id_aula,
+                Sesion.dias, Sesion.hora_inicio, Sesion.hora_fin, Sesion.fecha_inicio, Sesion.fecha_fin)
+            .outerjoin(Sesion, Sesion.id_seccion == Seccion.id)  # type: ignore
+            .where(Seccion.id_ciclo == id_ciclo)
+            .order_by(Seccion.id, Sesion.id)  # type: ignore
+        )
+        if id_centro is not None:
+            stmt = stmt.where(Seccion.id_centro == id_centro)
+
+        filas = session.execute(stmt, execution_options={"yield_per": FILAS_POR_LOTE})
+        for _, grupo in itertools.groupby(filas, key=lambda fila: fila[0]):
+            grupo = list(grupo)
+            (_, nrc, numero, id_materia, id_profesor, id_centro_seccion, cupos, disponibilidad) = grupo[0][:8]
+            materia = dimensiones.materias[id_materia]
+            sesiones: list[SesionPublic] = []
+            for *_, id_aula, dias, hora_inicio, hora_fin, fecha_inicio, fecha_fin in grupo:
+                if id_aula is None:
+                    continue  # Sección sin sesiones (outer join)
+                aula = dimensiones.aulas[id_aula]
+                for dia in range(1, 8):
+                    if dias & (1 << (dia - 1)):
+                        sesiones.append(SesionPublic(
+                            salon=aula.salon,
+                            edificio=aula.edificio,
+                            fecha_inicio=fecha_inicio,
+                            fecha_fin=fecha_fin,
+                            hora_inicio=hora_inicio,
+                            hora_fin=hora_fin,
+                            dia_semana=dia
+                        ))
+            yield SeccionExportada(
+                ciclo=nombre_ciclo,
+                nrc=nrc,
+                numero=numero,
+                materia=materia.clave,
+                nombre_materia=materia.nombre,
+                creditos=materia.creditos,
+                profesor=dimensiones.profesores[id_profesor],
+                centro=dimensiones.centros[id_centro_seccion],
+                cupos=cupos,
+                disponibilidad=disponibilidad,
+                carreras=dimensiones.carreras(id_materia, id_centro_seccion),
+                sesiones=sesiones
+            )
+
+
+def _bloques(secciones: Iterator[SeccionExportada]) -> Iterator[list[SeccionExportada]]:
+    while bloque := list(itertools.islice(secciones, SECCIONES_POR_BLOQUE)):
+        yield bloque
+
+
+def a_ndjson(secciones: Iterator[SeccionExportada]) -> Iterator[bytes]:
+    for bloque in _bloques(secciones):
+        yield b"".join(s.model_dump_json().encode() + b"\n" for s in bloque)
+
+
+def a_csv(secciones: Iterator[SeccionExportada]) -> Iterator[bytes]:
+    """
+    Una fila por sesión (por día); una sección sin sesiones ocupa una fila con las columnas de sesión vacías.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS_CSV)
+    for bloque in _bloques(secciones):
+        for s in bloque:
+            seccion = [
+                s.ciclo, s.nrc, s.numero, s.materia, s.nombre_materia, s.creditos, s.profesor,
+                s.centro, s.cupos, s.disponibilidad, "|".join(s.carreras)]
+            if not s.sesiones:
+                escritor.writerow(seccion + [""] * 7)
+            for ses in s.sesiones:
+                escritor.writerow(seccion + [
+                    ses.dia_semana, ses.hora_inicio.isoformat(), ses.hora_fin.isoformat(),
+                    ses.edificio, ses.salon, ses.fecha_inicio.isoformat(), ses.fecha_fin.isoformat()])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def comprimir_gzip(bloques: Iterator[bytes]) -> Iterator[bytes]:
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
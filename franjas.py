@@ -0,0 +1,102 @@
+import datetime
+from collections import defaultdict
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+from archivo import IndiceArchivado, esta_archivado
+from consultas import a_seccion_publica, cargar_secciones
+from database import Catalogo
+from horarios import DIA_COMPLETO, RANURAS_POR_DIA, mascara_prohibida, mascara_sesion
+from models import *
+from snapshots import al_publicar
+
+# Índice de franjas horarias por (ciclo, centro): cada sección con su máscara
+# semanal de ranuras (ver horarios.py) y su SeccionPublic ya armada. Filtrar por
+# día y rango de horas es un AND de bits por sección, sin consultar la base.
+# Las mismas entradas se agrupan por (ciclo, profesor) para su horario.
+
+
+class EntradaFranja(NamedTuple):
+    id_materia: int
+    id_profesor: int
+    materia: str
+    disponibilidad: int
+    mascara: int
+    publica: SeccionPublic
+
+
+def secciones_en_franja(
+    entradas: list[EntradaFranja],
+    materias: frozenset[int] | None,
+    dia: int | None,
+    hora_inicio: datetime.time | None,
+    hora_fin: datetime.time | None,
+    disponibilidad_minima: int
+) -> list[EntradaFranja]:
+    """
+    Secciones con clase el día 'dia' (o cualquier día) cuyas sesiones de ese
+    día caen completas entre hora_inicio y hora_fin.
+    """
+    if dia is None:
+        dias = (1 << (7 * RANURAS_POR_DIA)) - 1
+    else:
+        dias = DIA_COMPLETO << ((dia - 1) * RANURAS_POR_DIA)
+    fuera = mascara_prohibida(hora_inicio, hora_fin, []) & dias
+    return [
+        e for e in entradas
+        if e.mascara & dias
+        and not e.mascara & fuera
+        and e.disponibilidad >= disponibilidad_minima
+        and (materias is None or e.id_materia in materias)
+    ]
+
+
+class IndiceFranjas(NamedTuple):
+    por_centro: dict[tuple[int, int], list[EntradaFranja]]  # (ciclo, centro)
+    por_profesor: dict[tuple[int, int], list[EntradaFranja]]  # (ciclo, profesor)
+
+
+def construir_franjas(session: Session, id_ciclo: int | None = None) -> IndiceFranjas:
+    claves = dict(session.exec(select(Materia.id, Materia.clave)).all())
+    condiciones = [Seccion.id_ciclo == id_ciclo] if id_ciclo is not None else []
+
+    por_centro: dict[tuple[int, int], list[EntradaFranja]] = defaultdict(list)
+    por_profesor: dict[tuple[int, int], list[EntradaFranja]] = defaultdict(list)
+    for s in cargar_secciones(session, *condiciones):
+        mascara = 0
+        for ses in s.sesiones or []:
+            mascara |= mascara_sesion(ses.dias, ses.hora_inicio, ses.hora_fin)
+        entrada = EntradaFranja(
+            s.id_materia, s.id_profesor, claves[s.id_materia], s.disponibilidad, mascara, a_seccion_publica(s))
+        por_centro[(s.id_ciclo, s.id_centro)].append(entrada)  # type: ignore
+        por_profesor[(s.id_ciclo, s.id_profesor)].append(entrada)  # type: ignore
+
+    for entradas in [*por_centro.values(), *por_profesor.values()]:
+        entradas.sort(key=lambda e: (e.materia, e.publica.nrc))
+    return IndiceFranjas(dict(por_centro), dict(por_profesor))
+
+
+_franjas = IndiceFranjas({}, {})
+_franjas_archivadas = IndiceArchivado(construir_franjas)
+
+
+def _indice_para(id_ciclo: int) -> IndiceFranjas:
+    if esta_archivado(id_ciclo):
+        return _franjas_archivadas.obtener(id_ciclo)
+    return _franjas
+
+
+def franjas_de(id_ciclo: int, id_centro: int) -> list[EntradaFranja]:
+    return _indice_para(id_ciclo).por_centro.get((id_ciclo, id_centro), [])
+
+
+def secciones_de_profesor(id_ciclo: int, id_profesor: int) -> list[EntradaFranja]:
+    return _indice_para(id_ciclo).por_profesor.get((id_ciclo, id_profesor), [])
+
+
+@al_publicar
+def _reconstruir_franjas(catalogo: Catalogo):
+    global _franjas
+    with Session(catalogo.engine) as session:
+        _franjas = construir_franjas(session)
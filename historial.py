@@ -0,0 +1,181 @@
+import time
+from sqlmodel import Session, select, func
+
+from models import SerieDisponibilidad
+
+# Muestras por bloque. Al llenarse un bloque se abre otro, así cada escritura
+# reescribe a lo mucho unos cientos de bytes.
+MUESTRAS_POR_BLOQUE = 128
+
+# Última muestra conocida por (nrc, id_ciclo): (ts, disponibilidad, cupos)
+_ultimas: dict[tuple[str, int], tuple[int, int, int]] = {}
+_ciclos_cargados: set[int] = set()
+
+
+# --- Codificación: deltas con zigzag + varint ---
+
+def _escribir_varint(salida: bytearray, valor: int):
+    valor = (valor << 1) ^ (valor >> 63)  # zigzag
+    while valor > 0x7F:
+        salida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+
+def _leer_varints(datos: bytes):
+    valor = desplazamiento = 0
+    for byte in datos:
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte & 0x80:
+            desplazamiento += 7
+            continue
+        yield (valor >> 1) ^ -(valor & 1)
+        valor = desplazamiento = 0
+
+
+def codificar_muestra(anterior: tuple[int, int, int], muestra: tuple[int, int, int]) -> bytes:
+    salida = bytearray()
+    for previo, actual in zip(anterior, muestra):
+        _escribir_varint(salida, actual - previo)
+    return bytes(salida)
+
+
+def decodificar_bloque(datos: bytes) -> list[tuple[int, int, int]]:
+    """
+    Devuelve las muestras (ts, disponibilidad, cupos) de un bloque.
+    La primera muestra de cada bloque está codificada contra (0, 0, 0).
+    """
+    muestras = []
+    ts = disponibilidad = cupos = 0
+    valores = _leer_varints(datos)
+    for delta_ts in valores:
+        ts += delta_ts
+        disponibilidad += next(valores)
+        cupos += next(valores)
+        muestras.append((ts, disponibilidad, cupos))
+    return muestras
+
+
+# --- Escritura ---
+
+def _cargar_ciclo(session: Session, id_ciclo: int):
+    """
+    Carga la última muestra de cada NRC del ciclo con una sola consulta.
+    """
+    ultimo_bloque = (
+        select(SerieDisponibilidad.nrc, func.max(SerieDisponibilidad.bloque).label("bloque"))
+        .where(SerieDisponibilidad.id_ciclo == id_ciclo)
+        .group_by(SerieDisponibilidad.nrc)
+        .subquery()
+    )
+    filas = session.exec(
+        select(SerieDisponibilidad).join(
+            ultimo_bloque,
+            (SerieDisponibilidad.nrc == ultimo_bloque.c.nrc)
+            & (SerieDisponibilidad.bloque == ultimo_bloque.c.bloque)
+        ).where(SerieDisponibilidad.id_ciclo == id_ciclo)
+    ).all()
+    for serie in filas:
+        _ultimas[(serie.nrc, id_ciclo)] = (
+            serie.ultimo_ts, serie.ultima_disponibilidad, serie.ultimos_cupos)
+    _ciclos_cargados.add(id_ciclo)
+
+
+def registrar_disponibilidad(session: Session, nrc: str, id_ciclo: int, disponibilidad: int, cupos: int):
+    """
+    Agrega una muestra a la serie de la sección solo si cambió respecto a la última.
+    """
+    if id_ciclo not in _ciclos_cargados:
+        _cargar_ciclo(session, id_ciclo)
+
+    ultima = _ultimas.get((nrc, id_ciclo))
+    if ultima is not None and ultima[1:] == (disponibilidad, cupos):
+        return
+
+    muestra = (int(time.time()), disponibilidad, cupos)
+    serie = None
+    if ultima is not None:
+        serie = session.exec(
+            select(SerieDisponibilidad)
+            .where(SerieDisponibilidad.nrc == nrc, SerieDisponibilidad.id_ciclo == id_ciclo)
+            .order_by(SerieDisponibilidad.bloque.desc())  # type: ignore
+        ).first()
+
+    if serie is not None and serie.n_muestras < MUESTRAS_POR_BLOQUE:
+        anterior = (serie.ultimo_ts, serie.ultima_disponibilidad, serie.ultimos_cupos)
+        serie.datos = serie.datos + codificar_muestra(anterior, muestra)
+        serie.n_muestras += 1
+    else:
+        serie = SerieDisponibilidad(
+            nrc=nrc,
+            id_ciclo=id_ciclo,
+            bloque=serie.bloque + 1 if serie is not None else 0,
+            inicio_ts=muestra[0],
+            n_muestras=1,
+            datos=codificar_muestra((0, 0, 0), muestra)
+        )
+    serie.ultimo_ts, serie.ultima_disponibilidad, serie.ultimos_cupos = muestra
+    session.add(serie)
+    session.commit()
+    _ultimas[(nrc, id_ciclo)] = muestra
+
+
+# --- Lectura ---
+
+def leer_historial(
+    session: Session,
+    nrc: str,
+    id_ciclo: int,
+    desde: int | None = None,
+    hasta: int | None = None,
+    resolucion: int | None = None
+) -> list[tuple[int, int, int, int]]:
+    """
+    Devuelve (ts, disponibilidad, cupos, disponibilidad_minima) de la sección.
+
+    Con 'desde' el primer punto es el valor vigente en ese momento (la última
+    muestra anterior o igual), con la fecha 'desde'.
+
+    Con 'resolucion' (segundos) agrupa las muestras en intervalos: cada punto
+    lleva el último valor del intervalo y la disponibilidad mínima observada.
+    """
+    de_la_seccion = (SerieDisponibilidad.nrc == nrc, SerieDisponibilidad.id_ciclo == id_ciclo)
+    stmt = select(SerieDisponibilidad).where(*de_la_seccion)
+    if desde is not None:
+        # Desde el bloque que contiene la última muestra anterior a 'desde'
+        bloque_inicial = (
+            select(func.max(SerieDisponibilidad.bloque))
+            .where(*de_la_seccion, SerieDisponibilidad.inicio_ts <= desde)
+            .scalar_subquery()
+        )
+        stmt = stmt.where(SerieDisponibilidad.bloque >= func.coalesce(bloque_inicial, 0))
+    if hasta is not None:
+        stmt = stmt.where(SerieDisponibilidad.inicio_ts <= hasta)
+
+    muestras = []
+    for serie in session.exec(stmt.order_by(SerieDisponibilidad.bloque)).all():  # type: ignore
+        muestras.extend(decodificar_bloque(serie.datos))
+
+    vigente = None
+    if desde is not None:
+        anteriores = [m for m in muestras if m[0] <= desde]
+        if anteriores:
+            vigente = (desde, *anteriores[-1][1:])
+    muestras = [
+        m for m in muestras
+        if (desde is None or m[0] > desde) and (hasta is None or m[0] <= hasta)
+    ]
+    if vigente is not None and (hasta is None or desde <= hasta):
+        muestras.insert(0, vigente)
+
+    if not resolucion:
+        return [(ts, disp, cupos, disp) for ts, disp, cupos in muestras]
+
+    puntos: list[tuple[int, int, int, int]] = []
+    for ts, disp, cupos in muestras:
+        intervalo = ts - ts % resolucion
+        if puntos and puntos[-1][0] == intervalo:
+            puntos[-1] = (intervalo, disp, cupos, min(puntos[-1][3], disp))
+        else:
+            puntos.append((intervalo, disp, cupos, disp))
+    return puntos
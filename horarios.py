@@ -0,0 +1,288 @@
+import datetime
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from typing import Iterator, NamedTuple
+
+from sqlmodel import Session, select
+
+from models import *
+
+# Generador de horarios sin traslapes. Cada sección se codifica como un bitset
+# (int) de ranuras de 5 minutos en la semana: bit = día * RANURAS_POR_DIA + ranura.
+# Dos secciones se traslapan si el AND de sus máscaras no es cero. Las fechas de
+# las sesiones no se consideran: dentro de un ciclo se asume que coinciden.
+
+MINUTOS_POR_RANURA = 5
+RANURAS_POR_DIA = 24 * 60 // MINUTOS_POR_RANURA
+DIA_COMPLETO = (1 << RANURAS_POR_DIA) - 1
+
+# Segundos de búsqueda por petición. Con muchas materias la búsqueda exhaustiva
+# no termina a tiempo; se entregan los mejores horarios encontrados hasta entonces.
+TIEMPO_MAXIMO = 1.0
+_NODOS_ENTRE_RELOJ = 64
+
+
+def _ranura(hora: datetime.time, hacia_arriba: bool = False) -> int:
+    minutos = hora.hour * 60 + hora.minute
+    if hacia_arriba:
+        return -(-minutos // MINUTOS_POR_RANURA)
+    return minutos // MINUTOS_POR_RANURA
+
+
+def mascara_sesion(dias: int, hora_inicio: datetime.time, hora_fin: datetime.time) -> int:
+    """
+    Ranuras que ocupa una sesión. 'dias' es la máscara de Sesion.dias.
+    """
+    inicio = _ranura(hora_inicio)
+    fin = max(_ranura(hora_fin, hacia_arriba=True), inicio + 1)
+    bloque = ((1 << (fin - inicio)) - 1) << inicio
+    mascara = 0
+    for dia in range(7):
+        if dias & (1 << dia):
+            mascara |= bloque << (dia * RANURAS_POR_DIA)
+    return mascara
+
+
+def mascara_prohibida(
+    hora_inicio: datetime.time | None,
+    hora_fin: datetime.time | None,
+    dias_libres: list[int]
+) -> int:
+    """
+    Ranuras en las que no puede haber clases: fuera de la ventana de horas y los días libres (1-7).
+    """
+    inicio = _ranura(hora_inicio) if hora_inicio else 0
+    fin = _ranura(hora_fin, hacia_arriba=True) if hora_fin else RANURAS_POR_DIA
+    permitido_dia = ((1 << (fin - inicio)) - 1) << inicio
+    prohibido = 0
+    for dia in range(7):
+        desplazamiento = dia * RANURAS_POR_DIA
+        if dia + 1 in dias_libres:
+            prohibido |= DIA_COMPLETO << desplazamiento
+        else:
+            prohibido |= (DIA_COMPLETO & ~permitido_dia) << desplazamiento
+    return prohibido
+
+
+def dias_de(mascara: int) -> int:
+    """
+    Máscara de 7 bits con los días que tienen al menos una ranura ocupada.
+    """
+    dias = 0
+    for dia in range(7):
+        if (mascara >> (dia * RANURAS_POR_DIA)) & DIA_COMPLETO:
+            dias |= 1 << dia
+    return dias
+
+
+def huecos_de(mascara: int) -> int:
+    """
+    Ranuras libres entre la primera y la última clase de cada día.
+    """
+    huecos = 0
+    for dia in range(7):
+        desplazamiento = dia * RANURAS_POR_DIA
+        bits = (mascara >> desplazamiento) & DIA_COMPLETO
+        if bits:
+            lapso = (1 << bits.bit_length()) - (bits & -bits)
+            huecos |= (lapso & ~bits) << desplazamiento
+    return huecos
+
+
+def evaluar(mascara: int) -> tuple[int, int]:
+    """
+    (días con clase, minutos libres entre clases). Menor es mejor.
+    """
+    return dias_de(mascara).bit_count(), huecos_de(mascara).bit_count() * MINUTOS_POR_RANURA
+
+
+class Opcion(NamedTuple):
+    """
+    Secciones de una materia con exactamente el mismo horario. La búsqueda se
+    hace sobre opciones y al final se expanden a secciones.
+    """
+    mascara: int
+    dias: int  # dias_de(mascara)
+    secciones: list[tuple[str, int]]  # (nrc, disponibilidad), mayor disponibilidad primero
+
+
+def cargar_opciones(
+    session: Session,
+    materias: dict[str, int],
+    ciclo: int,
+    centro: int,
+    prohibido: int,
+    disponibilidad_minima: int
+) -> dict[str, list[Opcion]]:
+    """
+    Opciones por clave de materia que cumplen las restricciones (2 consultas).
+    """
+    secciones = session.exec(
+        select(Seccion.id, Seccion.id_materia, Seccion.nrc, Seccion.disponibilidad).where(
+            Seccion.id_materia.in_(materias.values()),  # type: ignore
+            Seccion.id_ciclo == ciclo,
+            Seccion.id_centro == centro,
+            Seccion.disponibilidad >= disponibilidad_minima)
+    ).all()
+    mascaras: dict[int, int] = defaultdict(int)
+    for id_seccion, dias, hora_inicio, hora_fin in session.exec(
+            select(Sesion.id_seccion, Sesion.dias, Sesion.hora_inicio, Sesion.hora_fin).where(
+                Sesion.id_seccion.in_([s[0] for s in secciones]))).all():  # type: ignore
+        mascaras[id_seccion] |= mascara_sesion(dias, hora_inicio, hora_fin)
+
+    por_materia: dict[int, dict[int, list[tuple[str, int]]]] = defaultdict(lambda: defaultdict(list))
+    for id_seccion, id_materia, nrc, disponibilidad in secciones:
+        mascara = mascaras[id_seccion]
+        if mascara & prohibido:
+            continue
+        por_materia[id_materia][mascara].append((nrc, disponibilidad))
+
+    opciones: dict[str, list[Opcion]] = {}
+    for clave, id_materia in materias.items():
+        grupos = por_materia.get(id_materia, {})
+        opciones[clave] = [
+            Opcion(mascara, dias_de(mascara), sorted(nrcs, key=lambda s: (-s[1], s[0])))
+            for mascara, nrcs in sorted(grupos.items(), key=lambda g: evaluar(g[0]))
+        ]
+    return opciones
+
+
+Combinacion = tuple[tuple[int, int], dict[str, Opcion]]  # (puntaje, opción por materia)
+
+
+class BusquedaHorarios:
+    """
+    Búsqueda en profundidad con ramificación y poda sobre las opciones. Las
+    materias con menos opciones se asignan primero y, en cada nivel, se prueban
+    primero las opciones que dejan el horario parcial con mejor puntaje.
+
+    Una rama se descarta si alguna materia restante ya no tiene opciones
+    compatibles, o si su cota inferior no mejora al peor de los 'limit' mejores:
+    - los días solo crecen, y cada materia restante agrega al menos los de su
+      opción compatible más barata;
+    - los huecos actuales solo se llenan con clases de las materias restantes,
+      cada una a lo mucho con las ranuras que su mejor opción cubre dentro de ellos.
+
+    mejoras() corre la búsqueda y entrega cada combinación que supera a todas
+    las anteriores en cuanto se encuentra. Al terminar, 'combinaciones' tiene
+    las 'limit' mejores (mejor primero) y 'completa' es False si se agotó el tiempo.
+    """
+
+    def __init__(self, opciones: dict[str, list[Opcion]], limit: int, tiempo_maximo: float = TIEMPO_MAXIMO):
+        self.opciones = opciones
+        self.limit = limit
+        self.tiempo_maximo = tiempo_maximo
+        self.combinaciones: list[Combinacion] = []
+        self.completa = True
+
+    def mejoras(self) -> Iterator[Combinacion]:
+        opciones, limit = self.opciones, self.limit
+        claves = sorted(opciones, key=lambda clave: len(opciones[clave]))
+        # Heap con las mejores 'limit' combinaciones; el peor puntaje queda arriba
+        mejores: list[tuple[tuple[int, int], int, list[Opcion]]] = []
+        contador = itertools.count()
+        limite_tiempo = time.perf_counter() + self.tiempo_maximo
+        nodos = 0
+        mejor: tuple[int, int] | None = None
+
+        class TiempoAgotado(Exception):
+            pass
+
+        def cota(restantes: list[str], ocupado: int, dias: int) -> tuple[int, int] | None:
+            """
+            Cota inferior del puntaje de cualquier horario que complete la rama,
+            o None si alguna materia restante no cabe.
+            """
+            minimo_dias = dias.bit_count()
+            huecos = huecos_de(ocupado)
+            rellenables = 0
+            for clave in restantes:
+                dias_materia = 8
+                relleno = 0
+                for o in opciones[clave]:
+                    if not o.mascara & ocupado:
+                        dias_materia = min(dias_materia, (dias | o.dias).bit_count())
+                        relleno = max(relleno, (o.mascara & huecos).bit_count())
+                if dias_materia == 8:
+                    return None
+                minimo_dias = max(minimo_dias, dias_materia)
+                rellenables += relleno
+            return minimo_dias, max(huecos.bit_count() - rellenables, 0) * MINUTOS_POR_RANURA
+
+        def explorar(i: int, ocupado: int, dias: int, elegidas: list[Opcion]) -> Iterator[Combinacion]:
+            nonlocal nodos, mejor
+            nodos += 1
+            if nodos % _NODOS_ENTRE_RELOJ == 0 and time.perf_counter() > limite_tiempo:
+                raise TiempoAgotado
+
+            if i == len(claves):
+                puntaje = evaluar(ocupado)
+                entrada = (tuple(-x for x in puntaje), -next(contador), list(elegidas))
+                if len(mejores) < limit:
+                    heapq.heappush(mejores, entrada)
+                elif entrada > mejores[0]:
+                    heapq.heapreplace(mejores, entrada)
+                if mejor is None or puntaje < mejor:
+                    mejor = puntaje
+                    yield puntaje, dict(zip(claves, elegidas))
+                return
+
+            hijos = []
+            for opcion in opciones[claves[i]]:
+                if not opcion.mascara & ocupado:
+                    nuevo = ocupado | opcion.mascara
+                    hijos.append((evaluar(nuevo), nuevo, dias | opcion.dias, opcion))
+            hijos.sort(key=lambda hijo: hijo[0])
+
+            restantes = claves[i + 1:]
+            for _, nuevo, nuevos_dias, opcion in hijos:
+                inferior = cota(restantes, nuevo, nuevos_dias)
+                if inferior is None:
+                    continue
+                # Un empate con el peor tampoco entraría: el heap conserva el primero encontrado
+                if len(mejores) == limit and inferior >= tuple(-x for x in mejores[0][0]):
+                    continue
+                elegidas.append(opcion)
+                yield from explorar(i + 1, nuevo, nuevos_dias, elegidas)
+                elegidas.pop()
+
+        try:
+            yield from explorar(0, 0, 0, [])
+        except TiempoAgotado:
+            self.completa = False
+
+        self.combinaciones = [
+            ((-puntaje[0], -puntaje[1]), dict(zip(claves, elegidas)))
+            for puntaje, _, elegidas in sorted(mejores, reverse=True)
+        ]
+
+
+def _horarios_de(combinacion: Combinacion) -> Iterator[HorarioGenerado]:
+    """
+    Horarios concretos (una sección por materia) de una combinación, empezando
+    por las secciones con más disponibilidad.
+    """
+    (dias, minutos_libres), elegidas = combinacion
+    claves = list(elegidas)
+    for secciones in itertools.product(*(elegidas[c].secciones for c in claves)):
+        yield HorarioGenerado(
+            dias=dias,
+            minutos_libres=minutos_libres,
+            disponibilidad_minima=min((d for _, d in secciones), default=0),
+            secciones={clave: nrc for clave, (nrc, _) in zip(claves, secciones)}
+        )
+
+
+def horarios_encontrados(busqueda: BusquedaHorarios) -> Iterator[HorarioGenerado]:
+    """
+    Mientras dura la búsqueda, cada horario que mejora a todos los anteriores,
+    marcado como provisional. Al terminar, los 'limit' mejores, del mejor al
+    peor; esta lista final es independiente de los provisionales y puede repetirlos.
+    """
+    for combinacion in busqueda.mejoras():
+        yield next(_horarios_de(combinacion)).model_copy(update={"provisional": True})
+
+    horarios = (h for combinacion in busqueda.combinaciones for h in _horarios_de(combinacion))
+    yield from itertools.islice(horarios, busqueda.limit)
@@ -0,0 +1,58 @@
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+from database import Catalogo
+from lifespan import alias_a_centro
+from models import *
+from snapshots import al_publicar
+
+
+class IndiceClaves(NamedTuple):
+    generacion: int
+    ciclos: dict[str, int]
+    centros: dict[str, int]  # Incluye los alias de alias_centros.json
+    materias: dict[str, int]
+    carreras: dict[str, int]
+    profesores: dict[str, int]
+
+
+def _mapa(session: Session, clave, id_columna) -> dict[str, int]:
+    # Ante claves repetidas gana el id menor, igual que el .first() que reemplaza
+    mapa: dict[str, int] = {}
+    for valor, id_fila in session.exec(select(clave, id_columna).order_by(id_columna)).all():
+        mapa.setdefault(valor, id_fila)
+    return mapa
+
+
+def construir_indice(session: Session, generacion: int) -> IndiceClaves:
+    centros = _mapa(session, Centro.nombre, Centro.id)
+    for alias, nombre in alias_a_centro.items():
+        if nombre in centros:
+            centros[alias] = centros[nombre]
+
+    return IndiceClaves(
+        generacion=generacion,
+        ciclos=_mapa(session, Ciclo.nombre, Ciclo.id),
+        centros=centros,
+        materias=_mapa(session, Materia.clave, Materia.id),
+        carreras=_mapa(session, Carrera.clave, Carrera.id),
+        profesores=_mapa(session, Profesor.nombre, Profesor.id),
+    )
+
+
+_indice = IndiceClaves(0, {}, {}, {}, {}, {})
+
+
+def indice() -> IndiceClaves:
+    return _indice
+
+
+@al_publicar
+def _recargar_indice(catalogo: Catalogo):
+    global _indice
+    with Session(catalogo.engine) as session:
+        nuevo = construir_indice(session, catalogo.generacion)
+    _indice = nuevo
+    print(f"[ÍNDICE] Claves cargadas: {len(nuevo.materias)} materias, "
+          f"{len(nuevo.profesores)} profesores, {len(nuevo.carreras)} carreras.")
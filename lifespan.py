@@ -1,11 +1,15 @@
 from contextlib import asynccontextmanager
-from fastapi import  FastAPI
+from fastapi import  FastAPI, Request
 import asyncio
 import httpx
 import json
 import os
-from database import create_db_and_tables
+from database import create_db_and_tables, contar_sentencias
 from scraper_service import scrape_and_update_db
+from snapshots import cargar_snapshot, publicar_snapshot
+from archivo import cargar_particiones, archivar_ciclos_cerrados
+from alertas import procesar_avisos
+from metricas import MiddlewareMetricas, medir_espera_lock
 
 
 HISTORICAL_UPDATE_INTERVAL_HOURS = 24
@@ -30,6 +34,13 @@ async def daily_historical_update_loop(lock: asyncio.Lock, client: httpx.AsyncCl
                 force_historical=True
             )
             print(f"\n[ACTUALIZACIÓN HISTÓRICA] Completado exitosamente.")
+
+            # Mover a almacenamiento frío los ciclos que ya terminaron
+            async with medir_espera_lock(lock, "archivo"):
+                archivados = await asyncio.to_thread(archivar_ciclos_cerrados)
+            if archivados:
+                print(f"[ACTUALIZACIÓN HISTÓRICA] Ciclos archivados: {', '.join(archivados)}")
+                await publicar_snapshot()
         except Exception as e:
             print(f"\n[ACTUALIZACIÓN HISTÓRICA] Error: {e}")
             import traceback
@@ -69,6 +80,15 @@ async def lifespan(app: FastAPI):
     # Crear tablas
     print("Creando tablas de la base de datos...")
     create_db_and_tables()
+    cargar_particiones()
+
+    # Envío de alertas de cupo; se evalúan al publicar cada snapshot
+    asyncio.create_task(procesar_avisos())
+
+    # Servir el último snapshot del catálogo; si no hay uno vigente, construirlo
+    if not cargar_snapshot():
+        print("No hay snapshot vigente. Construyendo uno en segundo plano...")
+        asyncio.create_task(publicar_snapshot())
 
     # Ejecutar el primer scrapeo al inicio (con procesamiento de ciclos históricos)
     print("Ejecutando scrapeo inicial en segundo plano...")
@@ -102,3 +122,14 @@ async def lifespan(app: FastAPI):
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MiddlewareMetricas)
+
+# Con CONTAR_SENTENCIAS=true cada respuesta indica cuántas sentencias SQL costó,
+# para detectar consultas N+1 en un endpoint.
+if os.getenv("CONTAR_SENTENCIAS", "").lower() == "true":
+    @app.middleware("http")
+    async def contar_sentencias_sql(request: Request, call_next):
+        with contar_sentencias() as contador:
+            response = await call_next(request)
+        response.headers["X-Sentencias-SQL"] = str(contador.total)
+        return response
@@ -14,6 +14,9 @@ from database import SessionDep
 from models import *
 from scraper_service import scrape_and_update_db, scrape_specific_materia, beesScraper
 from email_service import enviar_reporte_soporte
+from archivo import archivar_ciclo, archivar_ciclos_cerrados, esta_archivado
+from snapshots import publicar_snapshot
+from metricas import medir_espera_lock
 from routes import *
 from dependencies import *
 from lifespan import app
@@ -86,6 +89,38 @@ async def trigger_full_refresh(request: Request):
     return {"message": "Proceso de actualización completa iniciado en segundo plano."}
 
 
+@app.post("/admin/archivar", response_model=ArchivoResponse)
+async def trigger_archivar(request: Request, ciclo: str | None = None):
+    """
+    Mueve ciclos cerrados a particiones de solo lectura.
+    Sin 'ciclo', archiva todos los que terminaron hace más de un mes.
+    """
+    lock = request.app.state.scrape_lock
+    if lock.locked():
+        raise HTTPException(
+            status_code=429, detail="Un scrapeo ya está en curso.")
+
+    if ciclo is not None:
+        id_ciclo = validar_ciclo(ciclo)
+        if esta_archivado(id_ciclo):
+            raise HTTPException(
+                status_code=409, detail=f"El ciclo {ciclo} ya está archivado.")
+
+    async with medir_espera_lock(lock, "archivo"):
+        if ciclo is not None:
+            await asyncio.to_thread(archivar_ciclo, id_ciclo)
+            archivados = [ciclo]
+        else:
+            archivados = await asyncio.to_thread(archivar_ciclos_cerrados)
+
+    if archivados:
+        await publicar_snapshot()
+    return ArchivoResponse(
+        mensaje="Ciclos archivados" if archivados else "No hay ciclos para archivar",
+        ciclos=archivados
+    )
+
+
 @app.get("/abu")
 async def abu_endpoint():
     with open("cadena.txt", "r", encoding="utf-8") as f:
@@ -0,0 +1,167 @@
+from array import array
+from collections import defaultdict
+from typing import Iterable
+
+from sqlmodel import Session, select
+
+from archivo import IndiceArchivado, ciclos_archivados, esta_archivado
+from database import Catalogo
+from models import *
+from snapshots import al_publicar
+
+_VACIO = array("l")
+
+
+class MatrizOferta:
+    """
+    Índices precalculados de la oferta para /carreras/ y /materias/.
+
+    'oferta' guarda, por (ciclo, centro), los ids ordenados de las materias con
+    al menos una sección; None en cualquiera de los dos significa "todos".
+    Las materias de una carrera se obtienen filtrando esos arreglos y se memorizan.
+    """
+
+    def __init__(
+        self,
+        generacion: int,
+        materias: dict[int, MateriaPublic],
+        carreras: dict[int, CarreraPublic],
+        carrera_materias: dict[int, frozenset[int]],
+        centro_carreras: dict[int, frozenset[int]],
+        oferta: dict[tuple[int | None, int | None], array],
+        carreras_con_oferta: dict[tuple[int | None, int | None], list[int]],
+    ):
+        self.generacion = generacion
+        self.materias = materias
+        self.carreras = carreras
+        self.carrera_materias = carrera_materias
+        self.centro_carreras = centro_carreras
+        self.oferta = oferta
+        self.carreras_con_oferta = carreras_con_oferta
+        self.todas = array("l", sorted(materias))
+        self._por_carrera: dict[tuple, array] = {}
+
+    def materias_de(self, ciclo: int | None, centro: int | None, carrera: int | None) -> array:
+        """
+        Ids ordenados de las materias que cumplen los filtros, igual que la consulta
+        original: sin ciclo ni centro se consideran todas las materias.
+        """
+        if ciclo is None and centro is None:
+            base = self.todas
+        else:
+            base = self.oferta.get((ciclo, centro), _VACIO)
+        if carrera is None:
+            return base
+
+        clave = (ciclo, centro, carrera)
+        resultado = self._por_carrera.get(clave)
+        if resultado is None:
+            de_carrera = self.carrera_materias.get(carrera, frozenset())
+            resultado = array("l", (id_materia for id_materia in base if id_materia in de_carrera))
+            self._por_carrera[clave] = resultado
+        return resultado
+
+    def carreras_de(self, ciclo: int | None, centro: int | None) -> list[int]:
+        return self.carreras_con_oferta.get((ciclo, centro), [])
+
+
+def construir_matriz(
+    session: Session,
+    generacion: int,
+    id_ciclo: int | None = None,
+    archivadas: Iterable[MatrizOferta] = ()
+) -> MatrizOferta:
+    """
+    Construye la matriz desde una sesión del catálogo (o de una partición, con 'id_ciclo').
+    La oferta de las matrices 'archivadas' se suma a la del catálogo, para que
+    las consultas sin ciclo sigan incluyendo los ciclos archivados.
+    """
+    stmt = select(Seccion.id_ciclo, Seccion.id_centro, Seccion.id_materia).distinct()
+    if id_ciclo is not None:
+        stmt = stmt.where(Seccion.id_ciclo == id_ciclo)
+
+    filas = list(session.exec(stmt).all())
+    for archivada in archivadas:
+        filas.extend(
+            (ciclo, centro, materia)
+            for (ciclo, centro), materias in archivada.oferta.items()
+            if ciclo is not None and centro is not None
+            for materia in materias
+        )
+
+    conjuntos: dict[tuple[int | None, int | None], set[int]] = defaultdict(set)
+    for ciclo, centro, materia in filas:
+        conjuntos[(ciclo, centro)].add(materia)
+        conjuntos[(ciclo, None)].add(materia)
+        conjuntos[(None, centro)].add(materia)
+        conjuntos[(None, None)].add(materia)
+
+    carrera_materias: dict[int, set[int]] = defaultdict(set)
+    for id_carrera, id_materia in session.exec(
+            select(CarreraMateriaLink.id_carrera, CarreraMateriaLink.id_materia)).all():
+        carrera_materias[id_carrera].add(id_materia)
+
+    centro_carreras: dict[int, set[int]] = defaultdict(set)
+    carreras_con_centro: set[int] = set()
+    for id_centro, id_carrera in session.exec(
+            select(CentroCarreraLink.id_centro, CentroCarreraLink.id_carrera)).all():
+        centro_carreras[id_centro].add(id_carrera)
+        carreras_con_centro.add(id_carrera)
+
+    # Carreras con oferta: ligadas al centro (o a cualquiera) y con alguna
+    # materia que tenga secciones en el (ciclo, centro)
+    carreras_con_oferta: dict[tuple[int | None, int | None], list[int]] = {}
+    for (ciclo, centro), con_secciones in conjuntos.items():
+        candidatas = centro_carreras.get(centro, set()) if centro is not None else carreras_con_centro
+        carreras_con_oferta[(ciclo, centro)] = sorted(
+            id_carrera for id_carrera in candidatas
+            if not con_secciones.isdisjoint(carrera_materias.get(id_carrera, ()))
+        )
+
+    materias = {
+        m.id: MateriaPublic(clave=m.clave, nombre=m.nombre, creditos=m.creditos)
+        for m in session.exec(select(Materia)).all() if m.id is not None
+    }
+    carreras = {
+        c.id: CarreraPublic(clave=c.clave, nombre=c.nombre)
+        for c in session.exec(select(Carrera)).all() if c.id is not None
+    }
+
+    matriz = MatrizOferta(
+        generacion=generacion,
+        materias=materias,
+        carreras=carreras,
+        carrera_materias={k: frozenset(v) for k, v in carrera_materias.items()},
+        centro_carreras={k: frozenset(v) for k, v in centro_carreras.items()},
+        oferta={k: array("l", sorted(v)) for k, v in conjuntos.items()},
+        carreras_con_oferta=carreras_con_oferta,
+    )
+
+    # Precalcular las combinaciones (ciclo, centro, carrera) que ofrece cada centro
+    for (ciclo, centro) in conjuntos:
+        if ciclo is not None and centro is not None:
+            for id_carrera in matriz.centro_carreras.get(centro, ()):
+                matriz.materias_de(ciclo, centro, id_carrera)
+    return matriz
+
+
+_matriz = MatrizOferta(0, {}, {}, {}, {}, {}, {})
+_matrices_archivadas = IndiceArchivado(lambda session, id_ciclo: construir_matriz(session, 0, id_ciclo))
+
+
+def matriz_para(id_ciclo: int | None) -> MatrizOferta:
+    if id_ciclo is not None and esta_archivado(id_ciclo):
+        return _matrices_archivadas.obtener(id_ciclo)
+    return _matriz
+
+
+def generacion() -> int:
+    return _matriz.generacion
+
+
+@al_publicar
+def _recalcular_matriz(catalogo: Catalogo):
+    global _matriz
+    archivadas = [_matrices_archivadas.obtener(id_ciclo) for id_ciclo in ciclos_archivados()]
+    with Session(catalogo.engine) as session:
+        _matriz = construir_matriz(session, catalogo.generacion, archivadas=archivadas)
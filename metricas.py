@@ -0,0 +1,225 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+
+from database import contar_sentencias
+
+# Métricas en memoria expuestas en /metrics con el formato de texto de
+# Prometheus. Cada métrica guarda sus series en un dict por tupla de valores de
+# etiquetas; registrar un valor es una búsqueda en el dict bajo un lock, así
+# que pueden quedarse activas en producción.
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BUCKETS_SCRAPER = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+BUCKETS_PARSEO = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def _selector(self, valores: tuple[str, ...], extra: str = "") -> str:
+        pares = [f'{e}="{_escapar(str(v))}"' for e, v in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def muestras(self) -> list[str]:
+        raise NotImplementedError
+
+    def exponer(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas.extend(self.muestras())
+        return "\n".join(lineas)
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: dict[tuple[str, ...], float] = {}
+
+    def incrementar(self, *valores: str, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def muestras(self) -> list[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{self._selector(v)} {_numero(x)}" for v, x in valores]
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: dict[tuple[str, ...], float] = {}
+
+    def fijar(self, valor: float, *valores: str):
+        with self._lock:
+            self._valores[valores] = valor
+
+    def sumar(self, cantidad: float, *valores: str):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def muestras(self) -> list[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{self._selector(v)} {_numero(x)}" for v, x in valores]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = (), buckets: tuple[float, ...] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = buckets
+        # Por serie: conteos por bucket (no acumulados; el último es +Inf), suma
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observar(self, valor: float, *valores: str):
+        posicion = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = ([0] * (len(self.buckets) + 1), [0.0])
+            serie[0][posicion] += 1
+            serie[1][0] += valor
+
+    def muestras(self) -> list[str]:
+        with self._lock:
+            series = [(v, list(conteos), suma[0]) for v, (conteos, suma) in self._series.items()]
+        lineas = []
+        for valores, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="' + _numero(limite) + '"'
+                lineas.append(f"{self.nombre}_bucket{self._selector(valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._selector(valores)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{self._selector(valores)} {acumulado}")
+        return lineas
+
+
+_metricas: list[_Metrica] = []
+
+
+def exponer() -> str:
+    return "\n".join(m.exponer() for m in _metricas) + "\n"
+
+
+# --- HTTP ---
+
+peticiones = Contador(
+    "http_peticiones_total", "Peticiones HTTP atendidas.", ("ruta", "metodo", "codigo"))
+latencia = Histograma(
+    "http_latencia_segundos", "Duración de las peticiones HTTP hasta enviar el último byte.", ("ruta", "metodo"))
+en_curso = Medidor("http_peticiones_en_curso", "Peticiones HTTP en curso.")
+en_curso.fijar(0)
+sentencias = Histograma(
+    "http_sentencias_sql", "Sentencias SQL ejecutadas por petición.", ("ruta", "metodo"), BUCKETS_SENTENCIAS)
+transmisiones = Medidor(
+    "http_transmisiones_abiertas", "Respuestas continuas (SSE, exportaciones) aún transmitiéndose.", ("ruta",))
+
+# --- Scraper ---
+
+scraper_ejecuciones = Contador(
+    "scraper_ejecuciones_total", "Ejecuciones del scrapeo completo por resultado.", ("resultado",))
+scraper_duracion = Histograma(
+    "scraper_duracion_segundos", "Duración de cada scrapeo completo.", buckets=BUCKETS_SCRAPER)
+scraper_paginas = Contador(
+    "scraper_paginas_total", "Páginas descargadas de SIIAU por tipo y resultado.", ("tipo", "resultado"))
+scraper_parseo = Histograma(
+    "scraper_parseo_segundos", "Tiempo de parseo de cada página de oferta.", buckets=BUCKETS_PARSEO)
+scraper_filas = Contador(
+    "scraper_filas_escritas_total", "Filas escritas por el scrapeo.", ("tabla", "operacion"))
+scraper_espera_lock = Histograma(
+    "scraper_espera_lock_segundos", "Espera para obtener el lock de scrapeo.", ("tarea",), BUCKETS_SCRAPER)
+scraper_ultimo_exito = Medidor(
+    "scraper_ultimo_exito_timestamp_segundos", "Fin del último scrapeo exitoso de cada ciclo (epoch).", ("ciclo",))
+
+
+@asynccontextmanager
+async def medir_espera_lock(lock, tarea: str):
+    inicio = time.perf_counter()
+    async with lock:
+        scraper_espera_lock.observar(time.perf_counter() - inicio, tarea)
+        yield
+
+
+def continua(endpoint):
+    """
+    Marca un endpoint cuya respuesta se transmite por minutos (SSE, exportaciones).
+    Su latencia se mide hasta enviar los encabezados y, desde entonces, cuenta
+    en 'http_transmisiones_abiertas' en lugar de 'http_peticiones_en_curso'.
+    """
+    endpoint.continua = True
+    return endpoint
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI: latencia, código y sentencias SQL por ruta. Se usa la
+    plantilla de la ruta ("/materia/{materia}") para no crear una serie por URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codigo = 500
+        inicio = time.perf_counter()
+        metodo = scope["method"]
+        transmitiendo: str | None = None  # Plantilla de una respuesta continua ya iniciada
+
+        def plantilla() -> str:
+            return getattr(scope.get("route"), "path", None) or "sin_ruta"
+
+        async def enviar(mensaje):
+            nonlocal codigo, transmitiendo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+                if getattr(getattr(scope.get("route"), "endpoint", None), "continua", False):
+                    transmitiendo = plantilla()
+                    latencia.observar(time.perf_counter() - inicio, transmitiendo, metodo)
+                    en_curso.sumar(-1)
+                    transmisiones.sumar(1, transmitiendo)
+            await send(mensaje)
+
+        en_curso.sumar(1)
+        try:
+            with contar_sentencias() as contador:
+                await self.app(scope, receive, enviar)
+        finally:
+            if transmitiendo is not None:
+                transmisiones.sumar(-1, transmitiendo)
+            else:
+                en_curso.sumar(-1)
+                latencia.observar(time.perf_counter() - inicio, plantilla(), metodo)
+            sentencias.observar(contador.total, plantilla(), metodo)
+            peticiones.incrementar(plantilla(), metodo, str(codigo))
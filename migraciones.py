@@ -0,0 +1,130 @@
+from sqlalchemy import Connection, Engine, inspect
+from sqlmodel import create_engine
+
+from models import Profesor, Sesion
+
+# Cada migración lleva la base de la versión (índice) a la versión (índice + 1).
+# La versión se guarda en PRAGMA user_version.
+
+
+def _v1_sesion_por_patron(conn: Connection):
+    """
+    Una fila de Sesion por patrón de días (máscara) en lugar de una por día.
+    """
+    columnas = [c["name"] for c in inspect(conn).get_columns(Sesion.__tablename__)]
+    if "dia_semana" not in columnas:
+        return
+
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_sesion_id_seccion")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_sesion_id_aula")
+    conn.exec_driver_sql("ALTER TABLE sesion RENAME TO sesion_v0")
+    Sesion.__table__.create(conn)  # type: ignore
+    conn.exec_driver_sql("""
+        INSERT INTO sesion (id_seccion, id_aula, fecha_inicio, fecha_fin, hora_inicio, hora_fin, dias)
+        SELECT id_seccion, id_aula, fecha_inicio, fecha_fin, hora_inicio, hora_fin,
+               SUM(DISTINCT 1 << (dia_semana - 1))
+        FROM sesion_v0
+        GROUP BY id_seccion, id_aula, fecha_inicio, fecha_fin, hora_inicio, hora_fin
+        ORDER BY MIN(id)
+    """)
+    conn.exec_driver_sql("DROP TABLE sesion_v0")
+
+
+def _v2_indice_nombre_profesor(conn: Connection):
+    """
+    Índice sobre profesor.nombre (búsquedas del scraper y horario por profesor).
+    """
+    if Profesor.__tablename__ in inspect(conn).get_table_names():
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_profesor_nombre ON profesor (nombre)")
+
+
+def _v3_agregados_calificaciones(conn: Connection):
+    """
+    Llena los agregados de calificaciones con las reseñas existentes.
+    """
+    if "resena" not in inspect(conn).get_table_names():
+        return  # Particiones: no tienen reseñas
+    histograma = ", ".join(f"SUM(satisfaccion = {n})" for n in range(1, 6))
+    conteos = ", ".join(f"conteo_{n}" for n in range(1, 6))
+    conn.exec_driver_sql("DELETE FROM calificacionprofesor")
+    conn.exec_driver_sql("DELETE FROM calificacionprofesormateria")
+    conn.exec_driver_sql(f"""
+        INSERT INTO calificacionprofesor (id_profesor, total, suma, {conteos})
+        SELECT id_profesor, COUNT(*), SUM(satisfaccion), {histograma}
+        FROM resena GROUP BY id_profesor
+    """)
+    conn.exec_driver_sql(f"""
+        INSERT INTO calificacionprofesormateria (id_profesor, id_materia, total, suma, {conteos})
+        SELECT id_profesor, id_materia, COUNT(*), SUM(satisfaccion), {histograma}
+        FROM resena GROUP BY id_profesor, id_materia
+    """)
+
+
+def _v4_seudonimos(conn: Connection):
+    """
+    Seudónimo guardado en alumno y copiado en resena.
+    """
+    from seudonimos import generar_seudonimo
+
+    tablas = inspect(conn).get_table_names()
+    if "alumno" not in tablas:
+        return  # Particiones: no tienen alumnos
+    if "seudonimo" not in [c["name"] for c in inspect(conn).get_columns("alumno")]:
+        conn.exec_driver_sql("ALTER TABLE alumno ADD COLUMN seudonimo VARCHAR")
+    if "seudonimo" not in [c["name"] for c in inspect(conn).get_columns("resena")]:
+        conn.exec_driver_sql("ALTER TABLE resena ADD COLUMN seudonimo VARCHAR NOT NULL DEFAULT ''")
+
+    alumnos = conn.exec_driver_sql("SELECT id, correo FROM alumno WHERE seudonimo IS NULL").all()
+    if alumnos:
+        conn.exec_driver_sql(
+            "UPDATE alumno SET seudonimo = ? WHERE id = ?",
+            [(generar_seudonimo(correo, id_alumno), id_alumno) for id_alumno, correo in alumnos]
+        )
+    conn.exec_driver_sql(
+        "UPDATE resena SET seudonimo = (SELECT seudonimo FROM alumno WHERE alumno.id = resena.id_alumno)"
+    )
+
+
+MIGRACIONES = [
+    _v1_sesion_por_patron,
+    _v2_indice_nombre_profesor,
+    _v3_agregados_calificaciones,
+    _v4_seudonimos,
+]
+VERSION_ACTUAL = len(MIGRACIONES)
+
+
+def version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def aplicar_migraciones(engine: Engine, nueva: bool = False):
+    """
+    Aplica las migraciones pendientes. Una base recién creada ya tiene el esquema
+    actual, así que solo se marca con la última versión.
+    """
+    with engine.begin() as conn:
+        actual = VERSION_ACTUAL if nueva else version(conn)
+        for numero in range(actual, VERSION_ACTUAL):
+            migracion = MIGRACIONES[numero]
+            print(f"[MIGRACIÓN] v{numero + 1}: {migracion.__doc__.strip()}")  # type: ignore
+            migracion(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {VERSION_ACTUAL}")
+
+
+def migrar_archivo(ruta: str) -> bool:
+    """
+    Migra un archivo SQLite de solo lectura (p. ej. una partición) si hace falta.
+    Retorna True si se modificó.
+    """
+    engine_archivo = create_engine(f"sqlite:///{ruta}")
+    try:
+        with engine_archivo.connect() as conn:
+            if version(conn) >= VERSION_ACTUAL:
+                return False
+        aplicar_migraciones(engine_archivo)
+        with engine_archivo.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        return True
+    finally:
+        engine_archivo.dispose()
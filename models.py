@@ -30,12 +30,13 @@ class Carrera(SQLModel, table=True):
 
 class Profesor(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    nombre: str
+    nombre: str = Field(index=True)
     secciones: list["Seccion"] = Relationship(back_populates="profesor")
 
 class Alumno(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     correo: str = Field(index=True, unique=True)
+    seudonimo: str | None = None  # Nombre público en las reseñas (ver seudonimos.py)
 
 class Materia(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
@@ -57,11 +58,32 @@ class Resena(SQLModel, table=True):
     fecha_creacion: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
     contenido : str
     satisfaccion : int = Field(ge=1, le=5)
+    seudonimo : str = ""  # Copia de Alumno.seudonimo para listar sin unir con alumno
     
     profesor: Profesor = Relationship()
     materia: Materia = Relationship()
     alumno: Alumno = Relationship()
 
+class AgregadoCalificacion(SQLModel):
+    """
+    Conteo, suma e histograma de 'satisfaccion' de las reseñas publicadas.
+    Se actualiza en la misma transacción que publica la reseña (ver calificaciones.py).
+    """
+    total: int = 0
+    suma: int = 0
+    conteo_1: int = 0
+    conteo_2: int = 0
+    conteo_3: int = 0
+    conteo_4: int = 0
+    conteo_5: int = 0
+
+class CalificacionProfesor(AgregadoCalificacion, table=True):
+    id_profesor: int = Field(foreign_key="profesor.id", primary_key=True)
+
+class CalificacionProfesorMateria(AgregadoCalificacion, table=True):
+    id_profesor: int = Field(foreign_key="profesor.id", primary_key=True)
+    id_materia: int = Field(foreign_key="materia.id", primary_key=True)
+
 class ResenaPendiente(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("id_profesor", "id_materia", "id_alumno", name="pendiente_unica_por_tupla"),
@@ -76,6 +98,23 @@ class ResenaPendiente(SQLModel, table=True):
     codigo : str = Field(index=True, unique=True)
 
 
+class AlertaCupo(SQLModel, table=True):
+    """
+    Suscripción de un alumno a una sección para recibir un correo cuando se abra un lugar.
+    """
+    __table_args__ = (
+        UniqueConstraint("id_alumno", "id_ciclo", "nrc", name="alerta_unica"),
+    )
+    id: int | None = Field(default=None, primary_key=True)
+    id_alumno: int = Field(foreign_key="alumno.id", index=True)
+    id_ciclo: int = Field(foreign_key="ciclo.id")
+    nrc: str
+    codigo: str | None = Field(default=None, index=True, unique=True)  # Mientras no se verifica
+    verificada: bool = False
+    avisada: bool = False  # Ya se avisó de la apertura actual; se reinicia cuando se llena
+    fecha_creacion: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+
 class Seccion(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("nrc", "id_ciclo", name="nrc_ciclo_unicos"),
@@ -114,13 +153,61 @@ class Sesion(SQLModel, table=True):
     fecha_fin: datetime.date
     hora_inicio: datetime.time
     hora_fin: datetime.time
-    dia_semana: int
+    dias: int  # Máscara de días: el bit (n - 1) indica que hay clase el día n (1 = lunes)
+
+    def dias_semana(self) -> list[int]:
+        return [dia for dia in range(1, 8) if self.dias & (1 << (dia - 1))]
+
+class SerieDisponibilidad(SQLModel, table=True):
+    """
+    Bloque de la serie de disponibilidad de una sección. Las muestras se guardan
+    en 'datos' como deltas codificados (ver historial.py) y solo cuando cambian.
+    """
+    __table_args__ = (
+        UniqueConstraint("nrc", "id_ciclo", "bloque", name="serie_bloque_unico"),
+    )
+    id: int | None = Field(default=None, primary_key=True)
+    nrc: str
+    id_ciclo: int = Field(foreign_key="ciclo.id", index=True)
+    bloque: int
+    inicio_ts: int
+    ultimo_ts: int
+    ultima_disponibilidad: int
+    ultimos_cupos: int
+    n_muestras: int
+    datos: bytes
+
+class CicloArchivado(SQLModel, table=True):
+    """
+    Ciclo cerrado cuyas secciones y sesiones viven en una partición de solo lectura.
+    """
+    id_ciclo: int = Field(foreign_key="ciclo.id", primary_key=True)
+    nombre: str
+    ruta: str
+    secciones: int
+    fecha: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
 
 
 # --- Modelos Pydantic (Respuesta de API) ---
 
+class ResumenCalificacion(BaseModel):
+    total: int
+    promedio: float | None = None
+    histograma: list[int]  # Reseñas con satisfacción 1 a 5
+
 class ProfesorPublic(BaseModel):
     nombre: str
+    calificacion: ResumenCalificacion | None = None  # Solo con ?calificaciones=true
+    calificacion_materia: ResumenCalificacion | None = None
+
+class CalificacionEnMateriaPublic(BaseModel):
+    profesor: str
+    calificacion: ResumenCalificacion
+
+class CalificacionesProfesorPublic(BaseModel):
+    profesor: str
+    general: ResumenCalificacion
+    materias: dict[str, ResumenCalificacion]  # Por clave de materia
 
 class MateriaPublic(BaseModel):
     clave: str
@@ -146,6 +233,23 @@ class SesionPublic(BaseModel):
     hora_fin: datetime.time
     dia_semana: int
 
+class SeccionMateriaPublic(SeccionPublic):
+    materia: str
+
+class SeccionExportada(SeccionMateriaPublic):
+    ciclo: str
+    nombre_materia: str
+    creditos: int
+    carreras: list[str]  # Claves de las carreras del centro que incluyen la materia
+
+class CambiosPublic(BaseModel):
+    generacion: int  # Usar como 'desde' en la siguiente consulta
+    # Aplicar primero las eliminaciones: un NRC puede borrarse y volver a crearse
+    secciones: list[SeccionMateriaPublic]
+    secciones_eliminadas: list[str]  # NRC
+    materias: list[MateriaPublic]
+    materias_eliminadas: list[str]  # Claves
+
 class ResenaPublic(BaseModel):
     contenido: str
     satisfaccion: int
@@ -153,6 +257,15 @@ class ResenaPublic(BaseModel):
     materia: str
     alumno: str
 
+class AlertaCupoCreate(BaseModel):
+    correo_alumno: str
+    ciclo: str
+    nrc: str
+
+class AlertaCupoResponse(BaseModel):
+    mensaje: str
+    advertencia: str | None = None
+
 class ResenaPendienteCreate(BaseModel):
     correo_alumno: str
     clave_materia: str
@@ -168,6 +281,49 @@ class ResenaVerificadaResponse(BaseModel):
     mensaje: str
     status: str
 
+class PuntoDisponibilidad(BaseModel):
+    fecha: datetime.datetime
+    disponibilidad: int
+    cupos: int
+    disponibilidad_minima: int
+
+class ArchivoResponse(BaseModel):
+    mensaje: str
+    ciclos: list[str]
+
+class SnapshotPublic(BaseModel):
+    generacion: int
+    creado: datetime.datetime | None = None
+
+class ResultadoBusqueda(BaseModel):
+    tipo: str  # materia, profesor o carrera
+    clave: str | None = None
+    nombre: str
+
+class Sugerencia(BaseModel):
+    tipo: str  # materia, profesor o centro
+    texto: str
+    clave: str | None = None  # Clave de la materia o alias del centro
+
+class HorarioGenerado(BaseModel):
+    dias: int  # Días con clase
+    minutos_libres: int  # Huecos entre clases en la semana
+    disponibilidad_minima: int
+    secciones: dict[str, str]  # Clave de materia -> NRC
+    provisional: bool = False  # Mejor encontrado mientras sigue la búsqueda; no es parte de la lista final
+
+class FinBusquedaHorarios(BaseModel):
+    completa: bool  # False si la búsqueda se cortó por tiempo
+
+class OcupacionAulaPublic(BaseModel):
+    dia_semana: int
+    hora_inicio: datetime.time
+    hora_fin: datetime.time
+    fecha_inicio: datetime.date
+    fecha_fin: datetime.date
+    nrc: str
+    materia: str
+
 class CarreraPublic(BaseModel):
     clave: str
     nombre: str
@@ -0,0 +1,128 @@
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+from archivo import IndiceArchivado, esta_archivado
+from database import Catalogo
+from models import *
+from snapshots import al_publicar
+
+# Índice de intervalos de ocupación de aulas, por ciclo y edificio. Para cada
+# (aula, día) se guardan las sesiones ordenadas por hora de inicio junto con el
+# máximo acumulado de las horas de fin: saber si un aula está ocupada en un
+# rango es una búsqueda binaria, sin recorrer las sesiones.
+
+
+def _minutos(hora: datetime.time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+class Ocupacion(NamedTuple):
+    inicio: int  # Minutos desde la medianoche
+    fin: int
+    fecha_inicio: datetime.date
+    fecha_fin: datetime.date
+    nrc: str
+    materia: str
+
+
+class IntervalosDia:
+    def __init__(self, ocupaciones: list[Ocupacion]):
+        self.ocupaciones = sorted(ocupaciones)
+        self.inicios = [o.inicio for o in self.ocupaciones]
+        self.max_fin: list[int] = []
+        maximo = -1
+        for o in self.ocupaciones:
+            maximo = max(maximo, o.fin)
+            self.max_fin.append(maximo)
+
+    def ocupado(self, inicio: int, fin: int, fecha: datetime.date | None = None) -> bool:
+        """
+        True si alguna sesión se traslapa con [inicio, fin). Con 'fecha' solo
+        cuentan las sesiones vigentes ese día.
+        """
+        candidatas = bisect_left(self.inicios, fin)  # Sesiones que empiezan antes de 'fin'
+        if candidatas == 0 or self.max_fin[candidatas - 1] <= inicio:
+            return False
+        if fecha is None:
+            return True
+        return any(
+            o.fin > inicio and o.fecha_inicio <= fecha <= o.fecha_fin
+            for o in self.ocupaciones[:candidatas]
+        )
+
+
+class OcupacionCiclo:
+    def __init__(self, edificios: dict[str, dict[str, dict[int, IntervalosDia]]]):
+        # edificio -> salón -> día (1-7) -> intervalos
+        self.edificios = edificios
+
+    def aulas_libres(
+        self, edificio: str, dia: int, inicio: int, fin: int, fecha: datetime.date | None = None
+    ) -> list[str]:
+        libres = []
+        for salon, dias in self.edificios.get(edificio, {}).items():
+            intervalos = dias.get(dia)
+            if intervalos is None or not intervalos.ocupado(inicio, fin, fecha):
+                libres.append(salon)
+        return libres
+
+    def ocupacion_de(self, edificio: str, salon: str) -> list[tuple[int, Ocupacion]]:
+        dias = self.edificios.get(edificio, {}).get(salon, {})
+        return [(dia, o) for dia in sorted(dias) for o in dias[dia].ocupaciones]
+
+
+def construir_ocupacion(session: Session, id_ciclo: int | None = None) -> dict[int, OcupacionCiclo]:
+    stmt = (
+        select(
+            Seccion.id_ciclo, Aula.edificio, Aula.salon, Sesion.dias,
+            Sesion.hora_inicio, Sesion.hora_fin, Sesion.fecha_inicio, Sesion.fecha_fin,
+            Seccion.nrc, Materia.clave)
+        .join(Seccion, Sesion.id_seccion == Seccion.id)  # type: ignore
+        .join(Aula, Sesion.id_aula == Aula.id)  # type: ignore
+        .join(Materia, Seccion.id_materia == Materia.id)  # type: ignore
+    )
+    if id_ciclo is not None:
+        stmt = stmt.where(Seccion.id_ciclo == id_ciclo)
+
+    por_aula: dict[int, dict[str, dict[str, dict[int, list[Ocupacion]]]]] = defaultdict(
+        lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(list))))
+    for ciclo, edificio, salon, dias, hora_inicio, hora_fin, fecha_inicio, fecha_fin, nrc, clave in session.exec(stmt).all():
+        ocupacion = Ocupacion(_minutos(hora_inicio), _minutos(hora_fin), fecha_inicio, fecha_fin, nrc, clave)
+        salones = por_aula[ciclo][edificio]
+        for dia in range(1, 8):
+            if dias & (1 << (dia - 1)):
+                salones[salon][dia].append(ocupacion)
+
+    return {
+        ciclo: OcupacionCiclo({
+            edificio: {
+                salon: {dia: IntervalosDia(lista) for dia, lista in dias.items()}
+                for salon, dias in sorted(salones.items())
+            }
+            for edificio, salones in edificios.items()
+        })
+        for ciclo, edificios in por_aula.items()
+    }
+
+
+_VACIO = OcupacionCiclo({})
+_ocupacion: dict[int, OcupacionCiclo] = {}
+_ocupacion_archivada = IndiceArchivado(
+    lambda session, id_ciclo: construir_ocupacion(session, id_ciclo).get(id_ciclo, _VACIO))
+
+
+def ocupacion_para(id_ciclo: int) -> OcupacionCiclo:
+    if esta_archivado(id_ciclo):
+        return _ocupacion_archivada.obtener(id_ciclo)
+    return _ocupacion.get(id_ciclo, _VACIO)
+
+
+@al_publicar
+def _reconstruir_ocupacion(catalogo: Catalogo):
+    global _ocupacion
+    with Session(catalogo.engine) as session:
+        _ocupacion = construir_ocupacion(session)
@@ -0,0 +1,40 @@
+import base64
+
+from fastapi import HTTPException, Response
+
+# Paginación por cursor (keyset): el cursor es opaco para el cliente y codifica
+# el último id entregado; la siguiente página empieza en "id > último" usando el
+# índice de la llave primaria, sin recorrer y descartar filas como OFFSET.
+
+HEADER_CURSOR = "X-Siguiente-Cursor"
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{ultimo_id}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str | None, offset: int = 0) -> int | None:
+    """
+    Último id del cursor. Un cursor no se combina con 'offset': la página
+    saltaría filas sin que el cliente lo note.
+    """
+    if cursor is None:
+        return None
+    if offset:
+        raise HTTPException(status_code=400, detail="Usa 'cursor' u 'offset', no ambos")
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefijo, valor = texto.split(":", 1)
+        if prefijo != "id":
+            raise ValueError(prefijo)
+        return int(valor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def poner_cursor(response: Response, ids: list[int], limit: int):
+    """
+    Agrega el cursor de la siguiente página si la actual vino completa.
+    """
+    if limit > 0 and len(ids) == limit:
+        response.headers[HEADER_CURSOR] = codificar_cursor(ids[-1])
@@ -0,0 +1,324 @@
+import datetime
+import hashlib
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlmodel import Session, select
+
+import database
+from archivo import engine_para_ciclo, esta_archivado
+from database import Catalogo
+from models import *
+from snapshots import al_publicar
+
+# Paquete binario de la oferta de un (ciclo, centro) para usarse sin conexión.
+# El contenido (antes de comprimir con zlib) es, todo en little-endian:
+#
+#   "MHP1", u32 cadenas, u32 materias, u32 secciones, u32 sesiones
+#   cadenas:   u32[cadenas] fin de cada cadena, seguido de los bytes UTF-8 concatenados
+#   materias:  u32 clave, u32 nombre (índices de cadena), u16 creditos
+#   secciones: u32 nrc, u32 numero, u32 materia (índice de materia), u32 profesor,
+#              u16 cupos, i16 disponibilidad, u32[secciones + 1] primera sesión
+#   sesiones:  u8 dias (bit 0 = lunes), u16 inicio, u16 fin (minutos desde la
+#              medianoche), u16 fecha_inicio, u16 fecha_fin (días desde 1970-01-01),
+#              u32 edificio, u32 salon
+#
+# Cada columna es un arreglo contiguo y el orden de las filas es estable, así
+# que un scrapeo que solo cambia disponibilidades modifica unos cuantos bytes.
+# Entre versiones consecutivas se guarda un parche binario ("MHD1"): la versión
+# base y la nueva (8 bytes cada una) y operaciones con varints sin signo,
+# 0 = copiar (posición, largo) de la base, 1 = insertar (largo, bytes). También
+# se comprime con zlib.
+
+PARCHES_CONSERVADOS = 30
+MAX_PAQUETES = 64  # (ciclo, centro) en memoria; se expulsa el menos usado
+_BLOQUE = 32  # Bytes mínimos de una coincidencia en el parche
+_EPOCA = datetime.date(1970, 1, 1)
+
+Clave = tuple[int, int]  # (id_ciclo, id_centro)
+
+
+def _minutos(hora: datetime.time) -> int:
+    return hora.hour * 60 + hora.minute
+
+
+def _arreglo(formato: str, valores: list[int]) -> bytes:
+    return struct.pack(f"<{len(valores)}{formato}", *valores)
+
+
+def construir_contenido(session: Session, id_ciclo: int, id_centro: int) -> bytes:
+    """
+    Contenido sin comprimir del paquete. Mismos datos, mismos bytes.
+    """
+    secciones = session.exec(
+        select(Seccion.id, Seccion.nrc, Seccion.numero, Materia.clave, Materia.nombre,
+               Materia.creditos, Profesor.nombre, Seccion.cupos, Seccion.disponibilidad)
+        .join(Materia, Seccion.id_materia == Materia.id)  # type: ignore
+        .join(Profesor, Seccion.id_profesor == Profesor.id)  # type: ignore
+        .where(Seccion.id_ciclo == id_ciclo, Seccion.id_centro == id_centro)
+        .order_by(Materia.clave, Seccion.nrc)
+    ).all()
+    sesiones: dict[int, list[tuple]] = {s[0]: [] for s in secciones}
+    for id_seccion, *sesion in session.exec(
+        select(Sesion.id_seccion, Sesion.dias, Sesion.hora_inicio, Sesion.hora_fin,
+               Sesion.fecha_inicio, Sesion.fecha_fin, Aula.edificio, Aula.salon)
+        .join(Seccion, Sesion.id_seccion == Seccion.id)  # type: ignore
+        .join(Aula, Sesion.id_aula == Aula.id)  # type: ignore
+        .where(Seccion.id_ciclo == id_ciclo, Seccion.id_centro == id_centro)
+        .order_by(Sesion.id_seccion, Sesion.id)  # type: ignore
+    ).all():
+        sesiones[id_seccion].append(tuple(sesion))
+
+    materias = sorted({(clave, nombre, creditos) for _, _, _, clave, nombre, creditos, _, _, _ in secciones})
+    posicion_materia = {clave: i for i, (clave, _, _) in enumerate(materias)}
+    cadenas = sorted(
+        {c for clave, nombre, _ in materias for c in (clave, nombre)}
+        | {c for _, nrc, numero, _, _, _, profesor, _, _ in secciones for c in (nrc, numero, profesor)}
+        | {c for lista in sesiones.values() for *_, edificio, salon in lista for c in (edificio, salon)}
+    )
+    indice = {cadena: i for i, cadena in enumerate(cadenas)}
+
+    codificadas = [c.encode() for c in cadenas]
+    fines, fin = [], 0
+    for c in codificadas:
+        fin += len(c)
+        fines.append(fin)
+
+    primeras, total = [], 0
+    columnas_sesion: list[list[int]] = [[] for _ in range(7)]
+    for id_seccion, *_ in secciones:
+        primeras.append(total)
+        for dias, inicio, fin_sesion, fecha_inicio, fecha_fin, edificio, salon in sesiones[id_seccion]:
+            for columna, valor in zip(columnas_sesion, (
+                    dias, _minutos(inicio), _minutos(fin_sesion),
+                    (fecha_inicio - _EPOCA).days, (fecha_fin - _EPOCA).days,
+                    indice[edificio], indice[salon])):
+                columna.append(valor)
+            total += 1
+    primeras.append(total)
+
+    partes = [
+        b"MHP1", struct.pack("<4I", len(cadenas), len(materias), len(secciones), total),
+        _arreglo("I", fines), b"".join(codificadas),
+        _arreglo("I", [indice[clave] for clave, _, _ in materias]),
+        _arreglo("I", [indice[nombre] for _, nombre, _ in materias]),
+        _arreglo("H", [creditos for _, _, creditos in materias]),
+        _arreglo("I", [indice[s[1]] for s in secciones]),
+        _arreglo("I", [indice[s[2]] for s in secciones]),
+        _arreglo("I", [posicion_materia[s[3]] for s in secciones]),
+        _arreglo("I", [indice[s[6]] for s in secciones]),
+        _arreglo("H", [s[7] for s in secciones]),
+        _arreglo("h", [s[8] for s in secciones]),
+        _arreglo("I", primeras),
+    ]
+    for formato, columna in zip("BHHHHII", columnas_sesion):
+        partes.append(_arreglo(formato, columna))
+    return b"".join(partes)
+
+
+def version_de(contenido: bytes) -> str:
+    return hashlib.sha256(contenido).hexdigest()[:16]
+
+
+# --- Parches ---
+
+def _escribir_varint(salida: bytearray, valor: int):
+    while valor > 0x7F:
+        salida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+
+def _leer_varint(datos: bytes, posicion: int) -> tuple[int, int]:
+    valor = desplazamiento = 0
+    while True:
+        byte = datos[posicion]
+        posicion += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, posicion
+        desplazamiento += 7
+
+
+def _largo_comun(a: bytes, i: int, b: bytes, j: int) -> int:
+    # Comparar por trozos decrecientes en lugar de byte por byte
+    largo = 0
+    for paso in (4096, 256, 16, 1):
+        while True:
+            trozo = a[i + largo:i + largo + paso]
+            if len(trozo) < paso or trozo != b[j + largo:j + largo + paso]:
+                break
+            largo += paso
+    return largo
+
+
+def crear_parche(base: bytes, nuevo: bytes) -> bytes:
+    """
+    Parche que convierte 'base' en 'nuevo'. Las coincidencias se buscan con
+    bloques alineados de la base; un cambio pequeño cuesta unas cuantas operaciones.
+    """
+    bloques: dict[bytes, int] = {}
+    for j in range(0, len(base) - _BLOQUE + 1, _BLOQUE):
+        bloques.setdefault(base[j:j + _BLOQUE], j)
+
+    operaciones = bytearray()
+
+    def insertar(inicio: int, fin: int):
+        if fin > inicio:
+            operaciones.append(1)
+            _escribir_varint(operaciones, fin - inicio)
+            operaciones.extend(nuevo[inicio:fin])
+
+    pendiente = i = 0  # Bytes de 'nuevo' desde 'pendiente' aún sin cubrir
+    while i + _BLOQUE <= len(nuevo):
+        j = bloques.get(nuevo[i:i + _BLOQUE])
+        if j is None:
+            i += 1
+            continue
+        while i > pendiente and j > 0 and nuevo[i - 1] == base[j - 1]:
+            i -= 1
+            j -= 1
+        largo = _largo_comun(nuevo, i, base, j)
+        insertar(pendiente, i)
+        operaciones.append(0)
+        _escribir_varint(operaciones, j)
+        _escribir_varint(operaciones, largo)
+        i += largo
+        pendiente = i
+    insertar(pendiente, len(nuevo))
+
+    encabezado = b"MHD1" + bytes.fromhex(version_de(base)) + bytes.fromhex(version_de(nuevo))
+    return zlib.compress(encabezado + bytes(operaciones), 9)
+
+
+def aplicar_parche(base: bytes, parche: bytes) -> bytes:
+    """
+    Lo que hace el cliente: aplica un parche sobre el contenido sin comprimir.
+    """
+    datos = zlib.decompress(parche)
+    if datos[:4] != b"MHD1" or datos[4:12].hex() != version_de(base):
+        raise ValueError("El parche no corresponde a esta versión")
+    resultado = bytearray()
+    posicion = 20
+    while posicion < len(datos):
+        operacion = datos[posicion]
+        if operacion == 0:
+            inicio, posicion = _leer_varint(datos, posicion + 1)
+            largo, posicion = _leer_varint(datos, posicion)
+            resultado.extend(base[inicio:inicio + largo])
+        else:
+            largo, posicion = _leer_varint(datos, posicion + 1)
+            resultado.extend(datos[posicion:posicion + largo])
+            posicion += largo
+    if version_de(bytes(resultado)) != datos[12:20].hex():
+        raise ValueError("El parche no produjo la versión esperada")
+    return bytes(resultado)
+
+
+# --- Versiones en memoria ---
+
+class Parche(NamedTuple):
+    desde: str
+    hasta: str
+    datos: bytes
+
+
+class Paquete(NamedTuple):
+    generacion: int
+    version: str
+    contenido: bytes  # Sin comprimir, base del siguiente parche
+    comprimido: bytes
+    parches: list[Parche]  # Del más viejo al más nuevo; el último termina en 'version'
+
+    def parches_desde(self, version: str) -> list[Parche] | None:
+        """
+        Parches para pasar de 'version' a la actual, o None si ya no se conservan.
+        """
+        for i, parche in enumerate(self.parches):
+            if parche.desde == version:
+                return self.parches[i:]
+        return None
+
+
+_paquetes: OrderedDict[Clave, Paquete] = OrderedDict()
+_lock_paquetes = threading.Lock()  # Protege '_paquetes'
+_lock = threading.Lock()  # Serializa las construcciones
+
+
+def _obtener(clave: Clave) -> Paquete | None:
+    with _lock_paquetes:
+        paquete = _paquetes.get(clave)
+        if paquete is not None:
+            _paquetes.move_to_end(clave)
+        return paquete
+
+
+def _guardar(clave: Clave, paquete: Paquete):
+    with _lock_paquetes:
+        _paquetes[clave] = paquete
+        _paquetes.move_to_end(clave)
+        while len(_paquetes) > MAX_PAQUETES:
+            _paquetes.popitem(last=False)
+
+
+def _nueva_version(clave: Clave, generacion: int, contenido: bytes) -> Paquete:
+    anterior = _obtener(clave)
+    version = version_de(contenido)
+    if anterior is not None and (anterior.generacion >= generacion or anterior.version == version):
+        if anterior.generacion < generacion:
+            anterior = anterior._replace(generacion=generacion)
+            _guardar(clave, anterior)
+        return anterior
+
+    comprimido = zlib.compress(contenido, 9)
+    parches: list[Parche] = []
+    if anterior is not None:
+        parches = anterior.parches + [Parche(anterior.version, version, crear_parche(anterior.contenido, contenido))]
+        # Más parches que el paquete completo no ahorran nada
+        while len(parches) > PARCHES_CONSERVADOS or sum(len(p.datos) for p in parches) > len(comprimido):
+            parches.pop(0)
+    paquete = Paquete(generacion, version, contenido, comprimido, parches)
+    _guardar(clave, paquete)
+    return paquete
+
+
+def paquete_para(id_ciclo: int, id_centro: int) -> Paquete:
+    """
+    Paquete vigente del (ciclo, centro). El primero se construye al pedirse;
+    desde entonces se regenera con cada snapshot.
+    """
+    clave = (id_ciclo, id_centro)
+    paquete = _obtener(clave)
+    if paquete is not None:
+        return paquete
+    with _lock:
+        paquete = _obtener(clave)
+        if paquete is None:
+            # Generación y engine del mismo catálogo; una publicación posterior
+            # espera este lock para regenerarlo
+            catalogo = database.catalogo_activo
+            engine = engine_para_ciclo(id_ciclo) if esta_archivado(id_ciclo) else catalogo.engine
+            with Session(engine) as session:
+                contenido = construir_contenido(session, id_ciclo, id_centro)
+            paquete = _nueva_version(clave, catalogo.generacion, contenido)
+    return paquete
+
+
+@al_publicar
+def _regenerar_paquetes(catalogo: Catalogo):
+    with _lock:
+        with _lock_paquetes:
+            claves = [clave for clave in _paquetes if not esta_archivado(clave[0])]
+        if not claves:
+            return
+        cambiados = 0
+        with Session(catalogo.engine) as session:
+            for id_ciclo, id_centro in claves:
+                anterior = _obtener((id_ciclo, id_centro))
+                contenido = construir_contenido(session, id_ciclo, id_centro)
+                if _nueva_version((id_ciclo, id_centro), catalogo.generacion, contenido).version != anterior.version:
+                    cambiados += 1
+    print(f"[PAQUETES] {len(claves)} paquetes regenerados, {cambiados} con cambios.")
@@ -4,3 +4,16 @@ from routes.centros import *
 from routes.carreras import *
 from routes.resenas import *
 from routes.profesores import *
+from routes.snapshot import *
+from routes.historial import *
+from routes.busqueda import *
+from routes.autocompletar import *
+from routes.horarios import *
+from routes.aulas import *
+from routes.franjas import *
+from routes.cambios import *
+from routes.tiempo_real import *
+from routes.alertas import *
+from routes.exportar import *
+from routes.paquetes import *
+from routes.metricas import *
@@ -0,0 +1,109 @@
+from lifespan import app
+from models import *
+from database import SessionDep, SessionCatalogoDep
+from dependencies import *
+from fastapi import Query, Request
+from fastapi.responses import HTMLResponse
+import random
+from email_service import enviar_codigo_alerta
+
+
+def _pagina(titulo: str, mensaje: str, color: str) -> HTMLResponse:
+    return HTMLResponse(f"""
+        <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; text-align: center;">
+                <h2 style="color: {color};">{titulo}</h2>
+                <p>{mensaje}</p>
+            </body>
+        </html>
+        """)
+
+
+@app.post("/alertas/solicitar", response_model=AlertaCupoResponse)
+async def solicitar_alerta(
+    datos: AlertaCupoCreate,
+    session: SessionDep,
+    catalogo: SessionCatalogoDep,
+    request: Request
+):
+    """
+    Registra una alerta de cupo para una sección y envía el código de verificación.
+    La alerta solo se evalúa después de verificarla.
+    """
+    id_alumno = validar_alumno(session, datos.correo_alumno)
+    id_ciclo = validar_ciclo(datos.ciclo)
+
+    seccion = catalogo.exec(
+        select(Seccion.id).where(Seccion.id_ciclo == id_ciclo, Seccion.nrc == datos.nrc)
+    ).first()
+    if seccion is None:
+        raise HTTPException(status_code=404, detail="Sección no encontrada")
+
+    while True:
+        codigo = str(random.randint(0, 999999)).zfill(6)
+        if not session.exec(select(AlertaCupo.id).where(AlertaCupo.codigo == codigo)).first():
+            break
+
+    alerta = session.exec(
+        select(AlertaCupo).where(
+            AlertaCupo.id_alumno == id_alumno,
+            AlertaCupo.id_ciclo == id_ciclo,
+            AlertaCupo.nrc == datos.nrc
+        )
+    ).first()
+    if alerta is not None and alerta.verificada:
+        return AlertaCupoResponse(mensaje="Ya tienes una alerta activa para esta sección.")
+    if alerta is None:
+        alerta = AlertaCupo(id_alumno=id_alumno, id_ciclo=id_ciclo, nrc=datos.nrc)
+    alerta.codigo = codigo
+    session.add(alerta)
+    session.commit()
+
+    try:
+        # TAG: Ajustar URL base para producción
+        base_url = "http://localhost:8080/api" or str(
+            request.base_url).rstrip('/')+"/api"
+        await enviar_codigo_alerta(datos.correo_alumno, codigo, datos.nrc, base_url)
+    except Exception as e:
+        return AlertaCupoResponse(
+            mensaje="Alerta guardada, pero hubo un error al enviar el correo de verificación",
+            advertencia=f"Error: {str(e)}"
+        )
+    return AlertaCupoResponse(
+        mensaje=f"Revisa tu correo ({datos.correo_alumno}) para activar la alerta."
+    )
+
+
+@app.get("/alertas/verificar/{codigo}", response_model=AlertaCupoResponse)
+async def verificar_alerta(
+    codigo: str,
+    session: SessionDep,
+    catalogo: SessionCatalogoDep,
+    json: bool = Query(False)
+):
+    alerta = session.exec(select(AlertaCupo).where(AlertaCupo.codigo == codigo)).first()
+    if alerta is None:
+        if json:
+            raise HTTPException(
+                status_code=404,
+                detail="El enlace de verificación no es válido o ya fue utilizado."
+            )
+        return _pagina("Codigo inválido", "El enlace de verificación no es válido o ya fue utilizado.", "#dc2626")
+
+    # Si la sección ya tiene lugares no se avisa hasta que se llene y se vuelva a abrir
+    disponibilidad = catalogo.exec(
+        select(Seccion.disponibilidad).where(Seccion.id_ciclo == alerta.id_ciclo, Seccion.nrc == alerta.nrc)
+    ).first()
+    alerta.avisada = bool(disponibilidad and disponibilidad > 0)
+    alerta.verificada = True
+    alerta.codigo = None
+    session.add(alerta)
+    session.commit()
+
+    advertencia = "La sección ya tiene lugares disponibles." if alerta.avisada else None
+    if json:
+        return AlertaCupoResponse(mensaje="Alerta activada", advertencia=advertencia)
+    return _pagina(
+        "Alerta activada.",
+        "Te enviaremos un correo cuando se abra un lugar en la sección. " + (advertencia or ""),
+        "#16a34a")
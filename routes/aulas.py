@@ -0,0 +1,47 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from ocupacion import ocupacion_para
+
+@app.get("/aulas/{edificio}/{ciclo}/libres", response_model=list[str])
+def read_aulas_libres(
+        edificio: str,
+        ciclo: CicloDep,
+        dia: Annotated[int, Query(ge=1, le=7)],
+        hora_inicio: datetime.time,
+        hora_fin: datetime.time,
+        fecha: datetime.date | None = None):
+    """
+    Salones del edificio sin clases el día 'dia' (1 = lunes) entre hora_inicio
+    y hora_fin. Con 'fecha' solo cuentan las sesiones vigentes en esa fecha.
+    """
+    if hora_fin <= hora_inicio:
+        raise HTTPException(status_code=400, detail="hora_fin debe ser posterior a hora_inicio")
+    ocupacion = ocupacion_para(ciclo)
+    if edificio not in ocupacion.edificios:
+        raise HTTPException(status_code=404, detail="Edificio no encontrado")
+    return ocupacion.aulas_libres(
+        edificio, dia,
+        hora_inicio.hour * 60 + hora_inicio.minute,
+        hora_fin.hour * 60 + hora_fin.minute,
+        fecha)
+
+
+@app.get("/aula/{edificio}/{salon}/{ciclo}/ocupacion", response_model=list[OcupacionAulaPublic])
+def read_ocupacion_aula(edificio: str, salon: str, ciclo: CicloDep):
+    ocupacion = ocupacion_para(ciclo)
+    if salon not in ocupacion.edificios.get(edificio, {}):
+        raise HTTPException(status_code=404, detail="Aula no encontrada")
+    return [
+        OcupacionAulaPublic(
+            dia_semana=dia,
+            hora_inicio=datetime.time(o.inicio // 60, o.inicio % 60),
+            hora_fin=datetime.time(o.fin // 60, o.fin % 60),
+            fecha_inicio=o.fecha_inicio,
+            fecha_fin=o.fecha_fin,
+            nrc=o.nrc,
+            materia=o.materia
+        )
+        for dia, o in ocupacion.ocupacion_de(edificio, salon)
+    ]
@@ -0,0 +1,18 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from autocompletar import sugerir
+
+@app.get("/autocompletar", response_model=list[Sugerencia])
+def read_autocompletar(
+        q: Annotated[str, Query(min_length=1, max_length=100)],
+        ciclo: CicloOptDep = None,
+        centro: CentroOptDep = None,
+        limit: Annotated[int, Query(ge=1, le=50)] = 10):
+    """
+    Sugerencias por prefijo de materias (clave o nombre), profesores y centros
+    (nombre o alias), sin distinguir mayúsculas ni acentos. Se responde desde
+    memoria, sin consultar la base de datos.
+    """
+    return sugerir(q, limit, ciclo, centro)
@@ -0,0 +1,27 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query, Request
+from typing import Literal
+from busqueda import buscar
+from cache import cache_respuestas, generacion_de
+
+@app.get("/buscar", response_model=list[ResultadoBusqueda])
+def read_busqueda(
+        request: Request,
+        session: SessionCatalogoDep,
+        q: Annotated[str, Query(min_length=1, max_length=100)],
+        tipo: Literal["materia", "profesor", "carrera"] | None = None,
+        limit: Annotated[int, Query(ge=1, le=50)] = 20):
+    """
+    Búsqueda de texto completo en materias (clave y nombre), profesores y
+    carreras, sin distinguir mayúsculas ni acentos. Las palabras se buscan como prefijo.
+    """
+    def construir():
+        resultados = buscar(session, q, tipo, limit)
+        if resultados is None:
+            raise HTTPException(status_code=503, detail="El índice de búsqueda aún no está disponible")
+        return resultados
+    return cache_respuestas.responder(
+        request, generacion_de(session), ("buscar", q.casefold(), tipo, limit),
+        list[ResultadoBusqueda], construir)
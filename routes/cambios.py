@@ -0,0 +1,32 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query, Request
+from cambios import SnapshotRequerido, cambios_desde
+from cache import cache_respuestas, generacion_de
+from archivo import engine_para_ciclo, esta_archivado
+
+@app.get("/cambios", response_model=CambiosPublic)
+def read_cambios(
+        request: Request,
+        session: SessionCatalogoDep,
+        ciclo: CicloDep,
+        desde: Annotated[int, Query(ge=0)]):
+    """
+    Cambios en las secciones del ciclo y en las materias desde la generación
+    'desde' (la 'generacion' de la respuesta anterior o de /snapshot). Si el
+    registro ya no llega tan atrás responde 410 y hay que descargar todo de nuevo.
+    Las secciones de un ciclo archivado se leen de su partición.
+    """
+    def construir():
+        try:
+            if esta_archivado(ciclo):
+                with Session(engine_para_ciclo(ciclo)) as particion:
+                    return cambios_desde(session, desde, ciclo, particion)
+            return cambios_desde(session, desde, ciclo)
+        except SnapshotRequerido:
+            raise HTTPException(
+                status_code=410,
+                detail="La generación solicitada ya no está en el registro de cambios. Descarga el catálogo completo.")
+    return cache_respuestas.responder(
+        request, generacion_de(session), ("cambios", ciclo, desde), CambiosPublic, construir)
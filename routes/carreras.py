@@ -1,32 +1,14 @@
 from lifespan import app
-from models import Carrera
 from dependencies import *
-from database import SessionDep
-from sqlmodel import select, and_
+from cache import cache_respuestas
+from fastapi import Request
+import matriz_oferta
 
 @app.get("/carreras/", response_model=list[CarreraPublic])
-def read_carreras(session: SessionDep, ciclo: CicloOptDep = None, centro: CentroOptDep = None):
-    on_clause = and_(
-            Seccion.id_materia == CarreraMateriaLink.id_materia,
-        )
-    if ciclo is not None:
-        on_clause = and_(on_clause,
-            Seccion.id_ciclo == ciclo
-        )
-    if centro is not None:
-        on_clause = and_(on_clause,
-            Seccion.id_centro == centro
-        )
-        
-    statement = (
-        select(Carrera)
-        .select_from(Carrera)
-        .join(CentroCarreraLink, CentroCarreraLink.id_carrera == Carrera.id) # type: ignore
-        .join(CarreraMateriaLink, CarreraMateriaLink.id_carrera == Carrera.id) # type: ignore
-        .join(Seccion, on_clause)
-        .distinct()
-    )
-    if centro is not None:
-        statement = statement.where(CentroCarreraLink.id_centro == centro)
-    return session.exec(statement).all()
+def read_carreras(request: Request, ciclo: CicloOptDep = None, centro: CentroOptDep = None):
+    matriz = matriz_oferta.matriz_para(ciclo)
 
+    def construir():
+        return [matriz.carreras[id_carrera] for id_carrera in matriz.carreras_de(ciclo, centro)]
+    return cache_respuestas.responder(
+        request, matriz_oferta.generacion(), ("carreras", ciclo, centro), list[CarreraPublic], construir)
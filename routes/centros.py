@@ -1,10 +1,13 @@
 from lifespan import app, centro_a_alias
 from models import Centro
-from database import SessionDep
+from database import SessionCatalogoDep
+from cache import cache_respuestas, generacion_de
+from fastapi import Request
 from sqlmodel import select
 
 @app.get("/centros/", response_model=list[str])
-def read_centros(session: SessionDep):
-    centros = session.exec(select(Centro.nombre)).all()
-    return sorted([centro_a_alias.get(centro, centro) for centro in centros])
-
+def read_centros(request: Request, session: SessionCatalogoDep):
+    def construir():
+        centros = session.exec(select(Centro.nombre)).all()
+        return sorted([centro_a_alias.get(centro, centro) for centro in centros])
+    return cache_respuestas.responder(request, generacion_de(session), ("centros",), list[str], construir)
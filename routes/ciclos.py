@@ -1,10 +1,13 @@
 from lifespan import app
 from models import Ciclo
-from database import SessionDep
+from database import SessionCatalogoDep
+from cache import cache_respuestas, generacion_de
+from fastapi import Request
 from sqlmodel import select
 
 @app.get("/ciclos/", response_model=list[str])
-def read_ciclos(session: SessionDep):
-    ciclos = session.exec(select(Ciclo.nombre)).all()
-    return sorted(ciclos, reverse=True)
-
+def read_ciclos(request: Request, session: SessionCatalogoDep):
+    def construir():
+        ciclos = session.exec(select(Ciclo.nombre)).all()
+        return sorted(ciclos, reverse=True)
+    return cache_respuestas.responder(request, generacion_de(session), ("ciclos",), list[str], construir)
@@ -0,0 +1,37 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from metricas import continua
+from typing import Literal
+from archivo import engine_para_ciclo
+from cache import elegir_codificacion
+from exportar import a_csv, a_ndjson, comprimir_gzip, secciones_exportadas
+
+_TIPOS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@app.get("/export/{ciclo}")
+@continua
+def exportar_ciclo(
+        request: Request,
+        ciclo: str,
+        centro: CentroOptDep = None,
+        formato: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Todas las secciones del ciclo con sus sesiones, profesor, centro y carreras,
+    como NDJSON (una sección por línea) o CSV (una fila por sesión). La respuesta
+    se transmite conforme se lee; se comprime con gzip si el cliente lo acepta.
+    """
+    id_ciclo = validar_ciclo(ciclo)
+    secciones = secciones_exportadas(engine_para_ciclo(id_ciclo), id_ciclo, ciclo, centro)
+    cuerpo = a_csv(secciones) if formato == "csv" else a_ndjson(secciones)
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="oferta-{ciclo}.{formato}"',
+        "Vary": "Accept-Encoding",
+    }
+    if elegir_codificacion(request.headers.get("accept-encoding"), {"gzip": b""}):
+        cuerpo = comprimir_gzip(cuerpo)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(cuerpo, media_type=_TIPOS[formato], headers=headers)
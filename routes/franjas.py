@@ -0,0 +1,29 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from franjas import franjas_de, secciones_en_franja
+import matriz_oferta
+
+@app.get("/secciones/{centro}/{ciclo}/franja", response_model=list[SeccionMateriaPublic])
+def read_secciones_en_franja(
+        centro: CentroDep,
+        ciclo: CicloDep,
+        carrera: CarreraOptDep = None,
+        dia: Annotated[int | None, Query(ge=1, le=7)] = None,
+        hora_inicio: datetime.time | None = None,
+        hora_fin: datetime.time | None = None,
+        disponibilidad_minima: Annotated[int, Query(ge=0)] = 0):
+    """
+    Secciones de cualquier materia (de la carrera, si se indica) con clase el
+    día 'dia' (1 = lunes) dentro del rango de horas. Se responde desde el índice
+    de franjas en memoria.
+    """
+    if hora_inicio and hora_fin and hora_fin <= hora_inicio:
+        raise HTTPException(status_code=400, detail="hora_fin debe ser posterior a hora_inicio")
+    materias = None
+    if carrera is not None:
+        materias = matriz_oferta.matriz_para(ciclo).carrera_materias.get(carrera, frozenset())
+    entradas = secciones_en_franja(
+        franjas_de(ciclo, centro), materias, dia, hora_inicio, hora_fin, disponibilidad_minima)
+    return [SeccionMateriaPublic(materia=e.materia, **e.publica.model_dump()) for e in entradas]
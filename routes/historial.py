@@ -0,0 +1,34 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from historial import leer_historial
+
+@app.get("/seccion/{nrc}/{ciclo}/historial", response_model=list[PuntoDisponibilidad])
+def read_historial_disponibilidad(
+        session: SessionDep,
+        nrc: str,
+        ciclo: CicloDep,
+        desde: datetime.datetime | None = None,
+        hasta: datetime.datetime | None = None,
+        resolucion: Annotated[int | None, Query(ge=60)] = None):
+    """
+    Historial de disponibilidad de una sección. Solo hay un punto cuando el valor
+    cambia, así que cada punto vale hasta el siguiente. 'resolucion' (segundos)
+    agrupa los cambios en intervalos del servidor.
+    """
+    puntos = leer_historial(
+        session, nrc, ciclo,
+        desde=int(desde.timestamp()) if desde else None,
+        hasta=int(hasta.timestamp()) if hasta else None,
+        resolucion=resolucion
+    )
+    return [
+        PuntoDisponibilidad(
+            fecha=datetime.datetime.fromtimestamp(ts, datetime.timezone.utc),
+            disponibilidad=disponibilidad,
+            cupos=cupos,
+            disponibilidad_minima=minima
+        )
+        for ts, disponibilidad, cupos, minima in puntos
+    ]
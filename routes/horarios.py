@@ -0,0 +1,50 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from horarios import BusquedaHorarios, cargar_opciones, horarios_encontrados, mascara_prohibida
+
+MAX_MATERIAS_HORARIO = 20
+
+
+@app.get("/horarios/generar")
+def generar_horarios(
+        session: SessionCicloDep,
+        centro: CentroDep,
+        ciclo: CicloDep,
+        materias: Annotated[list[str], Query(min_length=1, max_length=MAX_MATERIAS_HORARIO)],
+        hora_inicio: datetime.time | None = None,
+        hora_fin: datetime.time | None = None,
+        dias_libres: Annotated[list[int] | None, Query(description="Días sin clases (1 = lunes ... 7 = domingo)")] = None,
+        disponibilidad_minima: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=500)] = 50):
+    """
+    Horarios sin traslapes con una sección de cada materia; mejor es menos
+    días con clase, luego menos minutos libres entre clases.
+
+    Se envían como NDJSON. Mientras dura la búsqueda, cada horario que mejora a
+    todos los anteriores, con "provisional": true. Al terminar, los 'limit'
+    mejores del mejor al peor con "provisional": false (HorarioGenerado); los
+    provisionales pueden repetirse ahí. La última línea es {"completa": ...}
+    (FinBusquedaHorarios); false si la búsqueda se cortó por tiempo y los
+    resultados son los mejores encontrados.
+    """
+    dias_libres = dias_libres or []
+    if hora_inicio and hora_fin and hora_fin <= hora_inicio:
+        raise HTTPException(status_code=400, detail="hora_fin debe ser posterior a hora_inicio")
+    if any(dia < 1 or dia > 7 for dia in dias_libres):
+        raise HTTPException(status_code=400, detail="Los días libres van de 1 (lunes) a 7 (domingo)")
+
+    ids = {clave: validar_materia(clave) for clave in dict.fromkeys(materias)}
+    opciones = cargar_opciones(
+        session, ids, ciclo, centro,
+        mascara_prohibida(hora_inicio, hora_fin, dias_libres),
+        disponibilidad_minima)
+    busqueda = BusquedaHorarios(opciones, limit)
+
+    def lineas():
+        for horario in horarios_encontrados(busqueda):
+            yield horario.model_dump_json() + "\n"
+        yield FinBusquedaHorarios(completa=busqueda.completa).model_dump_json() + "\n"
+    return StreamingResponse(lineas(), media_type="application/x-ndjson")
@@ -1,68 +1,95 @@
 from models import *
 from dependencies import *
 from lifespan import app
-from fastapi import Query
-from sqlmodel import and_
+from fastapi import Query, Request
+from consultas import secciones_publicas, secciones_por_materia
+from cache import cache_respuestas, generacion_de
+import matriz_oferta
+from bisect import bisect_right
+from paginacion import decodificar_cursor, poner_cursor
+from calificaciones import resumen
 @app.get("/materias/", response_model=list[MateriaPublic])
 def read_materias(
-        session: SessionDep,
+        request: Request,
         ciclo: CicloOptDep = None,
         carrera: CarreraOptDep = None,
         centro: CentroOptDep = None,
+        cursor: str | None = None,
         offset: int = 0,
         limit: Annotated[int, Query(le=1000)] = 1000):
+    matriz = matriz_oferta.matriz_para(ciclo)
+    ultimo = decodificar_cursor(cursor, offset)
 
-    stmt = select(Materia)
-    if ciclo or centro:
-        stmt = stmt.join(Seccion)
-    if ciclo is not None:
-        stmt = stmt.where(
-        Seccion.id_ciclo == ciclo
-    )
+    todos = matriz.materias_de(ciclo, centro, carrera)
+    # Los ids están ordenados: el cursor se resuelve con una búsqueda binaria.
+    # offset/limit negativos se comportan igual que en SQLite
+    inicio = max(offset, 0) + (bisect_right(todos, ultimo) if ultimo is not None else 0)
+    fin = inicio + limit if limit >= 0 else None
+    ids = todos[inicio:fin]
 
-    if carrera is not None:
-        stmt = stmt.join(CarreraMateriaLink,
-                         and_(CarreraMateriaLink.id_carrera == carrera,
-                              CarreraMateriaLink.id_materia == Materia.id))
+    respuesta = cache_respuestas.responder(
+        request, matriz_oferta.generacion(), ("materias", ciclo, carrera, centro, ultimo, offset, limit),
+        list[MateriaPublic], lambda: [matriz.materias[id_materia] for id_materia in ids])
+    poner_cursor(respuesta, ids, limit)
+    return respuesta
 
-    if centro is not None:
-        stmt = stmt.where(Seccion.id_centro == centro)
+@app.get("/materia/{centro}/{materia}/{ciclo}/secciones", response_model=list[SeccionPublic])
+def read_secciones_de_materia(request: Request, session: SessionCicloDep, centro: CentroDep, materia: MateriaDep, ciclo: CicloDep):
+    return cache_respuestas.responder(
+        request, generacion_de(session), ("secciones", centro, materia, ciclo), list[SeccionPublic],
+        lambda: secciones_publicas(
+            session,
+            Seccion.id_materia == materia,
+            Seccion.id_ciclo == ciclo,
+            Seccion.id_centro == centro))
 
-    materias = session.exec(stmt.distinct().offset(offset).limit(limit)).all()
-    return materias
 
-@app.get("/materia/{centro}/{materia}/{ciclo}/secciones", response_model=list[SeccionPublic])
-def read_secciones_de_materia(session: SessionDep, centro: CentroDep, materia: MateriaDep, ciclo: CicloDep):
-    secciones = session.exec(select(Seccion).where(
-        Seccion.id_materia == materia,
-        Seccion.id_ciclo == ciclo,
-        Seccion.id_centro == centro)).all()
-    secciones_public: list[SeccionPublic] = []
-    for s in secciones or []:
-        sesiones_public: list[SesionPublic] = []
-        for ses in s.sesiones or []:
-            sesiones_public.append(SesionPublic(
-                salon=ses.aula.salon,
-                edificio=ses.aula.edificio,
-                fecha_inicio=ses.fecha_inicio,
-                fecha_fin=ses.fecha_fin,
-                hora_inicio=ses.hora_inicio,
-                hora_fin=ses.hora_fin,
-                dia_semana=ses.dia_semana
-            ))
+MAX_MATERIAS_LOTE = 30
+
 
-        secciones_public.append(SeccionPublic(
-            numero=s.numero,
-            nrc=s.nrc,
-            profesor=s.profesor.nombre,
-            centro=s.centro.nombre,
-            sesiones=sesiones_public,
-            cupos=s.cupos,
-            disponibilidad=s.disponibilidad
-        ))
-    return secciones_public
+@app.get("/secciones/{centro}/{ciclo}", response_model=dict[str, list[SeccionPublic]])
+def read_secciones_de_materias(
+        request: Request,
+        session: SessionCicloDep,
+        centro: CentroDep,
+        ciclo: CicloDep,
+        materias: Annotated[list[str], Query(min_length=1, max_length=MAX_MATERIAS_LOTE)]):
+    """
+    Secciones de varias materias en una sola petición, agrupadas por clave
+    (?materias=I5000&materias=I5001). Equivale a llamar a
+    /materia/{centro}/{materia}/{ciclo}/secciones por cada materia.
+    """
+    claves = list(dict.fromkeys(materias))
+    ids = {clave: validar_materia(clave) for clave in claves}
+
+    def construir():
+        agrupadas = secciones_por_materia(
+            session, list(ids.values()),
+            Seccion.id_ciclo == ciclo,
+            Seccion.id_centro == centro)
+        return {clave: agrupadas[id_materia] for clave, id_materia in ids.items()}
+    return cache_respuestas.responder(
+        request, generacion_de(session), ("secciones_lote", centro, ciclo, tuple(claves)),
+        dict[str, list[SeccionPublic]], construir)
 
 
 @app.get("/materia/{materia}", response_model=MateriaPublic)
-def read_materia(session: SessionDep, materia: MateriaDep):
+def read_materia(session: SessionCatalogoDep, materia: MateriaDep):
     return session.get(Materia, materia)
+
+
+@app.get("/materia/{materia}/calificaciones", response_model=list[CalificacionEnMateriaPublic])
+def read_calificaciones_materia(session: SessionDep, materia: MateriaDep):
+    """
+    Resumen de las reseñas de la materia por profesor, ordenado por nombre.
+    """
+    filas = session.exec(
+        select(Profesor.nombre, CalificacionProfesorMateria)
+        .join(Profesor, CalificacionProfesorMateria.id_profesor == Profesor.id)  # type: ignore
+        .where(CalificacionProfesorMateria.id_materia == materia, CalificacionProfesorMateria.total > 0)
+        .order_by(Profesor.nombre)
+    ).all()
+    return [
+        CalificacionEnMateriaPublic(profesor=nombre, calificacion=resumen(agregado))
+        for nombre, agregado in filas
+    ]
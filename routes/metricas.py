@@ -0,0 +1,10 @@
+from lifespan import app
+from fastapi.responses import PlainTextResponse
+from metricas import exponer
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metricas():
+    """
+    Métricas de las peticiones y del scraper en el formato de texto de Prometheus.
+    """
+    return PlainTextResponse(exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
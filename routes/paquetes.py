@@ -0,0 +1,38 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Request, Response
+import struct
+from cache import CACHE_CONTROL, coincide_etag
+from paquetes import paquete_para
+
+@app.get("/paquete/{centro}/{ciclo}")
+def read_paquete(request: Request, centro: CentroDep, ciclo: CicloDep):
+    """
+    Paquete binario (zlib) con las materias, secciones y sesiones del ciclo en
+    el centro, para usarse sin conexión. El formato está descrito en paquetes.py.
+    """
+    paquete = paquete_para(ciclo, centro)
+    etag = f'"{paquete.version}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Version-Paquete": paquete.version}
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=paquete.comprimido, media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/paquete/{centro}/{ciclo}/parches")
+def read_parches_paquete(centro: CentroDep, ciclo: CicloDep, desde: str):
+    """
+    Parches para actualizar un paquete de la versión 'desde' a la actual, en
+    orden: cada uno va precedido de su largo (u32 little-endian). 204 si ya está
+    al día; 410 si esa versión ya no se conserva y hay que descargar el paquete.
+    """
+    paquete = paquete_para(ciclo, centro)
+    headers = {"X-Version-Paquete": paquete.version}
+    if desde == paquete.version:
+        return Response(status_code=204, headers=headers)
+    parches = paquete.parches_desde(desde)
+    if parches is None:
+        raise HTTPException(status_code=410, detail="Versión no disponible; descarga el paquete completo")
+    cuerpo = b"".join(struct.pack("<I", len(p.datos)) + p.datos for p in parches)
+    return Response(content=cuerpo, media_type="application/octet-stream", headers=headers)
@@ -1,17 +1,106 @@
 from models import *
 from dependencies import *
 from lifespan import app
-from fastapi import Query
-@app.get("/profesores/{materia}", response_model=list[ProfesorPublic])
+from fastapi import Query, Response
+from paginacion import decodificar_cursor, poner_cursor
+from franjas import secciones_de_profesor
+from calificaciones import calificaciones_de_profesores, calificaciones_en_materia, resumen
+from archivo import IndiceArchivado, ciclos_archivados
+from collections import defaultdict
+from sqlalchemy import or_
+
+
+def _profesores_por_materia(session: Session, id_ciclo: int) -> dict[int, frozenset[int]]:
+    por_materia: dict[int, set[int]] = defaultdict(set)
+    for id_materia, id_profesor in session.exec(
+            select(Seccion.id_materia, Seccion.id_profesor).where(Seccion.id_ciclo == id_ciclo).distinct()).all():
+        por_materia[id_materia].add(id_profesor)
+    return {k: frozenset(v) for k, v in por_materia.items()}
+
+
+_profesores_archivados = IndiceArchivado(_profesores_por_materia)
+
+
+def profesores_archivados_de(id_materia: int) -> set[int]:
+    """
+    Profesores con secciones de la materia en ciclos archivados (las
+    particiones conservan los ids de la base principal).
+    """
+    ids: set[int] = set()
+    for id_ciclo in ciclos_archivados():
+        ids |= _profesores_archivados.obtener(id_ciclo).get(id_materia, frozenset())
+    return ids
+
+
+@app.get("/profesores/{materia}", response_model=list[ProfesorPublic], response_model_exclude_unset=True)
 def read_profesores(
-        session: SessionDep,
+        session: SessionCatalogoDep,
+        session_resenas: SessionDep,
+        response: Response,
         materia: MateriaDep,
+        cursor: str | None = None,
         offset: int = 0,
-        limit: Annotated[int, Query(le=1000)] = 1000):
+        limit: Annotated[int, Query(le=1000)] = 1000,
+        calificaciones: bool = False):
+
+    # Semi-join en lugar de JOIN + DISTINCT: se recorre Profesor por su llave
+    # primaria y se detiene al llenar la página. Los ciclos archivados ya no
+    # tienen secciones en el catálogo; sus profesores vienen de las particiones.
+    condicion = Profesor.id.in_(  # type: ignore
+        select(Seccion.id_profesor).where(Seccion.id_materia == materia))
+    en_archivo = profesores_archivados_de(materia)
+    if en_archivo:
+        condicion = or_(condicion, Profesor.id.in_(en_archivo))  # type: ignore
+    stmt = select(Profesor).where(condicion)
+    ultimo = decodificar_cursor(cursor, offset)
+    if ultimo is not None:
+        stmt = stmt.where(Profesor.id > ultimo)  # type: ignore
+
+    profesores = session.exec(stmt.order_by(Profesor.id).offset(offset).limit(limit)).all()  # type: ignore
+    ids = [p.id for p in profesores]
+    poner_cursor(response, ids, limit)  # type: ignore
+    if not calificaciones:
+        return [ProfesorPublic(nombre=p.nombre) for p in profesores]
+
+    # Los agregados viven en la base principal, junto a las reseñas
+    generales = calificaciones_de_profesores(session_resenas, ids)  # type: ignore
+    en_materia = calificaciones_en_materia(session_resenas, materia, ids)  # type: ignore
+    return [
+        ProfesorPublic(
+            nombre=p.nombre,
+            calificacion=resumen(generales.get(p.id)),  # type: ignore
+            calificacion_materia=resumen(en_materia.get(p.id)))  # type: ignore
+        for p in profesores
+    ]
 
-    stmt = select(Profesor).join(Seccion).where(
-        Seccion.id_materia == materia
-    )
 
-    profesores = session.exec(stmt.distinct().offset(offset).limit(limit)).all()
-    return profesores
+@app.get("/profesor/{nombre}/{ciclo}/horario", response_model=list[SeccionMateriaPublic])
+def read_horario_profesor(nombre: str, ciclo: CicloDep):
+    """
+    Todas las secciones del profesor en el ciclo, en cualquier centro.
+    """
+    id_profesor = validar_profesor(nombre)
+    return [
+        SeccionMateriaPublic(materia=e.materia, **e.publica.model_dump())
+        for e in secciones_de_profesor(ciclo, id_profesor)
+    ]
+
+
+@app.get("/profesor/{nombre}/calificaciones", response_model=CalificacionesProfesorPublic)
+def read_calificaciones_profesor(session: SessionDep, nombre: str):
+    """
+    Resumen de las reseñas del profesor: general y por materia.
+    """
+    id_profesor = validar_profesor(nombre)
+    general = session.get(CalificacionProfesor, id_profesor)
+    por_materia = session.exec(
+        select(Materia.clave, CalificacionProfesorMateria)
+        .join(Materia, CalificacionProfesorMateria.id_materia == Materia.id)  # type: ignore
+        .where(CalificacionProfesorMateria.id_profesor == id_profesor, CalificacionProfesorMateria.total > 0)
+        .order_by(Materia.clave)
+    ).all()
+    return CalificacionesProfesorPublic(
+        profesor=nombre,
+        general=resumen(general),
+        materias={clave: resumen(agregado) for clave, agregado in por_materia}
+    )
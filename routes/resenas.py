@@ -2,19 +2,22 @@ from lifespan import app
 from models import *
 from database import SessionDep
 from dependencies import *
-from fastapi import Query, Request
+from fastapi import Query, Request, Response
 from fastapi.responses import HTMLResponse
-import hashlib
 import random
 from email_service import enviar_enlace_verificacion
-from faker import Faker
-fake = Faker('es_MX')
+from consultas import resenas_con_relaciones
+from calificaciones import registrar_calificacion
+from paginacion import decodificar_cursor, poner_cursor
+from seudonimos import seudonimo_de
 
 @app.get("/resenas/", response_model=list[ResenaPublic])
 def read_resenas(
         session: SessionDep,
+        response: Response,
         profesor: ProfesorOptDep = None,
         materia: MateriaOptDep = None,
+        cursor: str | None = None,
         offset: int = 0,
         limit: Annotated[int, Query(le=100)] = 100):
     stmt = select(Resena)
@@ -22,15 +25,19 @@ def read_resenas(
         stmt = stmt.where(Resena.id_profesor == profesor)
     if materia is not None:
         stmt = stmt.where(Resena.id_materia == materia)
-    resenas = session.exec(stmt.offset(offset).limit(limit)).all()
+    ultimo = decodificar_cursor(cursor, offset)
+    if ultimo is not None:
+        stmt = stmt.where(Resena.id > ultimo)  # type: ignore
+    resenas = resenas_con_relaciones(
+        session, stmt.order_by(Resena.id).offset(offset).limit(limit))  # type: ignore
+    poner_cursor(response, [r.id for r in resenas], limit)  # type: ignore
 
     result: list[ResenaPublic] = []
     for r in resenas:
-        fake.seed_instance(hashlib.sha256((r.alumno.correo + str(r.alumno.id)).encode('utf-8')).hexdigest())
         result.append(ResenaPublic(
             profesor=r.profesor.nombre,
             materia=r.materia.clave,
-            alumno= f"{fake.word()} {fake.color_name()}".title(),
+            alumno=r.seudonimo,
             contenido=r.contenido,
             satisfaccion=r.satisfaccion
         ))
@@ -45,8 +52,8 @@ async def solicitar_resena(
 ):
 
     id_alumno = validar_alumno(session, datos.correo_alumno)
-    id_materia = validar_materia(session, datos.clave_materia)
-    id_profesor = validar_profesor(session, datos.nombre_profesor)
+    id_materia = validar_materia(datos.clave_materia)
+    id_profesor = validar_profesor(datos.nombre_profesor)
 
     resena_existente = session.exec(
         select(Resena).where(
@@ -74,6 +81,9 @@ async def solicitar_resena(
         if not codigo_existente:
             break
 
+    # Antes del commit: un seudónimo recién generado se guarda con la reseña pendiente
+    nombre = seudonimo_de(session, id_alumno)
+
     if pendiente_existente:
 
         pendiente_existente.contenido = datos.contenido
@@ -106,9 +116,6 @@ async def solicitar_resena(
             request.base_url).rstrip('/')+"/api"
 
         print(f"DEBUG: base_url para email: {base_url}")
-        fake.seed_instance(hashlib.sha256((datos.correo_alumno + str(id_alumno)).encode('utf-8')).hexdigest())
-        nombre=f"{fake.word()} {fake.color_name()}".title()
-        
         await enviar_enlace_verificacion(datos.correo_alumno, codigo, nombre,base_url)
 
     except Exception as e:
@@ -159,6 +166,10 @@ async def verificar_resena(
             )
         ).first()
 
+        registrar_calificacion(
+            session, pendiente.id_profesor, pendiente.id_materia, pendiente.satisfaccion,
+            anterior=resena_existente.satisfaccion if resena_existente else None)
+
         if resena_existente:
             resena_existente.contenido = pendiente.contenido
             resena_existente.satisfaccion = pendiente.satisfaccion
@@ -172,7 +183,8 @@ async def verificar_resena(
                 id_materia=int(pendiente.id_materia),
                 id_alumno=int(pendiente.id_alumno),
                 contenido=pendiente.contenido,
-                satisfaccion=pendiente.satisfaccion
+                satisfaccion=pendiente.satisfaccion,
+                seudonimo=seudonimo_de(session, pendiente.id_alumno)
             )
             session.add(resena_publica) # Marca para INSERT
 
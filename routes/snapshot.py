@@ -0,0 +1,8 @@
+from lifespan import app
+from models import SnapshotPublic
+import database
+
+@app.get("/snapshot", response_model=SnapshotPublic)
+def read_snapshot():
+    catalogo = database.catalogo_activo
+    return SnapshotPublic(generacion=catalogo.generacion, creado=catalogo.creado)
@@ -0,0 +1,65 @@
+from models import *
+from dependencies import *
+from lifespan import app
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from metricas import continua
+import asyncio
+import database
+from tiempo_real import cancelar, evento_disponibilidad, resincronizar, suscribir, valores_actuales
+
+MAX_NRC_POR_SUSCRIPCION = 50
+KEEPALIVE_SEGUNDOS = 25
+
+
+def _valores_iniciales(ciclo: int, nrcs: list[str]) -> tuple[int, dict[str, tuple[int, int]]]:
+    """
+    Generación del catálogo leído y los valores actuales de las secciones.
+    """
+    # Sesión propia y cerrada antes de transmitir: una dependencia de sesión
+    # ocuparía una conexión del pool mientras dure la suscripción
+    catalogo = database.catalogo_activo
+    with Session(catalogo.engine) as session:
+        return catalogo.generacion, valores_actuales(session, ciclo, nrcs)
+
+@app.get("/disponibilidad/{ciclo}/eventos")
+@continua
+async def stream_disponibilidad(
+        ciclo: CicloDep,
+        nrc: Annotated[list[str], Query(min_length=1, max_length=MAX_NRC_POR_SUSCRIPCION)]):
+    """
+    Server-Sent Events con la disponibilidad de las secciones indicadas
+    (?nrc=...&nrc=...). Primero se envía el valor actual de cada una y después
+    un evento 'disponibilidad' solo cuando un scrapeo la cambia.
+    """
+    generacion, actuales = await asyncio.to_thread(_valores_iniciales, ciclo, list(dict.fromkeys(nrc)))
+    if not actuales:
+        raise HTTPException(status_code=404, detail="Sección no encontrada")
+    suscriptor = suscribir(ciclo, actuales, asyncio.get_running_loop())
+    # Un snapshot publicado entre la lectura y la suscripción no se avisó a este
+    # suscriptor; los publicados después sí se avisan. Se vuelve a leer hasta
+    # que los valores sean de la generación activa al momento de suscribirse.
+    try:
+        while generacion < database.catalogo_activo.generacion:
+            generacion, actuales = await asyncio.to_thread(_valores_iniciales, ciclo, list(actuales))
+            resincronizar(suscriptor, ciclo, actuales)
+    except BaseException:
+        cancelar(suscriptor)
+        raise
+
+    async def eventos():
+        try:
+            for clave, (disponibilidad, cupos) in actuales.items():
+                yield evento_disponibilidad(clave, disponibilidad, cupos)
+            while True:
+                try:
+                    yield await asyncio.wait_for(suscriptor.cola.get(), timeout=KEEPALIVE_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    # Mantiene viva la conexión a través de nginx
+                    yield ": keepalive\n\n"
+        finally:
+            cancelar(suscriptor)
+
+    return StreamingResponse(
+        eventos(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
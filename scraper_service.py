@@ -3,12 +3,19 @@ import asyncio
 import httpx
 import json
 import os
+import time
 from bs4 import BeautifulSoup
 from sqlmodel import Session, select
 
 # Importar el engine de la BD y los modelos
 from database import engine
 from models import *
+from snapshots import publicar_snapshot
+from historial import registrar_disponibilidad
+from archivo import nombres_archivados
+from metricas import (
+    medir_espera_lock, scraper_duracion, scraper_ejecuciones, scraper_filas,
+    scraper_paginas, scraper_parseo, scraper_ultimo_exito)
 
 
 BASE_URL = 'http://consulta.siiau.udg.mx/wco/'
@@ -33,6 +40,7 @@ async def get_initial_options_async(client: httpx.AsyncClient):
     try:
         response = await client.get(FORMA_CONSULTA_URL, timeout=15)
         response.raise_for_status()
+        scraper_paginas.incrementar("opciones", "ok")
         soup = BeautifulSoup(response.text, 'html.parser')
 
         # Parseo de Ciclos
@@ -91,6 +99,7 @@ async def get_initial_options_async(client: httpx.AsyncClient):
         return ciclos, centros
     
     except httpx.RequestError as e:
+        scraper_paginas.incrementar("opciones", "error")
         print(f"Error fatal al obtener opciones iniciales: {e}")
         return None, None
 
@@ -103,6 +112,7 @@ async def get_carreras_for_centro_async(client: httpx.AsyncClient, centro_code):
         url = f"{LISTA_CARRERAS_URL}?cup={centro_code}"
         response = await client.get(url, timeout=15)
         response.raise_for_status()
+        scraper_paginas.incrementar("carreras", "ok")
         soup = BeautifulSoup(response.text, 'html.parser')
         
         for link in soup.find_all('a'): # type: ignore
@@ -118,6 +128,7 @@ async def get_carreras_for_centro_async(client: httpx.AsyncClient, centro_code):
                     continue
         return carreras
     except httpx.RequestError:
+        scraper_paginas.incrementar("carreras", "error")
         return {}
 
 def parse_course_data(soup):
@@ -179,8 +190,11 @@ async def get_courses_for_carrera_async(
         try:
             response = await client.post(CONSULTA_OFERTA_URL, data=payload, timeout=20)
             response.raise_for_status()
+            scraper_paginas.incrementar("oferta", "ok")
+            inicio_parseo = time.perf_counter()
             soup = BeautifulSoup(response.text, 'html.parser')
             courses_from_page = parse_course_data(soup)
+            scraper_parseo.observar(time.perf_counter() - inicio_parseo)
             
             if not courses_from_page: 
                 break
@@ -192,6 +206,7 @@ async def get_courses_for_carrera_async(
             p_start += 200
             await asyncio.sleep(0.5) # Pequeña pausa
         except httpx.RequestError as e:
+            scraper_paginas.incrementar("oferta", "error")
             print(f"\n  -> ADVERTENCIA: Error en la solicitud de cursos: {e}. Omitiendo esta carrera.")
             print(f"     Payload: {payload}\n")
             
@@ -245,6 +260,16 @@ def get_or_create(session, model, defaults=None, **kwargs):
 
         return instance, True
 
+def mascara_dias(dias: str) -> int:
+    """
+    Convierte la columna de días de SIIAU (ej: '. M . J . .') en una máscara de bits.
+    """
+    mascara = 0
+    for i, c in enumerate(dias.split(' '), 1):
+        if c and c != ".":
+            mascara |= 1 << (i - 1)
+    return mascara
+
 async def process_center_data(
     client: httpx.AsyncClient, 
     session: Session, 
@@ -370,8 +395,17 @@ async def process_center_data(
                     seccion_obj.disponibilidad = int(course["disponibles"])
                     session.add(seccion_obj)
                     session.commit() # Guardar actualización de cupos
+                    scraper_filas.incrementar("seccion", "actualizada")
+                else:
+                    scraper_filas.incrementar("seccion", "insertada")
                     #print(f"     -> Actualizada Sección NRC {course['nrc']} con cupos y disponibilidad.")
                 
+                # 9.1 Registrar la disponibilidad en el historial (solo si cambió)
+                registrar_disponibilidad(
+                    session, seccion_obj.nrc, ciclo_obj.id,
+                    seccion_obj.disponibilidad, seccion_obj.cupos
+                )
+
                 # 10. Insertar Sesiones (horarios)
                 for horario in course["horarios"]:
                     if not horario["aula"] or not horario["edificio"]:
@@ -396,20 +430,21 @@ async def process_center_data(
                     hora_inicio = datetime.time(hour=int(hora_inicio_str[:2]), minute=int(hora_inicio_str[2:]))
                     hora_fin = datetime.time(hour=int(hora_fin_str[:2]), minute=int(hora_fin_str[2:]))
 
-                    dias_semana = horario["dias"].split(' ')
-                    for i, c in enumerate(dias_semana, 1):
-                        if c != ".":
-                            # 12. Obtener/Crear Sesion
-                            sesion_obj, _ = get_or_create(
-                                session, Sesion,
-                                id_seccion=seccion_obj.id,
-                                id_aula=aula_obj.id,
-                                fecha_inicio=fecha_inicio,
-                                fecha_fin=fecha_fin,
-                                hora_inicio=hora_inicio,
-                                hora_fin=hora_fin,
-                                dia_semana=i
-                            )
+                    dias = mascara_dias(horario["dias"])
+                    if dias:
+                        # 12. Obtener/Crear Sesion (una por patrón de días)
+                        sesion_obj, sesion_creada = get_or_create(
+                            session, Sesion,
+                            id_seccion=seccion_obj.id,
+                            id_aula=aula_obj.id,
+                            fecha_inicio=fecha_inicio,
+                            fecha_fin=fecha_fin,
+                            hora_inicio=hora_inicio,
+                            hora_fin=hora_fin,
+                            dias=dias
+                        )
+                        if sesion_creada:
+                            scraper_filas.incrementar("sesion", "insertada")
             except Exception as e:
                 print(f"Error procesando NRC {course.get('nrc')}: {e}")
                 session.rollback() # Revertir cambios de este curso
@@ -464,12 +499,14 @@ async def scrape_and_update_db(
         print("Scrapeo ya en curso. Omitiendo esta ejecución.")
         return
 
-    async with lock:
+    async with medir_espera_lock(lock, "scrapeo"):
         print("--- INICIANDO PROCESO DE SCRAPEO Y ACTUALIZACIÓN ---")
+        inicio = time.perf_counter()
         try:
             ciclos, centros = await get_initial_options_async(client)
             if not ciclos or not centros:
                 print("No se pudo obtener la configuración inicial. Abortando.")
+                scraper_ejecuciones.incrementar("error")
                 return
 
             # Obtener los N ciclos más recientes
@@ -505,8 +542,16 @@ async def scrape_and_update_db(
                     else:
                         print("[SCRAPEO INICIAL] Todos los ciclos históricos ya tienen datos.")
 
+            # Los ciclos archivados son de solo lectura
+            archivados = nombres_archivados()
+            ciclos_a_procesar = [
+                (code, info) for code, info in ciclos_a_procesar
+                if info["nombre"] not in archivados
+            ]
+
             if not ciclos_a_procesar:
                 print("No hay ciclos para procesar.")
+                scraper_ejecuciones.incrementar("sin_ciclos")
                 return
 
             print(f"\nTotal de ciclos a procesar: {len(ciclos_a_procesar)}")
@@ -541,8 +586,16 @@ async def scrape_and_update_db(
             await asyncio.gather(*workers)
 
             print("--- PROCESO DE SCRAPEO Y ACTUALIZACIÓN COMPLETADO ---")
+            scraper_duracion.observar(time.perf_counter() - inicio)
+            scraper_ejecuciones.incrementar("exito")
+            for _, info in ciclos_a_procesar:
+                scraper_ultimo_exito.fijar(time.time(), info["nombre"])
+
+            # Publicar el resultado como un snapshot nuevo para la API
+            await publicar_snapshot()
 
         except Exception as e:
+            scraper_ejecuciones.incrementar("error")
             print(f"Error fatal durante el scrapeo: {e}")
 
 
@@ -583,6 +636,10 @@ async def scrape_specific_materia(
             print(f"Ciclo '{ciclo_nombre}' no encontrado.")
             return False
 
+        if ciclo_nombre in nombres_archivados():
+            print(f"Ciclo '{ciclo_nombre}' está archivado. No se actualiza.")
+            return False
+
         # 3. Verificar que el centro existe en SIIAU y obtener su info
         if centro_clave not in centros:
             print(f"Centro con clave '{centro_clave}' no encontrado en SIIAU.")
@@ -672,7 +729,15 @@ async def scrape_specific_materia(
                         seccion_obj.disponibilidad = int(course["disponibles"])
                         session.add(seccion_obj)
                         session.commit()
+                        scraper_filas.incrementar("seccion", "actualizada")
+                    else:
+                        scraper_filas.incrementar("seccion", "insertada")
                     
+                    registrar_disponibilidad(
+                        session, seccion_obj.nrc, ciclo_obj.id,
+                        seccion_obj.disponibilidad, seccion_obj.cupos
+                    )
+
                     # Insertar Sesiones
                     for horario in course["horarios"]:
                         if not horario["aula"] or not horario["edificio"]:
@@ -695,24 +760,27 @@ async def scrape_specific_materia(
                         hora_inicio = datetime.time(hour=int(hora_inicio_str[:2]), minute=int(hora_inicio_str[2:]))
                         hora_fin = datetime.time(hour=int(hora_fin_str[:2]), minute=int(hora_fin_str[2:]))
 
-                        dias_semana = horario["dias"].split(' ')
-                        for i, c in enumerate(dias_semana, 1):
-                            if c != ".":
-                                sesion_obj, _ = get_or_create(
-                                    session, Sesion,
-                                    id_seccion=seccion_obj.id,
-                                    id_aula=aula_obj.id,
-                                    fecha_inicio=fecha_inicio,
-                                    fecha_fin=fecha_fin,
-                                    hora_inicio=hora_inicio,
-                                    hora_fin=hora_fin,
-                                    dia_semana=i
-                                )
+                        dias = mascara_dias(horario["dias"])
+                        if dias:
+                            sesion_obj, sesion_creada = get_or_create(
+                                session, Sesion,
+                                id_seccion=seccion_obj.id,
+                                id_aula=aula_obj.id,
+                                fecha_inicio=fecha_inicio,
+                                fecha_fin=fecha_fin,
+                                hora_inicio=hora_inicio,
+                                hora_fin=hora_fin,
+                                dias=dias
+                            )
+                            if sesion_creada:
+                                scraper_filas.incrementar("sesion", "insertada")
                 except Exception as e:
                     print(f"Error procesando NRC {course.get('nrc')}: {e}")
                     session.rollback()
             
             session.commit()
+
+        await publicar_snapshot()
         
         print(f"✓ Scrapeo dirigido de {materia_clave} completado exitosamente.")
         return True
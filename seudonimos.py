@@ -0,0 +1,34 @@
+import hashlib
+import threading
+
+from faker import Faker
+from sqlmodel import Session
+
+from models import Alumno
+
+# Nombre público y determinista de cada alumno. Se calcula una vez y se guarda
+# en Alumno.seudonimo (y en cada Resena), así listar reseñas no usa Faker.
+
+_fake = Faker('es_MX')
+# seed_instance modifica la instancia compartida: generar un nombre a la vez
+_lock_fake = threading.Lock()
+
+
+def generar_seudonimo(correo: str, id_alumno: int) -> str:
+    semilla = hashlib.sha256((correo + str(id_alumno)).encode('utf-8')).hexdigest()
+    with _lock_fake:
+        _fake.seed_instance(semilla)
+        return f"{_fake.word()} {_fake.color_name()}".title()
+
+
+def seudonimo_de(session: Session, id_alumno: int) -> str:
+    """
+    Seudónimo guardado del alumno; si aún no tiene, se calcula y se agrega a la sesión (sin commit).
+    """
+    alumno = session.get(Alumno, id_alumno)
+    if alumno is None or alumno.id is None:
+        raise ValueError(f"Alumno {id_alumno} no existe")
+    if not alumno.seudonimo:
+        alumno.seudonimo = generar_seudonimo(alumno.correo, alumno.id)
+        session.add(alumno)
+    return alumno.seudonimo
@@ -0,0 +1,235 @@
+import asyncio
+import datetime
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+import database
+from busqueda import sincronizar_indice_busqueda
+from cambios import registrar_cambios
+from database import Catalogo, activar_catalogo, crear_engine_solo_lectura, sqlite_file_name
+from models import *
+
+
+SNAPSHOTS_DIR = "snapshots"
+SNAPSHOTS_A_CONSERVAR = 2  # El activo y el anterior (por si quedan lecturas en curso)
+
+# Tablas que forman el catálogo que sirve la API. Reseñas y alumnos se
+# quedan en la base principal porque la API escribe en ellas.
+TABLAS_CATALOGO = [
+    Ciclo.__tablename__,
+    Centro.__tablename__,
+    Carrera.__tablename__,
+    CentroCarreraLink.__tablename__,
+    CarreraMateriaLink.__tablename__,
+    Materia.__tablename__,
+    Profesor.__tablename__,
+    Seccion.__tablename__,
+    Aula.__tablename__,
+    Sesion.__tablename__,
+]
+
+_PATRON_SNAPSHOT = re.compile(r"^catalogo-(\d+)\.db$")
+_lock_construccion = threading.Lock()
+_suscriptores: list[Callable[[Catalogo], None]] = []
+
+
+def al_publicar(funcion: Callable[[Catalogo], None]):
+    """
+    Registra una función que se ejecuta cada vez que se activa un snapshot.
+    Se usa como decorador.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def ruta_snapshot(generacion: int) -> str:
+    return os.path.join(SNAPSHOTS_DIR, f"catalogo-{generacion:06d}.db")
+
+
+def _generaciones_en_disco() -> list[int]:
+    if not os.path.isdir(SNAPSHOTS_DIR):
+        return []
+    generaciones = []
+    for nombre in os.listdir(SNAPSHOTS_DIR):
+        coincidencia = _PATRON_SNAPSHOT.match(nombre)
+        if coincidencia:
+            generaciones.append(int(coincidencia.group(1)))
+    return sorted(generaciones)
+
+
+def esquema_catalogo(conn: sqlite3.Connection, esquema: str) -> list[tuple]:
+    marcadores = ", ".join("?" for _ in TABLAS_CATALOGO)
+    return conn.execute(
+        f"SELECT type, name, sql FROM {esquema}.sqlite_master "
+        f"WHERE tbl_name IN ({marcadores}) AND sql IS NOT NULL "
+        "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, name",
+        TABLAS_CATALOGO
+    ).fetchall()
+
+
+def crear_esquema_catalogo(conn: sqlite3.Connection):
+    for _, _, sql in esquema_catalogo(conn, "origen"):
+        conn.execute(sql)
+
+
+def _sincronizar_tabla(conn: sqlite3.Connection, tabla: str) -> int:
+    """
+    Aplica sobre el snapshot solo las filas que cambiaron en la base principal.
+    """
+    info = conn.execute(f"PRAGMA main.table_info({tabla})").fetchall()
+    columnas = [fila[1] for fila in info]
+    pk = [fila[1] for fila in sorted(info, key=lambda f: f[5]) if fila[5] > 0]
+    lista_pk = ", ".join(pk)
+    antes = conn.total_changes
+
+    conn.execute(
+        f"DELETE FROM main.{tabla} WHERE ({lista_pk}) NOT IN "
+        f"(SELECT {lista_pk} FROM origen.{tabla})"
+    )
+
+    no_pk = [c for c in columnas if c not in pk]
+    if no_pk:
+        accion = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in no_pk)
+    else:
+        accion = "DO NOTHING"
+    conn.execute(
+        f"INSERT INTO main.{tabla} SELECT * FROM "
+        f"(SELECT * FROM origen.{tabla} EXCEPT SELECT * FROM main.{tabla}) "
+        f"WHERE true ON CONFLICT ({lista_pk}) {accion}"
+    )
+    return conn.total_changes - antes
+
+
+def construir_snapshot() -> Catalogo:
+    """
+    Construye un snapshot nuevo del catálogo y lo activa (bloqueante).
+
+    Parte de una copia del snapshot activo y solo aplica las diferencias;
+    si no hay snapshot previo o el esquema cambió, se copia completo.
+    """
+    with _lock_construccion:
+        anterior = database.catalogo_activo
+        generacion = anterior.generacion + 1
+        ruta = ruta_snapshot(generacion)
+        temporal = ruta + ".tmp"
+        ruta_anterior = ruta_snapshot(anterior.generacion)
+        os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+
+        inicio = time.perf_counter()
+        if anterior.generacion and os.path.exists(ruta_anterior):
+            shutil.copyfile(ruta_anterior, temporal)
+        elif os.path.exists(temporal):
+            os.remove(temporal)
+
+        conn = sqlite3.connect(temporal, isolation_level=None)
+        try:
+            conn.execute("ATTACH DATABASE ? AS origen", (sqlite_file_name,))
+            incremental = esquema_catalogo(conn, "main") == esquema_catalogo(conn, "origen")
+            if not incremental:
+                # Snapshot nuevo o esquema distinto: empezar desde un archivo vacío
+                conn.close()
+                os.remove(temporal)
+                conn = sqlite3.connect(temporal, isolation_level=None)
+                conn.execute("ATTACH DATABASE ? AS origen", (sqlite_file_name,))
+
+            conn.execute("BEGIN")
+            if not incremental:
+                crear_esquema_catalogo(conn)
+            # Antes de sincronizar las tablas: el registro de cambios y el índice
+            # de búsqueda se calculan con sus diferencias
+            registrar_cambios(conn, generacion, completo=not incremental)
+            sincronizar_indice_busqueda(conn)
+            filas = sum(_sincronizar_tabla(conn, tabla) for tabla in TABLAS_CATALOGO)
+            conn.execute("COMMIT")
+            conn.execute("DETACH DATABASE origen")
+
+            # Estadísticas para el planificador de consultas
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+
+        os.replace(temporal, ruta)
+        nuevo = Catalogo(
+            crear_engine_solo_lectura(ruta),
+            generacion,
+            datetime.datetime.now(datetime.timezone.utc)
+        )
+        activar_catalogo(nuevo)
+        if anterior.engine is not database.engine:
+            anterior.engine.dispose()
+
+        print(f"[SNAPSHOT] Generación {generacion} activa "
+              f"({'incremental' if incremental else 'completo'}, {filas} filas, "
+              f"{time.perf_counter() - inicio:.2f}s)")
+
+        _limpiar_snapshots_antiguos()
+
+    _notificar(nuevo)
+    return nuevo
+
+
+def _notificar(catalogo: Catalogo):
+    for funcion in _suscriptores:
+        try:
+            funcion(catalogo)
+        except Exception as e:
+            print(f"[SNAPSHOT] Error en {funcion.__name__}: {e}")
+
+
+def _limpiar_snapshots_antiguos():
+    for generacion in _generaciones_en_disco()[:-SNAPSHOTS_A_CONSERVAR]:
+        try:
+            os.remove(ruta_snapshot(generacion))
+        except OSError as e:
+            print(f"[SNAPSHOT] No se pudo borrar la generación {generacion}: {e}")
+
+
+def cargar_snapshot() -> bool:
+    """
+    Activa el snapshot más reciente en disco, si su esquema coincide con la base principal.
+    Retorna False si hay que construir uno nuevo; mientras tanto se sirve la base principal.
+    """
+    generaciones = _generaciones_en_disco()
+    if not generaciones:
+        _notificar(database.catalogo_activo)
+        return False
+
+    generacion = generaciones[-1]
+    ruta = ruta_snapshot(generacion)
+    conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        conn.execute("ATTACH DATABASE ? AS origen", (sqlite_file_name,))
+        vigente = esquema_catalogo(conn, "main") == esquema_catalogo(conn, "origen")
+    finally:
+        conn.close()
+
+    if not vigente:
+        # Conservar la numeración para que la siguiente generación sea mayor
+        activar_catalogo(Catalogo(database.engine, generacion))
+        print(f"[SNAPSHOT] La generación {generacion} tiene un esquema anterior. Se reconstruirá.")
+        _notificar(database.catalogo_activo)
+        return False
+
+    creado = datetime.datetime.fromtimestamp(os.path.getmtime(ruta), datetime.timezone.utc)
+    catalogo = Catalogo(crear_engine_solo_lectura(ruta), generacion, creado)
+    activar_catalogo(catalogo)
+    print(f"[SNAPSHOT] Generación {generacion} cargada desde disco.")
+
+    _notificar(catalogo)
+    return True
+
+
+async def publicar_snapshot():
+    """
+    Construye y activa un snapshot sin bloquear el event loop.
+    """
+    try:
+        await asyncio.to_thread(construir_snapshot)
+    except Exception as e:
+        print(f"[SNAPSHOT] Error al construir el snapshot: {e}")
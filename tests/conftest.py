@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Los módulos de la aplicación usan rutas relativas (database.db, snapshots/,
+# archivo/): las pruebas corren en un directorio temporal con su propia base.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(tempfile.mkdtemp(prefix="mihorario-pruebas-"))
+os.environ["CONTAR_SENTENCIAS"] = "true"
+os.environ.setdefault("MAIL_FROM", "pruebas@example.com")  # email_service lo valida al importarse
+
+
+@pytest.fixture(scope="session")
+def base():
+    from database import create_db_and_tables, engine
+    create_db_and_tables()
+    return engine
+
+
+@pytest.fixture(scope="session")
+def cliente(base):
+    """
+    Cliente de la API sin el lifespan (no arranca el scraper). Los datos se
+    cargan antes de pedirlo; publicar() construye el snapshot que sirve la API.
+    """
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+def publicar():
+    from snapshots import construir_snapshot
+    return construir_snapshot()
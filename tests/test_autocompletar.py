@@ -0,0 +1,59 @@
+import random
+
+from sqlmodel import Session
+
+from autocompletar import IndiceAutocompletar, construir_indice, normalizar
+from models import Materia, Sugerencia
+
+CICLOS, CENTROS = (1, 2, 3), (10, 20, 30, 40)
+
+
+def _indice_aleatorio(semilla: int) -> IndiceAutocompletar:
+    azar = random.Random(semilla)
+    entradas, presencia = [], {}
+    for id_materia in range(300):
+        nombre = " ".join(azar.choice(["ALGEBRA", "ANALISIS", "ARTE", "AUDITORIA", "BIOLOGIA"])
+                          for _ in range(azar.randint(1, 3)))
+        entidad = ("materia", id_materia)
+        sugerencia = Sugerencia(tipo="materia", texto=nombre, clave=f"A{id_materia}")
+        for palabra in normalizar(nombre).split(" "):
+            entradas.append((palabra, sugerencia, entidad))
+        combinaciones = set()
+        for _ in range(azar.randint(0, 3)):
+            ciclo, centro = azar.choice(CICLOS), azar.choice(CENTROS)
+            combinaciones |= {(ciclo, centro), (ciclo, None), (None, centro)}
+        presencia[entidad] = combinaciones
+    return IndiceAutocompletar(1, entradas, presencia)
+
+
+def _por_recorrido(indice: IndiceAutocompletar, prefijo: str, limit: int, filtro) -> list[Sugerencia]:
+    resultado, vistas = [], set()
+    for clave, sugerencia, entidad in zip(indice.claves, indice.sugerencias, indice.entidades):
+        if clave.startswith(prefijo) and entidad not in vistas and (
+                filtro is None or filtro in indice.presencia.get(entidad, ())):
+            vistas.add(entidad)
+            resultado.append(sugerencia)
+    return resultado[:limit]
+
+
+def test_filtros_igual_que_recorrer_todas_las_claves():
+    indice = _indice_aleatorio(1)
+    filtros = [None] + [(c, None) for c in CICLOS] + [(None, c) for c in CENTROS] + [
+        (ciclo, centro) for ciclo in CICLOS for centro in CENTROS]
+    for prefijo in ("a", "al", "audi", "b", "z"):
+        for filtro in filtros:
+            ciclo, centro = filtro or (None, None)
+            assert indice.sugerir(prefijo, 10, ciclo, centro) == _por_recorrido(indice, prefijo, 10, filtro)
+
+
+def test_presencia_de_ciclos_archivados_se_suma(base):
+    with Session(base) as session:
+        materia = Materia(clave="AUT1", nombre="AUTOCOMPLETAR ARCHIVADA", creditos=8)
+        session.add(materia)
+        session.commit()
+        archivada = {("materia", materia.id): {(99, 7), (99, None), (None, 7)}}
+        indice = construir_indice(session, 1, [archivada])
+
+    assert [s.clave for s in indice.sugerir("autocompletar arch", 5, centro=7)] == ["AUT1"]
+    assert [s.clave for s in indice.sugerir("autocompletar arch", 5, ciclo=99)] == ["AUT1"]
+    assert indice.sugerir("autocompletar arch", 5, centro=8) == []
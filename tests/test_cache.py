@@ -0,0 +1,61 @@
+import pytest
+from starlette.requests import Request
+
+from cache import CacheRespuestas, coincide_etag, elegir_codificacion
+
+DISPONIBLES = {"br": b"", "gzip": b""}
+
+
+@pytest.mark.parametrize("accept_encoding, esperada", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0, gzip;q=0.1", "gzip"),
+    ("br;q=inválido", None),
+])
+def test_elegir_codificacion(accept_encoding, esperada):
+    assert elegir_codificacion(accept_encoding, DISPONIBLES) == esperada
+
+
+@pytest.mark.parametrize("if_none_match, coincide", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"abc-gzip"', True),
+    ('"otro", "abc-br"', True),
+    ("*", True),
+    ('"abd"', False),
+])
+def test_coincide_etag(if_none_match, coincide):
+    assert coincide_etag(if_none_match, '"abc"') is coincide
+
+
+def _peticion(**encabezados: str) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in encabezados.items()],
+    })
+
+
+def test_304_lleva_el_etag_de_la_variante_negociada():
+    cache = CacheRespuestas()
+    datos = ["x" * 50] * 100  # Suficiente para comprimirse
+
+    def responder(**encabezados: str):
+        return cache.responder(_peticion(**encabezados), 1, ("prueba",), list[str], lambda: datos)
+
+    completa = responder(accept_encoding="gzip")
+    assert completa.headers["content-encoding"] == "gzip"
+    etag_gzip = completa.headers["etag"]
+
+    revalidada = responder(accept_encoding="gzip", if_none_match=etag_gzip)
+    assert revalidada.status_code == 304
+    assert revalidada.headers["etag"] == etag_gzip
+
+    # Validó la variante gzip pero ahora negocia identidad: el 304 lleva el ETag base
+    identidad = responder(if_none_match=etag_gzip)
+    assert identidad.status_code == 304
+    assert identidad.headers["etag"] == responder().headers["etag"] != etag_gzip
@@ -0,0 +1,26 @@
+import pytest
+
+from historial import codificar_muestra, decodificar_bloque
+
+
+def _bloque(muestras: list[tuple[int, int, int]]) -> bytes:
+    datos, anterior = b"", (0, 0, 0)
+    for muestra in muestras:
+        datos += codificar_muestra(anterior, muestra)
+        anterior = muestra
+    return datos
+
+
+@pytest.mark.parametrize("muestras", [
+    [],
+    [(1_700_000_000, 12, 40)],
+    [(1_700_000_000, 12, 40), (1_700_000_600, 0, 40), (1_700_001_200, -3, 45), (1_700_001_800, 45, 45)],
+    [(2**40, -(2**20), 2**20), (2**40 + 1, 2**20, -(2**20))],
+])
+def test_bloque_ida_y_vuelta(muestras):
+    assert decodificar_bloque(_bloque(muestras)) == muestras
+
+
+def test_deltas_pequenos_ocupan_un_byte():
+    # Un minuto después, un lugar menos y los mismos cupos
+    assert len(codificar_muestra((1000, 5, 40), (1060, 4, 40))) == 3
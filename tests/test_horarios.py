@@ -0,0 +1,64 @@
+import datetime
+import itertools
+
+from horarios import BusquedaHorarios, Opcion, dias_de, evaluar, horarios_encontrados, mascara_sesion
+
+LUNES, MARTES, MIERCOLES, JUEVES = 0b1, 0b10, 0b100, 0b1000
+
+
+def _opcion(dias: int, hora: int, *secciones: tuple[str, int]) -> Opcion:
+    mascara = mascara_sesion(dias, datetime.time(hora), datetime.time(hora + 1, 55))
+    return Opcion(mascara, dias_de(mascara), list(secciones))
+
+
+OPCIONES = {
+    "A": [_opcion(LUNES | MIERCOLES, 7, ("A1", 5)), _opcion(MARTES | JUEVES, 7, ("A2", 3), ("A3", 1))],
+    "B": [_opcion(LUNES | MIERCOLES, 7, ("B1", 2)), _opcion(LUNES | MIERCOLES, 9, ("B2", 4)),
+          _opcion(MARTES | JUEVES, 13, ("B3", 6))],
+    "C": [_opcion(LUNES | MIERCOLES, 11, ("C1", 1)), _opcion(MARTES, 9, ("C2", 8))],
+}
+
+
+def _por_fuerza_bruta() -> list[tuple[int, int]]:
+    puntajes = []
+    for elegidas in itertools.product(*OPCIONES.values()):
+        mascaras = [o.mascara for o in elegidas]
+        if all(not a & b for a, b in itertools.combinations(mascaras, 2)):
+            puntaje = evaluar(sum(mascaras))
+            puntajes.extend([puntaje] * len(list(itertools.product(*(o.secciones for o in elegidas)))))
+    return sorted(puntajes)
+
+
+def test_mejores_horarios_igual_que_fuerza_bruta():
+    busqueda = BusquedaHorarios(OPCIONES, limit=100, tiempo_maximo=10)
+    horarios = [h for h in horarios_encontrados(busqueda) if not h.provisional]
+    assert busqueda.completa
+    assert sorted((h.dias, h.minutos_libres) for h in horarios) == _por_fuerza_bruta()
+    assert len({tuple(h.secciones.items()) for h in horarios}) == len(horarios)
+
+
+def test_lista_final_del_mejor_al_peor_hasta_limit():
+    busqueda = BusquedaHorarios(OPCIONES, limit=3, tiempo_maximo=10)
+    horarios = list(horarios_encontrados(busqueda))
+    provisionales = [h for h in horarios if h.provisional]
+    finales = [(h.dias, h.minutos_libres) for h in horarios if not h.provisional]
+    assert provisionales and horarios[:len(provisionales)] == provisionales
+    assert finales == _por_fuerza_bruta()[:3]
+
+
+def test_mejoras_se_entregan_antes_de_terminar():
+    busqueda = BusquedaHorarios(OPCIONES, limit=1, tiempo_maximo=10)
+    mejoras = busqueda.mejoras()
+    primera = next(mejoras)
+    assert busqueda.combinaciones == []  # La búsqueda sigue en curso
+    puntajes = [primera[0]] + [puntaje for puntaje, _ in mejoras]
+    assert puntajes == sorted(puntajes, reverse=True)
+    assert len(set(puntajes)) == len(puntajes)
+    assert busqueda.combinaciones[0][0] == puntajes[-1] == _por_fuerza_bruta()[0]
+
+
+def test_sin_combinaciones_posibles():
+    opciones = {"A": OPCIONES["A"][:1], "B": OPCIONES["B"][:1]}  # Mismo horario
+    busqueda = BusquedaHorarios(opciones, limit=10)
+    assert list(horarios_encontrados(busqueda)) == []
+    assert busqueda.completa
@@ -0,0 +1,158 @@
+import itertools
+
+import pytest
+from sqlmodel import Session, and_, select
+
+from conftest import publicar
+
+# /materias/ y /carreras/ se responden desde la matriz de oferta precalculada.
+# Cada combinación de filtros se compara contra las consultas con DISTINCT y
+# joins sobre seccion que respondían antes esos endpoints.
+
+CICLOS = [None, "2024B", "2025B"]
+CENTROS = [None, "CENTRO MATRIZ NORTE", "CENTRO MATRIZ SUR"]
+CARRERAS = [None, "MTZ1", "MTZ2", "MTZ3"]
+
+
+@pytest.fixture(scope="module")
+def datos(base, cliente):
+    from models import (
+        Aula, Carrera, CarreraMateriaLink, Centro, CentroCarreraLink, Ciclo, Materia, Profesor, Seccion)
+
+    with Session(base) as session:
+        ciclos = [Ciclo(nombre=nombre) for nombre in CICLOS[1:]]
+        centros = [Centro(nombre=nombre) for nombre in CENTROS[1:]]
+        carreras = [Carrera(clave=clave, nombre=f"CARRERA {clave}") for clave in CARRERAS[1:]]
+        materias = [Materia(clave=f"M{i:02d}", nombre=f"MATERIA MATRIZ {i}", creditos=8) for i in range(20)]
+        profesor = Profesor(nombre="PROFESOR MATRIZ")
+        session.add_all(ciclos + centros + carreras + materias + [profesor, Aula(salon="M001", edificio="DEDX")])
+        session.commit()
+
+        # Carrera 0 en ambos centros, 1 solo en el norte, 2 en ninguno
+        session.add_all([
+            CentroCarreraLink(id_centro=centros[0].id, id_carrera=carreras[0].id),
+            CentroCarreraLink(id_centro=centros[1].id, id_carrera=carreras[0].id),
+            CentroCarreraLink(id_centro=centros[0].id, id_carrera=carreras[1].id),
+        ])
+        for i, materia in enumerate(materias):
+            for j, carrera in enumerate(carreras):
+                if i % (j + 2) == 0:
+                    session.add(CarreraMateriaLink(id_carrera=carrera.id, id_materia=materia.id))
+
+        # Materias 15-19 sin secciones; el resto repartidas entre ciclos y centros
+        nrc = 0
+        for i, materia in enumerate(materias[:15]):
+            for ciclo, centro in itertools.product(ciclos, centros):
+                if (i + ciclo.id + centro.id) % 3:
+                    nrc += 1
+                    session.add(Seccion(
+                        nrc=f"{800000 + nrc}", numero="D01", id_ciclo=ciclo.id, id_materia=materia.id,
+                        id_profesor=profesor.id, id_centro=centro.id, cupos=30, disponibilidad=5))
+        session.commit()
+
+    publicar()
+    return cliente
+
+
+def _id(session: Session, modelo, campo, valor: str | None) -> int | None:
+    return None if valor is None else session.exec(select(modelo.id).where(campo == valor)).one()
+
+
+def _materias_sql(session: Session, ciclo, carrera, centro, offset=0, limit=1000) -> list[str]:
+    from models import CarreraMateriaLink, Materia, Seccion
+
+    stmt = select(Materia)
+    if ciclo or centro:
+        stmt = stmt.join(Seccion)
+    if ciclo is not None:
+        stmt = stmt.where(Seccion.id_ciclo == ciclo)
+    if carrera is not None:
+        stmt = stmt.join(CarreraMateriaLink, and_(
+            CarreraMateriaLink.id_carrera == carrera, CarreraMateriaLink.id_materia == Materia.id))
+    if centro is not None:
+        stmt = stmt.where(Seccion.id_centro == centro)
+    # La consulta original no ordenaba; la matriz pagina por id
+    stmt = stmt.distinct().order_by(Materia.id).offset(offset).limit(limit)
+    return [m.clave for m in session.exec(stmt).all()]
+
+
+def _carreras_sql(session: Session, ciclo, centro) -> set[str]:
+    from models import Carrera, CarreraMateriaLink, CentroCarreraLink, Seccion
+
+    on_clause = Seccion.id_materia == CarreraMateriaLink.id_materia
+    if ciclo is not None:
+        on_clause = and_(on_clause, Seccion.id_ciclo == ciclo)
+    if centro is not None:
+        on_clause = and_(on_clause, Seccion.id_centro == centro)
+    stmt = (
+        select(Carrera)
+        .join(CentroCarreraLink, CentroCarreraLink.id_carrera == Carrera.id)  # type: ignore
+        .join(CarreraMateriaLink, CarreraMateriaLink.id_carrera == Carrera.id)  # type: ignore
+        .join(Seccion, on_clause)
+        .distinct()
+    )
+    if centro is not None:
+        stmt = stmt.where(CentroCarreraLink.id_centro == centro)
+    return {c.clave for c in session.exec(stmt).all()}
+
+
+def _url(ruta: str, **filtros) -> str:
+    return ruta + "?" + "&".join(f"{k}={v}" for k, v in filtros.items() if v is not None)
+
+
+def _get(cliente, url: str):
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta
+
+
+@pytest.mark.parametrize("ciclo, centro, carrera", list(itertools.product(CICLOS, CENTROS, CARRERAS)))
+def test_materias_igual_que_la_consulta(datos, base, ciclo, centro, carrera):
+    from models import Carrera, Centro, Ciclo
+
+    with Session(base) as session:
+        id_ciclo = _id(session, Ciclo, Ciclo.nombre, ciclo)
+        id_centro = _id(session, Centro, Centro.nombre, centro)
+        id_carrera = _id(session, Carrera, Carrera.clave, carrera)
+        esperadas = _materias_sql(session, id_ciclo, id_carrera, id_centro)
+        paginas = [_materias_sql(session, id_ciclo, id_carrera, id_centro, offset, 4) for offset in (0, 4, 8)]
+
+    todas = _get(datos, _url("/materias/", ciclo=ciclo, centro=centro, carrera=carrera)).json()
+    assert [m["clave"] for m in todas] == esperadas
+
+    for offset, esperada in zip((0, 4, 8), paginas):
+        pagina = _get(datos, _url("/materias/", ciclo=ciclo, centro=centro, carrera=carrera, offset=offset, limit=4))
+        assert [m["clave"] for m in pagina.json()] == esperada
+
+
+@pytest.mark.parametrize("ciclo, centro", list(itertools.product(CICLOS[1:], CENTROS[1:])))
+def test_materias_por_cursor_recorren_la_consulta(datos, base, ciclo, centro):
+    from models import Centro, Ciclo
+
+    with Session(base) as session:
+        id_ciclo = _id(session, Ciclo, Ciclo.nombre, ciclo)
+        id_centro = _id(session, Centro, Centro.nombre, centro)
+        esperadas = _materias_sql(session, id_ciclo, None, id_centro)
+
+    recorridas, cursor = [], None
+    while True:
+        respuesta = _get(datos, _url("/materias/", ciclo=ciclo, centro=centro, cursor=cursor, limit=3))
+        recorridas.extend(m["clave"] for m in respuesta.json())
+        cursor = respuesta.headers.get("X-Siguiente-Cursor")
+        if cursor is None:
+            break
+    assert recorridas == esperadas
+
+
+@pytest.mark.parametrize("ciclo, centro", list(itertools.product(CICLOS, CENTROS)))
+def test_carreras_igual_que_la_consulta(datos, base, ciclo, centro):
+    from models import Centro, Ciclo
+
+    with Session(base) as session:
+        id_ciclo = _id(session, Ciclo, Ciclo.nombre, ciclo)
+        id_centro = _id(session, Centro, Centro.nombre, centro)
+        esperadas = _carreras_sql(session, id_ciclo, id_centro)
+
+    carreras = _get(datos, _url("/carreras/", ciclo=ciclo, centro=centro)).json()
+    assert len(carreras) == len(esperadas)
+    assert {c["clave"] for c in carreras} == esperadas
@@ -0,0 +1,90 @@
+import pytest
+
+import metricas
+from metricas import Contador, Histograma, Medidor
+
+
+@pytest.fixture
+def registrar():
+    creadas = []
+
+    def crear(clase, *args, **kwargs):
+        metrica = clase(*args, **kwargs)
+        creadas.append(metrica)
+        return metrica
+    yield crear
+    for metrica in creadas:
+        metricas._metricas.remove(metrica)
+
+
+def test_contador_con_etiquetas(registrar):
+    contador = registrar(Contador, "prueba_total", "Contador de prueba.", ("ruta", "codigo"))
+    contador.incrementar("/materias/", "200")
+    contador.incrementar("/materias/", "200", cantidad=2)
+    contador.incrementar('/a"b\\c', "404")
+    assert contador.exponer().splitlines() == [
+        "# HELP prueba_total Contador de prueba.",
+        "# TYPE prueba_total counter",
+        'prueba_total{ruta="/materias/",codigo="200"} 3',
+        'prueba_total{ruta="/a\\"b\\\\c",codigo="404"} 1',
+    ]
+
+
+def test_medidor_sin_etiquetas(registrar):
+    medidor = registrar(Medidor, "prueba_en_curso", "Medidor de prueba.")
+    medidor.fijar(2)
+    medidor.sumar(-0.5)
+    assert medidor.exponer().splitlines()[-1] == "prueba_en_curso 1.5"
+
+
+def test_histograma_acumula_buckets(registrar):
+    histograma = registrar(Histograma, "prueba_segundos", "Histograma de prueba.", ("ruta",), (0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, "/x")
+    assert histograma.exponer().splitlines()[2:] == [
+        'prueba_segundos_bucket{ruta="/x",le="0.1"} 2',
+        'prueba_segundos_bucket{ruta="/x",le="1"} 3',
+        'prueba_segundos_bucket{ruta="/x",le="+Inf"} 4',
+        'prueba_segundos_sum{ruta="/x"} 3.65',
+        'prueba_segundos_count{ruta="/x"} 4',
+    ]
+
+
+def test_exponer_incluye_todas_las_metricas(registrar):
+    registrar(Contador, "prueba_registrada_total", "Registrada.")
+    texto = metricas.exponer()
+    assert texto.endswith("\n")
+    assert "# TYPE prueba_registrada_total counter" in texto
+    assert "# TYPE http_peticiones_total counter" in texto
+
+
+def test_respuesta_continua_se_mide_hasta_los_encabezados():
+    import time
+
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.add_middleware(metricas.MiddlewareMetricas)
+    durante = {}
+
+    @app.get("/prueba/continua")
+    @metricas.continua
+    def continua():
+        def cuerpo():
+            yield b"inicio\n"
+            time.sleep(0.3)
+            durante["en_curso"] = metricas.en_curso._valores[()]
+            durante["transmisiones"] = metricas.transmisiones._valores[("/prueba/continua",)]
+            yield b"fin\n"
+        return StreamingResponse(cuerpo())
+
+    en_curso = metricas.en_curso._valores[()]
+    assert TestClient(app).get("/prueba/continua").text == "inicio\nfin\n"
+
+    assert durante == {"en_curso": en_curso, "transmisiones": 1}
+    assert metricas.transmisiones._valores[("/prueba/continua",)] == 0
+    conteos, suma = metricas.latencia._series[("/prueba/continua", "GET")]
+    assert sum(conteos) == 1 and suma[0] < 0.3
+    assert metricas.peticiones._valores[("/prueba/continua", "GET", "200")] == 1
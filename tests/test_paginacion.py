@@ -0,0 +1,43 @@
+import base64
+
+import pytest
+from fastapi import HTTPException, Response
+
+from paginacion import HEADER_CURSOR, codificar_cursor, decodificar_cursor, poner_cursor
+
+
+@pytest.mark.parametrize("ultimo_id", [0, 1, 57, 2**31, 2**62])
+def test_cursor_ida_y_vuelta(ultimo_id):
+    cursor = codificar_cursor(ultimo_id)
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == ultimo_id
+
+
+def test_sin_cursor():
+    assert decodificar_cursor(None) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "no es base64!",
+    base64.urlsafe_b64encode(b"otro:5").decode(),
+    base64.urlsafe_b64encode(b"id:cinco").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_cursor_invalido(cursor):
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_cursor_con_offset():
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor(codificar_cursor(10), offset=5)
+    assert error.value.status_code == 400
+
+
+def test_poner_cursor_solo_con_pagina_completa():
+    completa, incompleta = Response(), Response()
+    poner_cursor(completa, [3, 8, 13], 3)
+    poner_cursor(incompleta, [3, 8], 3)
+    assert decodificar_cursor(completa.headers[HEADER_CURSOR]) == 13
+    assert HEADER_CURSOR not in incompleta.headers
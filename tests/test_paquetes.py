@@ -0,0 +1,58 @@
+import random
+import zlib
+
+import pytest
+
+from paquetes import aplicar_parche, crear_parche, version_de
+
+
+def _contenido(semilla: int, largo: int) -> bytes:
+    return random.Random(semilla).randbytes(largo)
+
+
+@pytest.mark.parametrize("base, nuevo", [
+    (b"", b""),
+    (b"", b"contenido nuevo"),
+    (b"contenido viejo", b""),
+    (_contenido(1, 5000), _contenido(1, 5000)),
+    (_contenido(2, 100), _contenido(3, 100)),
+])
+def test_parche_reconstruye_la_version_nueva(base, nuevo):
+    assert aplicar_parche(base, crear_parche(base, nuevo)) == nuevo
+
+
+def test_parche_de_un_cambio_pequeno_es_pequeno():
+    base = _contenido(4, 20000)
+    nuevo = bytearray(base)
+    for posicion in (10, 7000, 15000):  # Disponibilidades que cambian en el lugar
+        nuevo[posicion] ^= 0xFF
+    nuevo = bytes(nuevo[:12000] + b"seccion nueva" + nuevo[12000:18000])  # Inserción y recorte
+
+    parche = crear_parche(base, nuevo)
+    assert aplicar_parche(base, parche) == nuevo
+    assert len(parche) < 200
+
+
+def test_parche_encabezado_con_versiones():
+    base, nuevo = _contenido(5, 300), _contenido(6, 300)
+    datos = zlib.decompress(crear_parche(base, nuevo))
+    assert datos[:4] == b"MHD1"
+    assert datos[4:12].hex() == version_de(base)
+    assert datos[12:20].hex() == version_de(nuevo)
+
+
+def test_parche_sobre_otra_base_falla():
+    base, nuevo = _contenido(7, 1000), _contenido(8, 1000)
+    with pytest.raises(ValueError):
+        aplicar_parche(nuevo, crear_parche(base, nuevo))
+
+
+def test_paquetes_en_memoria_acotados(monkeypatch):
+    import paquetes
+    monkeypatch.setattr(paquetes, "MAX_PAQUETES", 2)
+    monkeypatch.setattr(paquetes, "_paquetes", paquetes.OrderedDict())
+    for id_centro in (1, 2):
+        paquetes._nueva_version((1, id_centro), 1, _contenido(id_centro, 100))
+    paquetes._obtener((1, 1))  # Usado más recientemente que (1, 2)
+    paquetes._nueva_version((1, 3), 1, _contenido(3, 100))
+    assert list(paquetes._paquetes) == [(1, 1), (1, 3)]
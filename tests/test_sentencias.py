@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+from sqlmodel import Session
+
+from conftest import publicar
+
+# El número de sentencias SQL de un endpoint no debe crecer con el número de
+# filas que devuelve (consultas N+1). Cada caso compara una respuesta chica con
+# una grande; el conteo viene del encabezado X-Sentencias-SQL (CONTAR_SENTENCIAS).
+
+
+@pytest.fixture(scope="module")
+def datos(base, cliente):
+    from models import (
+        Alumno, Aula, Centro, Ciclo, Materia, Profesor, Resena, Seccion, Sesion)
+
+    with Session(base) as session:
+        ciclo = Ciclo(nombre="2025A")
+        centro = Centro(nombre="C.U. DE CS. EXACTAS E ING.", clave="D")
+        session.add_all([ciclo, centro])
+        materias = [Materia(clave=f"S{i}", nombre=f"MATERIA {i}", creditos=8) for i in range(12)]
+        profesores = [Profesor(nombre=f"PROFESOR SENTENCIAS {i}") for i in range(45)]
+        aulas = [Aula(salon=f"A{i:03d}", edificio=f"DUCT{i % 3}") for i in range(10)]
+        alumnos = [Alumno(correo=f"alumno{i}@alumnos.udg.mx", seudonimo=f"Alumno {i}") for i in range(10)]
+        session.add_all(materias + profesores + aulas + alumnos)
+        session.commit()
+
+        nrc = 0
+        for materia, cantidad in ((materias[0], 3), (materias[1], 45)):
+            for k in range(cantidad):
+                nrc += 1
+                seccion = Seccion(
+                    nrc=f"{900000 + nrc}", numero=f"D{k:02d}", id_ciclo=ciclo.id, id_materia=materia.id,
+                    id_profesor=profesores[k].id, id_centro=centro.id, cupos=40, disponibilidad=k % 5)
+                session.add(seccion)
+                session.flush()
+                for j, dias in enumerate((0b00101, 0b01010)):
+                    session.add(Sesion(
+                        id_seccion=seccion.id, id_aula=aulas[(k + j) % len(aulas)].id,
+                        fecha_inicio=datetime.date(2025, 1, 20), fecha_fin=datetime.date(2025, 6, 1),
+                        hora_inicio=datetime.time(7 + j * 2), hora_fin=datetime.time(8 + j * 2, 55), dias=dias))
+
+        # Una reseña del profesor 0 y nueve del profesor 1, de alumnos y materias distintos
+        for profesor, cantidad in ((profesores[0], 1), (profesores[1], 9)):
+            for i in range(cantidad):
+                session.add(Resena(
+                    id_profesor=profesor.id, id_materia=materias[2 + i].id, id_alumno=alumnos[i].id,
+                    contenido="Buena clase", satisfaccion=1 + i % 5, seudonimo=alumnos[i].seudonimo))
+        session.commit()
+
+    publicar()
+    return cliente
+
+
+def _sentencias(cliente, url: str, filas: int) -> int:
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, respuesta.text
+    assert len(respuesta.json()) == filas
+    return int(respuesta.headers["X-Sentencias-SQL"])
+
+
+def test_secciones_de_materia(datos):
+    pocas = _sentencias(datos, "/materia/CUCEI/S0/2025A/secciones", 3)
+    muchas = _sentencias(datos, "/materia/CUCEI/S1/2025A/secciones", 45)
+    assert pocas == muchas
+
+
+def test_resenas_por_profesor(datos):
+    una = _sentencias(datos, "/resenas/?profesor=PROFESOR SENTENCIAS 0", 1)
+    nueve = _sentencias(datos, "/resenas/?profesor=PROFESOR SENTENCIAS 1", 9)
+    assert una == nueve
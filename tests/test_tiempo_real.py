@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+from sqlmodel import Session, select
+
+from conftest import publicar
+
+
+@pytest.fixture(scope="module")
+def seccion(base, cliente):
+    from models import Centro, Ciclo, Materia, Profesor, Seccion
+
+    with Session(base) as session:
+        ciclo, centro = Ciclo(nombre="2023A"), Centro(nombre="CENTRO TIEMPO REAL")
+        materia, profesor = Materia(clave="TR1", nombre="TIEMPO REAL", creditos=8), Profesor(nombre="PROFESOR TR")
+        session.add_all([ciclo, centro, materia, profesor])
+        session.commit()
+        session.add(Seccion(
+            nrc="700001", numero="D01", id_ciclo=ciclo.id, id_materia=materia.id,
+            id_profesor=profesor.id, id_centro=centro.id, cupos=30, disponibilidad=0))
+        session.commit()
+        id_ciclo = ciclo.id
+    publicar()
+    return id_ciclo, "700001"
+
+
+def _fijar_disponibilidad(base, nrc: str, disponibilidad: int):
+    from models import Seccion
+
+    with Session(base) as session:
+        fila = session.exec(select(Seccion).where(Seccion.nrc == nrc)).one()
+        fila.disponibilidad = disponibilidad
+        session.add(fila)
+        session.commit()
+    publicar()
+
+
+def test_publicacion_entre_lectura_y_suscripcion_no_se_pierde(base, seccion, monkeypatch):
+    import routes.tiempo_real as ruta
+    import tiempo_real
+
+    id_ciclo, nrc = seccion
+    original = ruta._valores_iniciales
+    llamadas = 0
+
+    def con_publicacion_intermedia(*args):
+        nonlocal llamadas
+        llamadas += 1
+        leidos = original(*args)
+        if llamadas == 1:
+            _fijar_disponibilidad(base, nrc, 5)  # Llega antes de suscribirse
+        return leidos
+
+    monkeypatch.setattr(ruta, "_valores_iniciales", con_publicacion_intermedia)
+
+    async def primer_evento():
+        respuesta = await ruta.stream_disponibilidad(id_ciclo, [nrc])
+        eventos = respuesta.body_iterator
+        try:
+            evento = await eventos.__anext__()
+            assert tiempo_real._ultimos[(id_ciclo, nrc)] == (5, 30)
+            return evento
+        finally:
+            await eventos.aclose()
+
+    evento = asyncio.run(primer_evento())
+    assert llamadas == 2
+    assert json.loads(evento.split("data: ")[1])["disponibilidad"] == 5
+    assert (id_ciclo, nrc) not in tiempo_real._ultimos  # La suscripción se canceló al cerrar
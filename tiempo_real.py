@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from sqlmodel import Session, select
+
+from cambios import secciones_cambiadas
+from database import Catalogo
+from models import *
+from snapshots import al_publicar
+
+# Avisos de disponibilidad en tiempo real (Server-Sent Events). Las suscripciones
+# viven en un solo índice en memoria (ciclo, nrc) -> suscriptores; un suscriptor
+# sin cambios solo ocupa su cola. Al publicarse un snapshot se cruzan las
+# secciones que cambiaron en esa generación (registro de cambios) con las
+# suscritas y se avisa solo si cambió la disponibilidad.
+
+MAX_PENDIENTES = 32  # Eventos en cola por suscriptor; si se llena se descartan los más viejos
+_LOTE_NRC = 500
+
+Clave = tuple[int, str]  # (id_ciclo, nrc)
+
+
+class Suscriptor:
+    def __init__(self, claves: frozenset[Clave], loop: asyncio.AbstractEventLoop):
+        self.claves = claves
+        self.loop = loop
+        self.cola: asyncio.Queue[str] = asyncio.Queue(maxsize=MAX_PENDIENTES)
+
+    def enviar(self, evento: str):
+        # Se llama desde el hilo que publica el snapshot
+        try:
+            self.loop.call_soon_threadsafe(self._encolar, evento)
+        except RuntimeError:
+            pass  # El loop ya se cerró (apagado del servidor)
+
+    def _encolar(self, evento: str):
+        if self.cola.full():
+            self.cola.get_nowait()
+        self.cola.put_nowait(evento)
+
+
+_suscriptores: dict[Clave, set[Suscriptor]] = defaultdict(set)
+# Último valor (disponibilidad, cupos) avisado por sección suscrita
+_ultimos: dict[Clave, tuple[int, int]] = {}
+_lock = threading.Lock()
+
+
+def evento_disponibilidad(nrc: str, disponibilidad: int, cupos: int) -> str:
+    datos = json.dumps({"nrc": nrc, "disponibilidad": disponibilidad, "cupos": cupos})
+    return f"event: disponibilidad\ndata: {datos}\n\n"
+
+
+def valores_actuales(session: Session, id_ciclo: int, nrcs: list[str]) -> dict[str, tuple[int, int]]:
+    valores: dict[str, tuple[int, int]] = {}
+    for inicio in range(0, len(nrcs), _LOTE_NRC):
+        for nrc, disponibilidad, cupos in session.exec(
+            select(Seccion.nrc, Seccion.disponibilidad, Seccion.cupos).where(
+                Seccion.id_ciclo == id_ciclo,
+                Seccion.nrc.in_(nrcs[inicio:inicio + _LOTE_NRC]))  # type: ignore
+        ).all():
+            valores[nrc] = (disponibilidad, cupos)
+    return valores
+
+
+def suscribir(id_ciclo: int, actuales: dict[str, tuple[int, int]], loop: asyncio.AbstractEventLoop) -> Suscriptor:
+    suscriptor = Suscriptor(frozenset((id_ciclo, nrc) for nrc in actuales), loop)
+    with _lock:
+        for clave in suscriptor.claves:
+            _suscriptores[clave].add(suscriptor)
+            _ultimos.setdefault(clave, actuales[clave[1]])
+    return suscriptor
+
+
+def resincronizar(suscriptor: Suscriptor, id_ciclo: int, actuales: dict[str, tuple[int, int]]):
+    """
+    Reemplaza los últimos valores de las secciones del suscriptor por unos
+    leídos después de suscribirse. A lo mucho repite un aviso; no pierde ninguno.
+    """
+    with _lock:
+        for nrc, valor in actuales.items():
+            if (id_ciclo, nrc) in suscriptor.claves:
+                _ultimos[(id_ciclo, nrc)] = valor
+
+
+def cancelar(suscriptor: Suscriptor):
+    with _lock:
+        for clave in suscriptor.claves:
+            restantes = _suscriptores.get(clave)
+            if restantes is None:
+                continue
+            restantes.discard(suscriptor)
+            if not restantes:
+                del _suscriptores[clave]
+                _ultimos.pop(clave, None)
+
+
+def _valores_cambiados(session: Session, generacion: int) -> dict[Clave, tuple[int, int]]:
+    """
+    (disponibilidad, cupos) de las secciones suscritas que cambiaron en la
+    generación. Si el registro no la cubre se leen todas las suscritas.
+    """
+    cambiadas = secciones_cambiadas(session, generacion)
+    with _lock:
+        suscritas = set(_suscriptores)
+    if cambiadas is not None:
+        return {
+            (id_ciclo, nrc): (disponibilidad, cupos)
+            for id_ciclo, nrc, disponibilidad, cupos in cambiadas
+            if (id_ciclo, nrc) in suscritas
+        }
+
+    por_ciclo: dict[int, list[str]] = defaultdict(list)
+    for id_ciclo, nrc in suscritas:
+        por_ciclo[id_ciclo].append(nrc)
+    return {
+        (id_ciclo, nrc): valor
+        for id_ciclo, nrcs in por_ciclo.items()
+        for nrc, valor in valores_actuales(session, id_ciclo, nrcs).items()
+    }
+
+
+@al_publicar
+def _avisar_cambios(catalogo: Catalogo):
+    with _lock:
+        if not _suscriptores:
+            return
+
+    avisos = 0
+    with Session(catalogo.engine) as session:
+        cambiadas = _valores_cambiados(session, catalogo.generacion)
+    for clave, valor in cambiadas.items():
+        with _lock:
+            ultimo = _ultimos.get(clave)
+            if ultimo is None or ultimo == valor:
+                continue
+            _ultimos[clave] = valor
+            # Solo cambiaron los cupos: se guarda para el siguiente aviso, sin avisar
+            if ultimo[0] == valor[0]:
+                continue
+            destinatarios = list(_suscriptores.get(clave, ()))
+        evento = evento_disponibilidad(clave[1], *valor)
+        for suscriptor in destinatarios:
+            suscriptor.enviar(evento)
+        avisos += len(destinatarios)
+    if avisos:
+        print(f"[TIEMPO REAL] {avisos} avisos de disponibilidad enviados.")